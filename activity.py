@@ -0,0 +1,252 @@
+"""
+Aktivite Kaydı
+Proje ve chat yazmalarından `Activity` satırları üretir, akışları okur ve
+saklama süresi dolan kayıtları temizler.
+
+Satırlar yazma anında, yazmanın kendi transaction'ında eklenir:
+- ORM ile yazılan projeler ve mesajlar için mapper olayları (register_activity_events),
+- Core INSERT kullanan chat yazıcısı için chat_activity (chat_writer._write).
+
+Bir olay, akışında görüneceği her kullanıcı için ayrı satırdır (proje sahibi
+ve danışmanı); böylece her akış tek bir indeks aralığı taramasıdır.
+"""
+import os
+from datetime import datetime, timedelta
+
+# 0: kayıtlar silinmez
+ACTIVITY_RETENTION_DAYS = int(os.getenv("ACTIVITY_RETENTION_DAYS", "365"))
+PRUNE_BATCH_SIZE = 5000
+FEED_LIMIT = 10
+MAX_FEED_LIMIT = 100
+DETAIL_LENGTH = 255
+
+
+def _current_actor_id():
+    """İstek içindeysek oturumdaki kullanıcı"""
+    from flask import has_request_context
+    if not has_request_context():
+        return None
+    from flask_login import current_user
+    return current_user.id if current_user and current_user.is_authenticated else None
+
+
+def chat_activity(values: dict) -> dict:
+    """Chat mesajı kolonlarından aktivite satırı"""
+    return {
+        'user_id': values['user_id'],
+        'actor_id': values['user_id'],
+        'kind': 'chat',
+        'project_id': values.get('project_id'),
+        'subject': None,
+        'detail': (values.get('message') or '')[:DETAIL_LENGTH],
+        'created_at': values.get('timestamp') or datetime.utcnow(),
+    }
+
+
+def project_activities(project, event: str) -> list:
+    """Proje olayından (created, updated, deleted) sahip ve danışman satırları"""
+    row = {
+        'actor_id': _current_actor_id() or project.owner_id,
+        'project_id': project.id,
+        'subject': project.title,
+        'detail': project.status,
+        'created_at': project.updated_at if event != 'deleted' and project.updated_at else datetime.utcnow(),
+    }
+    rows = [dict(row, user_id=project.owner_id, kind=f'project_{event}')]
+    if project.advisor_id and project.advisor_id != project.owner_id:
+        rows.append(dict(row, user_id=project.advisor_id, kind=f'advised_{event}'))
+    return rows
+
+
+_events_registered = False
+
+
+def register_activity_events():
+    """Proje ve chat mesajı yazmalarını aynı flush içinde aktivite tablosuna ekle"""
+    global _events_registered
+    if _events_registered:
+        return
+    from sqlalchemy import event, insert, inspect
+    from models import Activity, Project, ChatMessage
+
+    table = Activity.__table__
+
+    def on_project(event_name):
+        def listener(mapper, connection, target):
+            if event_name == 'updated':
+                # after_update, net değişikliği olmayan nesneler için de çağrılır
+                state = inspect(target)
+                if not any(state.attrs[column.key].history.has_changes() for column in mapper.column_attrs):
+                    return
+            connection.execute(insert(table), project_activities(target, event_name))
+        return listener
+
+    event.listen(Project, 'after_insert', on_project('created'))
+    event.listen(Project, 'after_update', on_project('updated'))
+    event.listen(Project, 'after_delete', on_project('deleted'))
+
+    def on_chat_message(mapper, connection, target):
+        values = {column.key: getattr(target, column.key) for column in mapper.column_attrs}
+        connection.execute(insert(table), [chat_activity(values)])
+
+    event.listen(ChatMessage, 'after_insert', on_chat_message)
+    _events_registered = True
+
+
+# --- Akışlar ---
+
+def feed_query(user_id=None, before_id=None):
+    """
+    Yeniden eskiye (created_at, id) sıralı aktivite sorgusu
+    user_id yoksa tüm olaylar (admin akışı; danışman kopyaları hariç).
+    before_id: o kayıttan daha eski olanlar (keyset imleci).
+    """
+    from sqlalchemy import select, tuple_
+    from models import Activity
+
+    query = Activity.query
+    if user_id is not None:
+        query = query.filter(Activity.user_id == user_id)
+    else:
+        query = query.filter(~Activity.kind.startswith('advised_'))
+    if before_id:
+        cursor_created_at = select(Activity.created_at).where(Activity.id == before_id).scalar_subquery()
+        query = query.filter(tuple_(Activity.created_at, Activity.id) < tuple_(cursor_created_at, before_id))
+    return query.order_by(Activity.created_at.desc(), Activity.id.desc())
+
+
+def _limit(limit):
+    try:
+        return max(1, min(int(limit), MAX_FEED_LIMIT))
+    except (TypeError, ValueError):
+        return FEED_LIMIT
+
+
+def format_activity(activity):
+    """Profil sayfasının beklediği biçim (icon, title, description, time)"""
+    from models import Project
+
+    kind = activity.kind
+    if kind.startswith('project_'):
+        verb = {'project_created': 'oluşturuldu', 'project_deleted': 'silindi'}.get(kind, 'güncellendi')
+        item = {
+            'icon': 'project-diagram',
+            'title': f"Proje {verb}: {activity.subject}",
+            'description': f"Durum: {Project.STATUS_DISPLAY.get(activity.detail, activity.detail)}",
+        }
+    elif kind.startswith('advised_'):
+        item = {
+            'icon': 'chalkboard-teacher',
+            'title': f"Danışmanlık: {activity.subject}",
+            'description': 'Öğrenci projesi silindi' if kind == 'advised_deleted' else 'Öğrenci projesi güncellendi',
+        }
+    else:
+        message = activity.detail or ''
+        item = {
+            'icon': 'comments',
+            'title': 'AI Asistan ile sohbet',
+            'description': message[:50] + '...' if len(message) > 50 else message,
+        }
+    at = activity.created_at
+    item.update({
+        'id': activity.id,
+        'kind': kind,
+        'project_id': activity.project_id,
+        'time': at.strftime('%d.%m.%Y') if at else '',
+        'timestamp': at.isoformat() if at else None,
+    })
+    return item
+
+
+def user_feed(user_id, limit=FEED_LIMIT, before_id=None):
+    """Kullanıcının aktivite akışı (biçimlendirilmiş)"""
+    return [format_activity(activity) for activity in feed_query(user_id, before_id).limit(_limit(limit))]
+
+
+def global_feed(limit=FEED_LIMIT, before_id=None):
+    """Admin akışı: tüm kullanıcıların olayları, işlemi yapanın adıyla"""
+    from models import db, User
+
+    activities = feed_query(None, before_id).limit(_limit(limit)).all()
+    actor_ids = {activity.actor_id or activity.user_id for activity in activities}
+    # Yazarlar tek sorguda
+    names = dict(
+        db.session.query(User.id, User.username).filter(User.id.in_(actor_ids)).all()
+    ) if actor_ids else {}
+    items = []
+    for activity in activities:
+        item = format_activity(activity)
+        item['user_id'] = activity.user_id
+        item['actor'] = names.get(activity.actor_id or activity.user_id)
+        items.append(item)
+    return items
+
+
+# --- Geçmiş verinin aktarılması ve temizlik ---
+
+def _retention_cutoff(days):
+    return datetime.utcnow() - timedelta(days=days) if days and days > 0 else None
+
+
+def backfill_activity(conn, rebuild=False, days=ACTIVITY_RETENTION_DAYS):
+    """
+    Mevcut projeler ve chat mesajlarından aktivite kayıtlarını oluştur
+    Tablo doluysa (rebuild verilmedikçe) hiçbir şey yapmaz; saklama süresinden
+    eski olaylar aktarılmaz. Eklenen satır sayısını döndürür.
+    """
+    from sqlalchemy import text
+
+    if rebuild:
+        conn.execute(text('DELETE FROM activity'))
+    elif conn.execute(text('SELECT 1 FROM activity LIMIT 1')).first():
+        return 0
+
+    cutoff = _retention_cutoff(days) or datetime(1970, 1, 1)
+    columns = 'INSERT INTO activity (user_id, actor_id, kind, project_id, subject, detail, created_at) '
+    statements = [
+        # Oluşturma anı
+        columns + "SELECT owner_id, owner_id, 'project_created', id, title, status, created_at "
+                  "FROM project WHERE created_at >= :cutoff",
+        # Son güncelleme (oluşturmadan sonraysa)
+        columns + "SELECT owner_id, owner_id, 'project_updated', id, title, status, updated_at "
+                  "FROM project WHERE updated_at > created_at AND updated_at >= :cutoff",
+        # Danışmanın akışı
+        columns + "SELECT advisor_id, owner_id, 'advised_updated', id, title, status, "
+                  "COALESCE(updated_at, created_at) FROM project "
+                  "WHERE advisor_id IS NOT NULL AND advisor_id != owner_id "
+                  "AND COALESCE(updated_at, created_at) >= :cutoff",
+        columns + f"SELECT user_id, user_id, 'chat', project_id, NULL, substr(message, 1, {DETAIL_LENGTH}), timestamp "
+                  "FROM chat_message WHERE timestamp >= :cutoff",
+    ]
+    inserted = 0
+    for statement in statements:
+        inserted += conn.execute(text(statement), {'cutoff': cutoff}).rowcount
+    return inserted
+
+
+def prune_activity(days=ACTIVITY_RETENTION_DAYS, batch_size=PRUNE_BATCH_SIZE):
+    """
+    Saklama süresinden eski kayıtları sil (uygulama bağlamında çağrılmalı)
+    Yazma kilidini kısa tutmak için her grup ayrı transaction'da silinir.
+    Silinen satır sayısını döndürür.
+    """
+    from sqlalchemy import delete, select
+    from models import db, Activity
+
+    cutoff = _retention_cutoff(days)
+    if cutoff is None:
+        return 0
+    table = Activity.__table__
+    total = 0
+    while True:
+        with db.engine.begin() as conn:
+            expired = select(table.c.id).where(table.c.created_at < cutoff).limit(batch_size)
+            deleted = conn.execute(delete(table).where(table.c.id.in_(expired))).rowcount
+        total += deleted
+        if deleted < batch_size:
+            break
+    if total:
+        # Önbellekteki akışlarda silinen kayıtlar kalmasın
+        from profile_stats import profile_cache
+        profile_cache.clear()
+    return total
@@ -0,0 +1,238 @@
+"""
+Admin Paneli Sorguları
+Dashboard istatistikleri SQL COUNT / GROUP BY ile, tablolar sunucu tarafında
+sayfalanmış, sıralanabilir ve filtrelenebilir olarak hesaplanır.
+
+Hiçbir fonksiyon tabloların tamamını belleğe yüklemez: istatistikler tek
+satırlık toplamlar, tablo sayfaları LIMIT/OFFSET ile en fazla MAX_PER_PAGE satırdır.
+"""
+from datetime import datetime, timedelta
+
+DEFAULT_PER_PAGE = 20
+MAX_PER_PAGE = 100
+MESSAGE_DAYS = 14
+
+
+def dashboard_stats(days=MESSAGE_DAYS):
+    """Dashboard kartları ve grafikleri için toplamlar"""
+    from sqlalchemy import func, select
+    from models import db, User, Project, Competition, ChatMessage
+
+    # Dört toplam tek sorguda (skaler alt sorgular)
+    totals = db.session.execute(select(
+        select(func.count(User.id)).scalar_subquery().label('total_users'),
+        select(func.count(Project.id)).scalar_subquery().label('total_projects'),
+        select(func.count(Competition.id)).scalar_subquery().label('total_competitions'),
+        select(func.count(ChatMessage.id)).scalar_subquery().label('total_messages'),
+    )).mappings().one()
+
+    projects_by_status = dict(
+        db.session.query(Project.status, func.count(Project.id)).group_by(Project.status).all()
+    )
+    users_by_role = dict(
+        db.session.query(User.role, func.count(User.id)).group_by(User.role).all()
+    )
+
+    since = datetime.utcnow().date() - timedelta(days=days - 1)
+    day = func.date(ChatMessage.timestamp)
+    counts = {
+        str(date): count for date, count in
+        db.session.query(day, func.count(ChatMessage.id))
+        .filter(ChatMessage.timestamp >= since)
+        .group_by(day)
+        .all()
+    }
+    # Mesaj olmayan günler de 0 ile listelenir
+    messages_per_day = []
+    for offset in range(days):
+        date = since + timedelta(days=offset)
+        messages_per_day.append({'date': date.isoformat(), 'count': counts.get(date.isoformat(), 0)})
+
+    stats = dict(totals)
+    stats.update({
+        'projects_by_status': projects_by_status,
+        'users_by_role': users_by_role,
+        'messages_per_day': messages_per_day,
+    })
+    return stats
+
+
+def recent_users(limit=5):
+    """Son kayıt olan kullanıcılar"""
+    from models import User
+    return User.query.order_by(User.created_at.desc(), User.id.desc()).limit(limit).all()
+
+
+# --- Sayfalanmış tablolar ---
+
+def _serialize_user(user):
+    return {
+        'id': user.id,
+        'username': user.username,
+        'full_name': user.get_full_name(),
+        'initials': f"{(user.first_name or 'A')[:1]}{(user.last_name or 'B')[:1]}",
+        'email': user.email,
+        'role': user.role,
+        'role_display': user.get_role_display(),
+        'is_active': user.is_active,
+        'created_at': user.created_at.isoformat() if user.created_at else None,
+    }
+
+
+def _serialize_project(project):
+    return {
+        'id': project.id,
+        'title': project.title,
+        'competition': project.competition.name if project.competition else None,
+        'owner': project.owner.get_full_name(),
+        'advisor': project.advisor.get_full_name() if project.advisor else None,
+        'status': project.status,
+        'status_display': project.get_status_display(),
+        'progress': project.get_progress_percentage(),
+        'updated_at': project.updated_at.isoformat() if project.updated_at else None,
+    }
+
+
+def _serialize_competition(row):
+    competition, project_count = row
+    return {
+        'id': competition.id,
+        'name': competition.name,
+        'description': competition.description or '',
+        'is_active': competition.is_active,
+        'registration_deadline': competition.registration_deadline.isoformat() if competition.registration_deadline else None,
+        'project_count': project_count,
+        'created_at': competition.created_at.isoformat() if competition.created_at else None,
+    }
+
+
+def _users_query(args):
+    from models import User
+
+    query = User.query
+    if args.get('role'):
+        query = query.filter(User.role == args['role'])
+    if args.get('q'):
+        pattern = f"%{args['q']}%"
+        query = query.filter(
+            User.username.ilike(pattern) | User.email.ilike(pattern) |
+            User.first_name.ilike(pattern) | User.last_name.ilike(pattern)
+        )
+    return query
+
+
+def _projects_query(args):
+    from sqlalchemy.orm import joinedload
+    from models import Project
+
+    # Sahip, danışman ve yarışma aynı sorguda yüklenir (satır başına ek sorgu yok)
+    query = Project.query.options(
+        joinedload(Project.owner), joinedload(Project.advisor), joinedload(Project.competition)
+    )
+    if args.get('status'):
+        query = query.filter(Project.status == args['status'])
+    if args.get('q'):
+        query = query.filter(Project.title.ilike(f"%{args['q']}%"))
+    return query
+
+
+def _competitions_query(args):
+    from sqlalchemy import func
+    from models import db, Competition, Project
+
+    project_counts = (
+        db.session.query(Project.competition_id, func.count(Project.id).label('project_count'))
+        .group_by(Project.competition_id)
+        .subquery()
+    )
+    query = (
+        db.session.query(Competition, func.coalesce(project_counts.c.project_count, 0))
+        .outerjoin(project_counts, project_counts.c.competition_id == Competition.id)
+    )
+    if args.get('is_active') in ('true', 'false'):
+        query = query.filter(Competition.is_active == (args['is_active'] == 'true'))
+    if args.get('q'):
+        query = query.filter(Competition.name.ilike(f"%{args['q']}%"))
+    return query
+
+
+def _table_definitions():
+    from models import User, Project, Competition
+
+    return {
+        'users': {
+            'query': _users_query,
+            'count_column': User.id,
+            'serialize': _serialize_user,
+            'sort': {
+                'created_at': User.created_at, 'username': User.username,
+                'email': User.email, 'role': User.role,
+            },
+            'default_sort': 'created_at',
+            'id_column': User.id,
+        },
+        'projects': {
+            'query': _projects_query,
+            'count_column': Project.id,
+            'serialize': _serialize_project,
+            'sort': {
+                'updated_at': Project.updated_at, 'created_at': Project.created_at,
+                'title': Project.title, 'status': Project.status,
+            },
+            'default_sort': 'updated_at',
+            'id_column': Project.id,
+        },
+        'competitions': {
+            'query': _competitions_query,
+            'count_column': Competition.id,
+            'serialize': _serialize_competition,
+            'sort': {
+                'created_at': Competition.created_at, 'name': Competition.name,
+                'registration_deadline': Competition.registration_deadline,
+            },
+            'default_sort': 'created_at',
+            'id_column': Competition.id,
+        },
+    }
+
+
+def table_page(table, args):
+    """
+    Admin tablosunun bir sayfası
+    args: page, per_page, sort, order (asc/desc), q ve tabloya özel filtreler
+    (users: role, projects: status, competitions: is_active)
+    """
+    definition = _table_definitions().get(table)
+    if definition is None:
+        raise ValueError(f"Bilinmeyen tablo: {table}")
+
+    try:
+        page = max(1, int(args.get('page', 1)))
+    except (TypeError, ValueError):
+        page = 1
+    try:
+        per_page = max(1, min(int(args.get('per_page', DEFAULT_PER_PAGE)), MAX_PER_PAGE))
+    except (TypeError, ValueError):
+        per_page = DEFAULT_PER_PAGE
+
+    sort = args.get('sort') if args.get('sort') in definition['sort'] else definition['default_sort']
+    order = 'asc' if args.get('order') == 'asc' else 'desc'
+    column = definition['sort'][sort]
+    id_column = definition['id_column']
+
+    query = definition['query'](args)
+    # Toplam: filtrelenmiş sorgunun COUNT'u (satırlar yüklenmez)
+    total = query.with_entities(definition['count_column']).order_by(None).count()
+
+    ordering = (column.asc(), id_column.asc()) if order == 'asc' else (column.desc(), id_column.desc())
+    rows = query.order_by(*ordering).limit(per_page).offset((page - 1) * per_page).all()
+
+    return {
+        'items': [definition['serialize'](row) for row in rows],
+        'page': page,
+        'per_page': per_page,
+        'total': total,
+        'pages': (total + per_page - 1) // per_page,
+        'sort': sort,
+        'order': order,
+    }
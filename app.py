@@ -11,68 +11,110 @@ from dotenv import load_dotenv
 # .env dosyasını yükle
 load_dotenv()
 
-# Flask uygulamasını oluştur
-app = Flask(__name__)
-
-# Konfigürasyon
-app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'dev-secret-key-change-this')
-app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL', 'sqlite:///rag_assistant.db')
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-app.config['UPLOAD_FOLDER'] = os.getenv('UPLOAD_FOLDER', 'uploads')
-
-# Modelleri import et ve db'yi başlat
+# Modelleri import et (db, create_app içinde uygulamaya bağlanır)
 from models import db
-db.init_app(app)
 
-# Uzantıları başlat
+# Uzantılar - uygulamadan bağımsız oluşturulur, create_app içinde başlatılır
 login_manager = LoginManager()
-login_manager.init_app(app)
 login_manager.login_view = 'auth.login'
 login_manager.login_message = 'Lütfen giriş yapın.'
-socketio = SocketIO(app, cors_allowed_origins="*")
-
-# Model ve route'ları import et
-with app.app_context():
-    from models import User, Project, Competition
-    from routes import auth_bp, main_bp, api_bp, admin_bp
+socketio = SocketIO()
 
-# Blueprint'leri kaydet
-app.register_blueprint(auth_bp, url_prefix='/auth')
-app.register_blueprint(main_bp)
-app.register_blueprint(api_bp, url_prefix='/api')
-app.register_blueprint(admin_bp, url_prefix='/admin')
+_chat_handlers_registered = False
 
 @login_manager.user_loader
 def load_user(user_id):
-    from models import User
-    return db.session.get(User, int(user_id))
+    # Süreli süreç içi önbellek (bkz. user_cache.py)
+    from user_cache import load_user as load_cached_user
+    return load_cached_user(int(user_id))
+
+def create_app(config=None):
+    """Flask uygulamasını oluştur ve yapılandır (application factory)"""
+    app = Flask(__name__)
+
+    # Konfigürasyon
+    app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'dev-secret-key-change-this')
+    app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL', 'sqlite:///rag_assistant.db')
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['UPLOAD_FOLDER'] = os.getenv('UPLOAD_FOLDER', 'uploads')
+    if config:
+        app.config.update(config)
+
+    # SQLite performans profili (WAL, PRAGMA'lar, bağlantı havuzu)
+    from db_profile import configure_database, register_pragmas
+    configure_database(app)
 
-# SocketIO event handlers
-try:
-    from chat_handlers import init_chat_handlers
-    # Chat handler'ları başlat
+    # Uzantıları başlat
+    db.init_app(app)
     with app.app_context():
-        init_chat_handlers(socketio, db)
-    print("Chat handlers başarıyla yüklendi!")
-except ImportError as e:
-    print(f"Chat handlers yüklenemedi: {e}")
-except Exception as e:
-    print(f"Chat handlers başlatılırken hata: {e}")
-    print("Chat handlers devre dışı bırakıldı")
+        register_pragmas(app, db.engine)
+    login_manager.init_app(app)
+    # SocketIO event handlers (SocketIO nesnesine bir kez kaydedilir)
+    # init_app'ten önce: sunucu yokken kaydedilen handler'lar her init_app'te yeni
+    # sunucuya da eklenir (aynı süreçte oluşturulan sonraki uygulamalar, ör. testler)
+    global _chat_handlers_registered
+    if not _chat_handlers_registered:
+        try:
+            from chat_handlers import init_chat_handlers
+            # Chat handler'ları başlat
+            with app.app_context():
+                init_chat_handlers(socketio, db)
+            _chat_handlers_registered = True
+        except ImportError as e:
+            print(f"Chat handlers yüklenemedi: {e}")
+        except Exception as e:
+            print(f"Chat handlers başlatılırken hata: {e}")
+            print("Chat handlers devre dışı bırakıldı")
 
-if __name__ == '__main__':
+    # Çoklu süreç / sunucu: yayınlar mesaj kuyruğu üzerinden (bkz. socketio_queue.py)
+    from socketio_queue import SOCKETIO_MESSAGE_QUEUE, queue_options
+    app.config.setdefault('SOCKETIO_MESSAGE_QUEUE', SOCKETIO_MESSAGE_QUEUE)
+    socketio.init_app(app, cors_allowed_origins="*", **queue_options(app.config['SOCKETIO_MESSAGE_QUEUE']))
+
+    # Chat mesajları arka planda toplu yazılır
+    from chat_writer import chat_writer
+    chat_writer.init_app(app)
+
+    # Proje ve chat yazmalarında profil önbelleğini temizle
+    from profile_stats import register_cache_events
+    register_cache_events()
+
+    # Kullanıcı değişince oturum kullanıcısı önbelleğini temizle
+    from user_cache import register_user_events
+    register_user_events()
+
+    # Proje ve chat yazmalarını aktivite kaydına ekle
+    from activity import register_activity_events
+    register_activity_events()
+
+    # Proje / yarışma güncellenince AI proje bağlamı önbelleğini temizle
+    from project_context import register_context_events
+    register_context_events()
+
+    # Model ve route'ları import et
+    with app.app_context():
+        from models import User, Project, Competition
+        from routes import auth_bp, main_bp, api_bp, admin_bp
+
+    # Blueprint'leri kaydet
+    app.register_blueprint(auth_bp, url_prefix='/auth')
+    app.register_blueprint(main_bp)
+    app.register_blueprint(api_bp, url_prefix='/api')
+    app.register_blueprint(admin_bp, url_prefix='/admin')
+
+    return app
+
+def init_database(app):
+    """Veritabanı tablolarını ve varsayılan admin kullanıcısını oluştur"""
     with app.app_context():
-        # Veritabanı tablolarını oluştur
-        db.create_all()
-        
-        # RAG sistemini başlat (geçici olarak devre dışı)
-        # from rag_system import init_rag_system
-        # init_rag_system()
-        
+        # Veritabanı tablolarını oluştur / bekleyen migration'ları uygula
+        from migrations import upgrade
+        upgrade()
+
         # Admin kullanıcısı oluştur (eğer yoksa)
         from models import User
         from werkzeug.security import generate_password_hash
-        
+
         admin_user = User.query.filter_by(username='admin').first()
         if not admin_user:
             admin = User(
@@ -84,6 +126,12 @@ if __name__ == '__main__':
             db.session.add(admin)
             db.session.commit()
             print("Admin kullanıcısı oluşturuldu: admin/admin123")
-    
+
+if __name__ == '__main__':
+    # Geliştirme sunucusu - production için wsgi.py ve gunicorn.conf.py kullanın
+    app = create_app()
+    init_database(app)
+
     # Uygulamayı başlat
-    socketio.run(app, debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
+    debug = os.getenv('FLASK_DEBUG', 'True').lower() in ('1', 'true', 'yes')
+    socketio.run(app, debug=debug, host='0.0.0.0', port=5000)
@@ -0,0 +1,1805 @@
+#!/usr/bin/env python3
+"""
+Performans ölçümleri ve yük testleri
+Kullanım: python benchmark.py <komut> [seçenekler]
+"""
+import os
+import sys
+import json
+import time
+import random
+import socket
+import tempfile
+import argparse
+import subprocess
+import statistics
+import multiprocessing
+from datetime import datetime, timedelta
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+    return values[index]
+
+
+def _free_address():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return f"127.0.0.1:{s.getsockname()[1]}"
+
+
+def _bench_app(**config):
+    """Geçici SQLite veritabanıyla uygulama oluştur (gerçek veritabanına dokunmaz)"""
+    from app import create_app
+    from migrations import upgrade
+
+    path = os.path.join(tempfile.mkdtemp(prefix="bench_db_"), "bench.db")
+    config.setdefault("SQLALCHEMY_DATABASE_URI", f"sqlite:///{path}")
+    # Socket.IO test istemcisi mesaj kuyruğuyla çalışmaz
+    config.setdefault("SOCKETIO_MESSAGE_QUEUE", "")
+    app = create_app(config)
+    with app.app_context():
+        upgrade()
+    # Süreç içi önbellekler önceki geçici veritabanının satırlarını tutmasın
+    from user_cache import user_cache
+    from profile_stats import profile_cache
+    import project_context
+    user_cache.clear()
+    profile_cache.clear()
+    project_context.clear()
+    return app
+
+
+class QueryCounter:
+    """Blok içinde çalışan SQL ifadelerini say"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.statements = []
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def __enter__(self):
+        from sqlalchemy import event
+        event.listen(self.engine, "before_cursor_execute", self._record)
+        return self
+
+    def __exit__(self, *exc):
+        from sqlalchemy import event
+        event.remove(self.engine, "before_cursor_execute", self._record)
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+
+# --- Vektör veritabanı: çoklu worker yazma/okuma yükü ---
+
+def _vector_store_worker(worker_id, path, address, direct, uploads, batch, queries, dim, results):
+    rng = random.Random(worker_id)
+    errors = 0
+    write_latencies = []
+    query_latencies = []
+
+    if direct:
+        import chromadb
+        from chromadb.config import Settings as ChromaSettings
+        client = chromadb.PersistentClient(path=path, settings=ChromaSettings(anonymized_telemetry=False))
+        collection = client.get_or_create_collection(name="project_documents")
+    else:
+        from vector_store import VectorStoreClient
+        client = VectorStoreClient(path, address=address, authkey=b"benchmark", autostart=False)
+        collection = client.get_or_create_collection("project_documents")
+
+    for upload in range(uploads):
+        ids = [f"w{worker_id}-u{upload}-c{i}" for i in range(batch)]
+        embeddings = [[rng.random() for _ in range(dim)] for _ in ids]
+        started = time.perf_counter()
+        try:
+            collection.upsert(
+                ids=ids,
+                embeddings=embeddings,
+                documents=[f"chunk {i}" for i in ids],
+                metadatas=[{"worker": worker_id} for _ in ids]
+            )
+        except Exception:
+            errors += 1
+        write_latencies.append(time.perf_counter() - started)
+
+        for _ in range(queries):
+            started = time.perf_counter()
+            try:
+                collection.query(query_embeddings=[[rng.random() for _ in range(dim)]], n_results=5)
+            except Exception:
+                errors += 1
+            query_latencies.append(time.perf_counter() - started)
+
+    results.put((errors, write_latencies, query_latencies))
+
+
+def bench_vector_store(args):
+    """Birden fazla süreçten eşzamanlı döküman yükleme ve arama"""
+    path = tempfile.mkdtemp(prefix="bench_chroma_")
+    address = _free_address()
+    broker = None
+
+    if not args.direct:
+        import threading
+        from multiprocessing.connection import Listener
+        from vector_store import VectorStoreBroker, _parse_address
+
+        broker = VectorStoreBroker(path)
+        listener = Listener(_parse_address(address), authkey=b"benchmark")
+        threading.Thread(target=broker.serve, kwargs={"listener": listener}, daemon=True).start()
+
+    results = multiprocessing.Queue()
+    workers = [
+        multiprocessing.Process(
+            target=_vector_store_worker,
+            args=(i, path, address, args.direct, args.uploads, args.batch, args.queries, args.dim, results)
+        )
+        for i in range(args.workers)
+    ]
+
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    collected = [results.get() for _ in workers]
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+
+    errors = sum(r[0] for r in collected)
+    writes = [latency for r in collected for latency in r[1]]
+    reads = [latency for r in collected for latency in r[2]]
+
+    if broker is not None:
+        stored = broker.execute("count", "project_documents", {})
+        broker.stop()
+    else:
+        import chromadb
+        stored = chromadb.PersistentClient(path=path).get_or_create_collection("project_documents").count()
+
+    expected = args.workers * args.uploads * args.batch
+    print(f"Mod: {'doğrudan PersistentClient' if args.direct else 'broker'}")
+    print(f"Worker: {args.workers}, yükleme/worker: {args.uploads}, chunk/yükleme: {args.batch}")
+    print(f"Süre: {elapsed:.2f}s, yazma: {len(writes) / elapsed:.1f} yükleme/s")
+    print(f"Yazma gecikmesi p50={_percentile(writes, 50) * 1000:.1f}ms p95={_percentile(writes, 95) * 1000:.1f}ms")
+    print(f"Sorgu gecikmesi p50={_percentile(reads, 50) * 1000:.1f}ms p95={_percentile(reads, 95) * 1000:.1f}ms")
+    print(f"Hata: {errors}, kaydedilen chunk: {stored}/{expected}")
+    return 0 if errors == 0 and stored == expected else 1
+
+
+# --- Başlangıç süresi: import profili ve ilk isteğe kadar geçen süre ---
+
+def parse_importtime(stderr: str):
+    """`python -X importtime` çıktısını (modül, self_us, cumulative_us) listesine çevir"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+            rows.append((name.strip(), int(self_us), int(cumulative_us)))
+        except ValueError:
+            continue
+    return rows
+
+
+def bench_importtime(args):
+    """Bir modülü import etmenin maliyetini -X importtime ile profille"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {args.module}"],
+        capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__))
+    )
+    rows = parse_importtime(result.stderr)
+    if result.returncode != 0 or not rows:
+        print(result.stderr[-2000:])
+        return 1
+
+    total_us = next((cumulative for name, _, cumulative in rows if name == args.module), rows[-1][2])
+    # Yalnızca üst seviye paketler (ör. 'llama_index', 'chromadb') toplamda anlamlıdır
+    top_level = {}
+    for name, _, cumulative in rows:
+        root = name.split(".")[0]
+        top_level[root] = max(top_level.get(root, 0), cumulative)
+
+    print(f"import {args.module}: {total_us / 1000:.1f}ms")
+    print(f"{'kümülatif':>12}  paket")
+    for root, cumulative in sorted(top_level.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"{cumulative / 1000:>10.1f}ms  {root}")
+    return 0
+
+
+STARTUP_SCRIPT = """
+import time
+started = time.perf_counter()
+from app import create_app
+app = create_app()
+imported = time.perf_counter()
+response = app.test_client().get({path!r})
+served = time.perf_counter()
+print(response.status_code, imported - started, served - started)
+"""
+
+
+def bench_startup(args):
+    """Flask uygulamasının süreç başlangıcından ilk sunulan isteğe kadar geçen süresi"""
+    env = dict(os.environ)
+    env.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(tempfile.mkdtemp(prefix="bench_db_"), "bench.db"))
+
+    samples = []
+    for _ in range(args.runs):
+        started = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, "-c", STARTUP_SCRIPT.format(path=args.path)],
+            capture_output=True, text=True, env=env,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        )
+        total = time.perf_counter() - started
+        if result.returncode != 0:
+            print(result.stderr[-2000:])
+            return 1
+        status, import_s, first_request_s = result.stdout.strip().splitlines()[-1].split()
+        samples.append((total, float(import_s), float(first_request_s), int(status)))
+
+    total_ms = statistics.median(s[0] for s in samples) * 1000
+    import_ms = statistics.median(s[1] for s in samples) * 1000
+    first_ms = statistics.median(s[2] for s in samples) * 1000
+    print(f"Çalıştırma: {args.runs}, istek: GET {args.path} -> {samples[-1][3]}")
+    print(f"import + create_app: {import_ms:.0f}ms, ilk istek (süreç içi): {first_ms:.0f}ms")
+    print(f"Süreç başlangıcından ilk yanıta: {total_ms:.0f}ms (bütçe {args.budget_ms}ms)")
+
+    if args.history:
+        with open(args.history, "a", encoding="utf-8") as f:
+            f.write(json.dumps({
+                "date": datetime.utcnow().isoformat(timespec="seconds"),
+                "import_ms": round(import_ms),
+                "first_request_ms": round(first_ms),
+                "total_ms": round(total_ms),
+                "budget_ms": args.budget_ms
+            }) + "\n")
+
+    if total_ms > args.budget_ms:
+        print("Başlangıç süresi bütçeyi aştı!")
+        return 1
+    return 0
+
+
+# --- Worker başına bellek (RSS/PSS) ---
+
+SMAPS_FIELDS = ("Rss", "Pss", "Shared_Clean", "Shared_Dirty", "Private_Clean", "Private_Dirty")
+
+
+def _read_smaps_rollup(pid):
+    """/proc/<pid>/smaps_rollup alanlarını kB olarak oku (Linux)"""
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            key, _, rest = line.partition(":")
+            if key in SMAPS_FIELDS:
+                values[key] = int(rest.split()[0])
+    return values
+
+
+def _child_pids(pid):
+    children = []
+    for task in os.listdir(f"/proc/{pid}/task"):
+        with open(f"/proc/{pid}/task/{task}/children") as f:
+            children.extend(int(child) for child in f.read().split())
+    return children
+
+
+def _report_rss(master_pid):
+    workers = _child_pids(master_pid)
+    rows = [(pid, _read_smaps_rollup(pid)) for pid in workers]
+    master = _read_smaps_rollup(master_pid)
+
+    print(f"{'pid':>8} {'RSS':>9} {'PSS':>9} {'paylaşılan':>11} {'özel':>9}  (MB)")
+    for pid, values in [(master_pid, master)] + rows:
+        shared = values["Shared_Clean"] + values["Shared_Dirty"]
+        private = values["Private_Clean"] + values["Private_Dirty"]
+        label = " (master)" if pid == master_pid else ""
+        print(f"{pid:>8} {values['Rss'] / 1024:>9.1f} {values['Pss'] / 1024:>9.1f} "
+              f"{shared / 1024:>11.1f} {private / 1024:>9.1f}{label}")
+
+    if rows:
+        total_pss = (master["Pss"] + sum(v["Pss"] for _, v in rows)) / 1024
+        mean_private = statistics.mean(v["Private_Clean"] + v["Private_Dirty"] for _, v in rows) / 1024
+        print(f"Worker: {len(rows)}, toplam PSS: {total_pss:.1f}MB, worker başına özel bellek: {mean_private:.1f}MB")
+
+
+def bench_rss(args):
+    """Gunicorn worker'larının RSS/PSS dağılımı (preload ile ve preload olmadan)"""
+    if args.pid:
+        _report_rss(args.pid)
+        return 0
+
+    import urllib.request
+
+    root = os.path.dirname(os.path.abspath(__file__))
+    for preload in ([True, False] if args.compare else [True]):
+        env = dict(os.environ)
+        env.update({
+            "WEB_CONCURRENCY": str(args.workers),
+            "GUNICORN_PRELOAD": str(preload),
+            "GUNICORN_BIND": f"127.0.0.1:{args.port}",
+            "GUNICORN_WORKER_CLASS": args.worker_class,
+        })
+        server = subprocess.Popen(
+            [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "wsgi:app"],
+            cwd=root, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        try:
+            deadline = time.monotonic() + args.timeout
+            while True:
+                try:
+                    urllib.request.urlopen(f"http://127.0.0.1:{args.port}/", timeout=1)
+                    if len(_child_pids(server.pid)) >= args.workers:
+                        break
+                except OSError:
+                    pass
+                if time.monotonic() > deadline:
+                    print("Sunucu zamanında hazır olmadı")
+                    return 1
+                time.sleep(0.5)
+
+            # Her worker'ın en az bir istek sunmasını sağla
+            for _ in range(args.workers * 4):
+                urllib.request.urlopen(f"http://127.0.0.1:{args.port}/", timeout=5).read()
+
+            print(f"\npreload_app={preload}")
+            _report_rss(server.pid)
+        finally:
+            server.terminate()
+            server.wait()
+    return 0
+
+
+# --- Retrieval: MMR ile tekrar eden içerik ---
+
+def _hash_embedding(text, dim=256):
+    """Model gerektirmeyen deterministik embedding (kelime ve kelime ikilisi hashing)"""
+    import zlib
+    import numpy as np
+
+    vector = np.zeros(dim, dtype=np.float32)
+    words = text.lower().split()
+    for feature in words + [" ".join(pair) for pair in zip(words, words[1:])]:
+        vector[zlib.crc32(feature.encode("utf-8")) % dim] += 1.0
+    return vector
+
+
+def _split_like_rag(text, chunk_size=1000, overlap=200):
+    # rag_system'i (ve ağır bağımlılıklarını) import etmeden aynı bölme mantığı
+    from rag_system import RAGSystem
+    return RAGSystem._split_text(None, text, chunk_size, overlap)
+
+
+def bench_mmr(args):
+    """Düz top-k ile MMR seçiminin token başına benzersiz içerik karşılaştırması"""
+    import numpy as np
+    from retrieval import estimate_tokens, mmr_select, unique_content_ratio
+
+    rng = random.Random(42)
+    topics = [[f"konu{t}_kelime{w}" for w in range(40)] for t in range(args.topics)]
+    filler = [f"ortak{w}" for w in range(60)]
+    sections = []
+    for topic in topics:
+        sections.append(" ".join(rng.choice(topic if rng.random() < 0.6 else filler) for _ in range(args.section_words)))
+    chunks = _split_like_rag(" ".join(sections))
+    embeddings = np.stack([_hash_embedding(chunk) for chunk in chunks])
+
+    plain_ratios, mmr_ratios, plain_tokens, mmr_tokens, select_times = [], [], [], [], []
+    for _ in range(args.queries):
+        topic = rng.choice(topics)
+        query = _hash_embedding(" ".join(rng.choice(topic) for _ in range(8)))
+        similarity = embeddings @ query / (np.linalg.norm(embeddings, axis=1) * np.linalg.norm(query) + 1e-12)
+        candidates = list(np.argsort(-similarity)[:args.fetch_k])
+
+        plain = [chunks[i] for i in candidates[:args.top_k]]
+        started = time.perf_counter()
+        order = mmr_select(query, embeddings[candidates], args.top_k, args.lambda_mult)
+        select_times.append(time.perf_counter() - started)
+        diverse = [chunks[candidates[i]] for i in order]
+
+        plain_ratios.append(unique_content_ratio(plain))
+        mmr_ratios.append(unique_content_ratio(diverse))
+        plain_tokens.append(sum(estimate_tokens(c) for c in plain))
+        mmr_tokens.append(sum(estimate_tokens(c) for c in diverse))
+
+    print(f"Chunk: {len(chunks)}, sorgu: {args.queries}, top_k={args.top_k}, fetch_k={args.fetch_k}, λ={args.lambda_mult}")
+    for label, ratios, tokens in (("Düz top-k", plain_ratios, plain_tokens), ("MMR      ", mmr_ratios, mmr_tokens)):
+        ratio = statistics.mean(ratios)
+        mean_tokens = statistics.mean(tokens)
+        print(f"{label}: benzersiz içerik oranı {ratio:.3f}, {mean_tokens:.0f} token içinde "
+              f"~{ratio * mean_tokens:.0f} benzersiz token")
+    print(f"MMR seçim süresi p50={_percentile(select_times, 50) * 1e6:.0f}µs")
+    return 0
+
+
+# --- Chat geçmişi: keyset sayfalama ve sorgu sayısı ---
+
+def _seed_chat(db, users, messages, project_id=None):
+    from models import User, ChatMessage
+
+    authors = []
+    for i in range(users):
+        user = User(username=f"bench{i}", email=f"bench{i}@example.com", role="student",
+                    first_name="Ad", last_name=f"Soyad{i}", password_hash="x")
+        db.session.add(user)
+        authors.append(user)
+    db.session.flush()
+
+    started = datetime(2024, 1, 1)
+    for i in range(messages):
+        db.session.add(ChatMessage(
+            user_id=authors[i % users].id,
+            project_id=project_id,
+            message=f"mesaj {i}",
+            response=f"yanıt {i}" if i % 2 else None,
+            # Aynı zaman damgasına düşen mesajlar da imleçle doğru sıralanmalı
+            timestamp=started + timedelta(seconds=i // 3)
+        ))
+    db.session.commit()
+
+
+def bench_chat_history(args):
+    """Chat geçmişi sayfalarının süresi (doğruluk: tests/test_chat_history.py)"""
+    from models import db
+    from chat_handlers import chat_history_page
+
+    for size in (args.messages // 10, args.messages):
+        app = _bench_app()
+        with app.app_context():
+            _seed_chat(db, args.users, size)
+            db.session.expire_all()
+
+            pages = 0
+            before_id = None
+            query_counts = []
+            started = time.perf_counter()
+            while True:
+                db.session.expire_all()
+                with QueryCounter(db.engine) as counter:
+                    page = chat_history_page(before_id=before_id, limit=args.limit)
+                query_counts.append(counter.count)
+                pages += 1
+                if not page["has_more"]:
+                    break
+                before_id = page["next_before_id"]
+            elapsed = time.perf_counter() - started
+
+            print(f"{size} mesaj: {pages} sayfa, sayfa başına sorgu {max(query_counts)}, "
+                  f"{elapsed / pages * 1000:.2f}ms/sayfa")
+    return 0
+
+
+# --- AI turları: yinelenen soruların birleştirilmesi ---
+
+def _legacy_history_bytes(rows):
+    """Eski şemada geçmiş yükünün boyutu (her satır bir soru, yanıtlı satır bir de AI mesajı)"""
+    payload = []
+    for row_id, message, response, timestamp in rows:
+        payload.append({"id": row_id, "message": message, "username": "bench", "full_name": "Ad Soyad",
+                        "user_role": "student", "timestamp": timestamp[11:16], "is_ai": False})
+        if response:
+            payload.append({"id": f"ai_{row_id}", "message": response, "username": "AI Asistan",
+                            "full_name": "RAG AI Asistan", "user_role": "ai",
+                            "timestamp": timestamp[11:16], "is_ai": True})
+    return len(json.dumps(payload, ensure_ascii=False).encode("utf-8"))
+
+
+def bench_chat_turns(args):
+    """Eski (soru iki kez yazılan) AI sohbet verisinin migration ile tek satırlık turlara dönüşmesi"""
+    from sqlalchemy import text
+    from app import create_app
+    from models import db, User, ChatMessage
+    from migrations import upgrade
+    from chat_handlers import format_chat_history
+    from chat_protocol import legacy_message
+
+    path = os.path.join(tempfile.mkdtemp(prefix="bench_db_"), "bench.db")
+    app = create_app({"SQLALCHEMY_DATABASE_URI": f"sqlite:///{path}"})
+    with app.app_context():
+        upgrade(target=2)
+        db.session.add_all(User(username=f"bench{i}", email=f"bench{i}@example.com", role="student",
+                                first_name="Ad", last_name="Soyad", password_hash="x")
+                           for i in range(args.users))
+        db.session.commit()
+
+        # Eski handle_ai_chat akışı: önce yalnızca soru, birkaç saniye sonra soru + yanıt
+        started = datetime(2024, 1, 1)
+        with db.engine.begin() as conn:
+            for i in range(args.turns):
+                asked_at = started + timedelta(seconds=i * 30)
+                values = {"user_id": i % args.users + 1, "message": f"soru {i % 40}"}
+                conn.execute(text("INSERT INTO chat_message (user_id, message, timestamp) "
+                                  "VALUES (:user_id, :message, :timestamp)"), dict(values, timestamp=asked_at))
+                conn.execute(text("INSERT INTO chat_message (user_id, message, response, timestamp) "
+                                  "VALUES (:user_id, :message, :response, :timestamp)"),
+                             dict(values, response=f"yanıt {i}", timestamp=asked_at + timedelta(seconds=3)))
+            rows = conn.execute(text("SELECT id, message, response, timestamp FROM chat_message ORDER BY id")).all()
+        before_rows = len(rows)
+        before_bytes = _legacy_history_bytes(rows)
+
+        migration_started = time.perf_counter()
+        upgrade()
+        migration_ms = (time.perf_counter() - migration_started) * 1000
+
+        turns = ChatMessage.query.order_by(ChatMessage.id).all()
+        payload = format_chat_history(turns)
+        after_bytes = len(json.dumps([legacy_message(m) for m in payload], ensure_ascii=False).encode("utf-8"))
+        questions = sum(1 for m in payload if not m["is_ai"])
+        answers = sum(1 for m in payload if m["is_ai"])
+        linked = sum(1 for t in turns if t.conversation_id and t.role and t.response_latency_ms is not None)
+
+    print(f"AI turu: {args.turns}, migration {migration_ms:.0f}ms")
+    print(f"chat_message satırı: {before_rows} -> {len(turns)} ({len(turns) / before_rows:.0%})")
+    print(f"Geçmiş yükü: {before_bytes / 1024:.1f}KB -> {after_bytes / 1024:.1f}KB ({after_bytes / before_bytes:.0%})")
+    print(f"Soru: {questions}, yanıt: {answers}, konuşmaya bağlı tur: {linked}")
+    ok = len(turns) == questions == answers == linked == args.turns
+    if not ok:
+        print("Beklenen: her tur için tek satır, tek soru ve tek yanıt")
+    return 0 if ok else 1
+
+
+# --- Chat yazma: mesaj başına commit ve toplu yazıcı ---
+
+def _per_message_commit_worker(app, user_id, count, latencies):
+    from models import db, ChatMessage
+    with app.app_context():
+        for i in range(count):
+            started = time.perf_counter()
+            db.session.add(ChatMessage(user_id=user_id, message=f"mesaj {i}", timestamp=datetime.utcnow()))
+            db.session.commit()
+            latencies.append(time.perf_counter() - started)
+        db.session.remove()
+
+
+def _write_behind_worker(writer, user_id, count, latencies):
+    pending = []
+    for i in range(count):
+        message = writer.message({"user_id": user_id, "message": f"mesaj {i}", "timestamp": datetime.utcnow()})
+        pending.append((time.perf_counter(), writer.submit(message)))
+    for started, message in pending:
+        message.wait(30)
+        # Mesaj yazıldıktan sonra done işaretlenir; gecikme = gönderimden kalıcı olana kadar
+        latencies.append(message.saved_at - started)
+
+
+def bench_chat_write(args):
+    """Mesaj başına commit ile toplu commit'li (write-behind) yazıcı (doğruluk: tests/test_chat_writer.py)"""
+    import threading
+    from models import db, User, ChatMessage
+    from chat_writer import ChatWriter
+
+    for mode in ("per-message", "write-behind"):
+        app = _bench_app()
+        with app.app_context():
+            user = User(username="bench", email="bench@example.com", role="student", password_hash="x")
+            db.session.add(user)
+            db.session.commit()
+            user_id = user.id
+
+        writer = ChatWriter(max_batch=args.max_batch, max_delay=args.max_delay_ms / 1000)
+        writer.init_app(app)
+        per_thread = args.messages // args.threads
+        latencies = []
+        if mode == "per-message":
+            target, writer_arg = _per_message_commit_worker, app
+        else:
+            target, writer_arg = _write_behind_worker, writer
+        threads = [threading.Thread(target=target, args=(writer_arg, user_id, per_thread, latencies))
+                   for _ in range(args.threads)]
+
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        writer.flush()
+        elapsed = time.perf_counter() - started
+
+        with app.app_context():
+            stored = ChatMessage.query.count()
+        expected = per_thread * args.threads
+        print(f"{mode:>12}: {expected / elapsed:>8.0f} mesaj/s, kalıcı olma gecikmesi "
+              f"p50={_percentile(latencies, 50) * 1000:.1f}ms p95={_percentile(latencies, 95) * 1000:.1f}ms, "
+              f"kaydedilen {stored}/{expected}")
+    return 0
+
+
+# --- SQLite profili: eşzamanlı okuma/yazma ---
+
+def _stress_worker(config, kind, deadline, results):
+    # Her worker ayrı süreç (gunicorn worker'ları gibi); kilitler dosya düzeyinde yarışır
+    from sqlalchemy.exc import OperationalError
+    from app import create_app
+    from models import db, ChatMessage
+    from chat_handlers import chat_history_page
+
+    app = create_app(config)
+    latencies, errors = [], 0
+    with app.app_context():
+        while time.time() < deadline:
+            started = time.perf_counter()
+            try:
+                if kind == "write":
+                    db.session.add(ChatMessage(user_id=1, message="stres", timestamp=datetime.utcnow()))
+                    db.session.commit()
+                else:
+                    chat_history_page(limit=50)
+                    db.session.commit()
+            except OperationalError:
+                # "database is locked": busy_timeout içinde kilit alınamadı
+                db.session.rollback()
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+    results.put((kind, latencies, errors))
+
+
+def bench_sqlite_stress(args):
+    """SQLite profillerinin eşzamanlı okuma/yazma altında kilit beklemesi ve hataları"""
+    from sqlalchemy import text
+    from models import db
+
+    for profile in ("default", "production"):
+        app = _bench_app(SQLITE_PROFILE=profile)
+        with app.app_context():
+            _seed_chat(db, 10, args.seed)
+            journal_mode = db.session.execute(text("PRAGMA journal_mode")).scalar()
+            db.session.remove()
+            db.engine.dispose()
+        config = {"SQLALCHEMY_DATABASE_URI": app.config["SQLALCHEMY_DATABASE_URI"], "SQLITE_PROFILE": profile}
+
+        results = multiprocessing.Queue()
+        # Süreçlerin başlangıç maliyeti ölçüme girmesin
+        deadline = time.time() + 2 + args.seconds
+        workers = [multiprocessing.Process(target=_stress_worker, args=(config, kind, deadline, results))
+                   for kind in ["write"] * args.writers + ["read"] * args.readers]
+        for worker in workers:
+            worker.start()
+        collected = [results.get() for _ in workers]
+        for worker in workers:
+            worker.join()
+
+        print(f"\nProfil: {profile} (journal_mode={journal_mode}), "
+              f"{args.writers} yazıcı + {args.readers} okuyucu süreç")
+        for kind, label in (("write", "yazma"), ("read", "okuma")):
+            latencies = [latency for k, values, _ in collected if k == kind for latency in values]
+            errors = sum(e for k, _, e in collected if k == kind)
+            print(f"  {label:>5}: {len(latencies)} işlem, "
+                  f"p50={_percentile(latencies, 50) * 1000:.1f}ms p95={_percentile(latencies, 95) * 1000:.1f}ms "
+                  f"p99={_percentile(latencies, 99) * 1000:.1f}ms max={max(latencies) * 1000:.0f}ms, "
+                  f"kilit hatası {errors}")
+    return 0
+
+
+# --- Admin paneli: tablo boyutundan bağımsız sayfa maliyeti ---
+
+def _seed_admin(db, users, projects):
+    from models import User, Project
+
+    db.session.execute(User.__table__.insert(), [
+        {"username": f"u{i}", "email": f"u{i}@example.com", "password_hash": "x",
+         "role": ("student", "student", "advisor")[i % 3], "first_name": "Ad", "last_name": f"Soyad{i}",
+         "created_at": datetime(2024, 1, 1) + timedelta(minutes=i), "is_active": True}
+        for i in range(users)
+    ])
+    db.session.execute(Project.__table__.insert(), [
+        {"title": f"Proje {i}", "owner_id": i % users + 1, "advisor_id": (i % users + 1) if i % 2 else None,
+         "status": ("planning", "development", "testing", "completed")[i % 4],
+         "created_at": datetime(2024, 1, 1), "updated_at": datetime(2024, 1, 1) + timedelta(minutes=i)}
+        for i in range(projects)
+    ])
+    db.session.commit()
+
+
+def bench_admin_dashboard(args):
+    """Admin dashboard ve tablo API'lerinin sorgu sayısı ve süresi (küçük ve büyük veri)"""
+    from models import db, User
+
+    urls = ["/admin/dashboard", "/admin/api/users?sort=created_at", "/admin/api/users?role=advisor&q=Soyad1",
+            "/admin/api/projects?status=testing&page=3", "/admin/api/competitions"]
+    results = {}
+    for size in (args.rows // 10, args.rows):
+        app = _bench_app(TESTING=True)
+        with app.app_context():
+            _seed_admin(db, size, size)
+            admin = User(username="admin", email="admin@example.com", role="admin", password_hash="x")
+            db.session.add(admin)
+            db.session.commit()
+            admin_id = admin.id
+            db.session.execute(db.text("ANALYZE"))
+
+        client = app.test_client()
+        with client.session_transaction() as session:
+            session["_user_id"] = str(admin_id)
+        with app.app_context():
+            for url in urls:
+                client.get(url)  # şablon derleme vb. ısınma
+                timings = []
+                for _ in range(args.repeat):
+                    with QueryCounter(db.engine) as counter:
+                        started = time.perf_counter()
+                        response = client.get(url)
+                        timings.append(time.perf_counter() - started)
+                    if response.status_code != 200:
+                        print(f"{url}: HTTP {response.status_code}")
+                        return 1
+                results[(size, url)] = (counter.count, statistics.median(timings) * 1000, len(response.data))
+
+    small, large = args.rows // 10, args.rows
+    print(f"{'istek':<45} {'sorgu':>11} {'ms':>15} {'KB':>13}")
+    for url in urls:
+        (q1, t1, b1), (q2, t2, b2) = results[(small, url)], results[(large, url)]
+        print(f"{url:<45} {q1:>5} -> {q2:<4} {t1:>6.1f} -> {t2:<6.1f} {b1 / 1024:>5.1f} -> {b2 / 1024:<5.1f}")
+    print(f"(kullanıcı ve proje sayısı {small} -> {large})")
+    constant = all(results[(small, url)][0] == results[(large, url)][0] for url in urls)
+    if not constant:
+        print("Sorgu sayısı veri boyutuyla değişmemeli")
+    return 0 if constant else 1
+
+
+def bench_profile(args):
+    """Profil istatistikleri ve aktivite akışı: sorgu sayısı, süre, önbellek isabeti"""
+    from models import db, User, ChatMessage
+    from profile_stats import profile_cache
+
+    app = _bench_app(TESTING=True)
+    with app.app_context():
+        _seed_admin(db, 3, args.projects)
+        db.session.execute(ChatMessage.__table__.insert(), [
+            {"user_id": 1, "project_id": i % args.projects + 1, "message": f"Soru {i}", "role": "user",
+             "timestamp": datetime(2024, 1, 1) + timedelta(seconds=i)}
+            for i in range(args.messages)
+        ])
+        db.session.commit()
+        # Toplu INSERT olayları tetiklemez; aktivite kaydını migration'daki gibi doldur
+        from activity import backfill_activity
+        with db.engine.begin() as conn:
+            backfill_activity(conn, rebuild=True, days=0)
+        student_id = db.session.get(User, 1).id
+
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session["_user_id"] = str(student_id)
+    print(f"{'istek':<26} {'soğuk sorgu':>11} {'soğuk ms':>9} {'önbellek sorgu':>15} {'önbellek ms':>12}")
+    with app.app_context():
+        for url in ("/api/profile/stats", "/api/profile/activity"):
+            profile_cache.clear()
+            row = []
+            for _ in range(2):
+                with QueryCounter(db.engine) as counter:
+                    started = time.perf_counter()
+                    response = client.get(url)
+                    elapsed = (time.perf_counter() - started) * 1000
+                if response.status_code != 200:
+                    print(f"{url}: HTTP {response.status_code}")
+                    return 1
+                row.append((counter.count, elapsed))
+            (cold_q, cold_ms), (warm_q, warm_ms) = row
+            print(f"{url:<26} {cold_q:>11} {cold_ms:>9.1f} {warm_q:>15} {warm_ms:>12.1f}")
+    print(f"({args.projects} proje, {args.messages} mesaj; ilk istekteki sorgulardan biri oturum kullanıcısının yüklenmesi)")
+    return 0
+
+
+def bench_projects_api(args):
+    """/api/projects: tam liste, fields=id,title sayfaları ve 304 doğrulaması (bayt ve sorgu)"""
+    from models import db, User
+
+    app = _bench_app(TESTING=True)
+    with app.app_context():
+        _seed_admin(db, 100, args.projects)
+        admin = User(username="admin", email="admin@example.com", role="admin", password_hash="x")
+        db.session.add(admin)
+        db.session.commit()
+        admin_id = admin.id
+
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session["_user_id"] = str(admin_id)
+
+    def fetch_all(query, headers=None):
+        """Tüm sayfaları imleçle dolaş: (istek, bayt, sorgu, ms, son yanıt)"""
+        requests = size = 0
+        cursor = None
+        with QueryCounter(db.engine) as counter:
+            started = time.perf_counter()
+            while True:
+                url = f"/api/projects?{query}" + (f"&cursor={cursor}" if cursor else "")
+                response = client.get(url, headers=headers or {})
+                requests += 1
+                size += len(response.data)
+                cursor = response.headers.get("X-Next-Cursor")
+                if not cursor or response.status_code == 304:
+                    break
+            elapsed = (time.perf_counter() - started) * 1000
+        return requests, size, counter.count, elapsed, response
+
+    with app.app_context():
+        client.get("/api/projects")  # ısınma
+        rows = []
+        full = fetch_all("limit=500")
+        rows.append(("tüm alanlar", full))
+        picker = fetch_all("fields=id,title&limit=500")
+        rows.append(("seçici: fields=id,title", picker))
+        etag = client.get("/api/projects?fields=id,title&limit=500").headers["ETag"]
+        rows.append(("seçici, değişiklik yok (304)",
+                     fetch_all("fields=id,title&limit=500", headers={"If-None-Match": etag})))
+
+    print(f"{'istek':<30} {'HTTP':>5} {'istek sayısı':>12} {'KB':>9} {'sorgu':>6} {'ms':>8}")
+    for label, (requests, size, queries, elapsed, response) in rows:
+        print(f"{label:<30} {response.status_code:>5} {requests:>12} {size / 1024:>9.1f} {queries:>6} {elapsed:>8.1f}")
+    print(f"({args.projects} proje, 500'lük sayfalar)")
+    return 0 if rows[-1][1][4].status_code == 304 else 1
+
+
+def _seed_views(db, rows):
+    """
+    Her projesi farklı sahip, danışman ve yarışmaya bağlı veri
+    (ilişkiler tembel yüklenirse sorgu sayısı satır sayısıyla büyür)
+    id 1: öğrenci, id 2: danışman, id 3: admin
+    """
+    from models import User, Project, Competition
+
+    users = [("student", "ogrenci"), ("advisor", "danisman"), ("admin", "admin")]
+    users += [("advisor", f"d{i}") for i in range(rows)] + [("student", f"o{i}") for i in range(rows)]
+    db.session.execute(User.__table__.insert(), [
+        {"username": name, "email": f"{name}@example.com", "password_hash": "x", "role": role,
+         "first_name": "Ad", "last_name": name, "is_active": True}
+        for role, name in users
+    ])
+    db.session.execute(Competition.__table__.insert(), [
+        {"name": f"Yarışma {i}", "description": "Açıklama", "is_active": i < 5, "created_by": 3}
+        for i in range(rows)
+    ])
+    first_advisor, first_student = 4, 4 + rows
+    projects = []
+    for i in range(rows):
+        # Öğrencinin projesi: her birinin danışmanı farklı
+        projects.append({"owner_id": 1, "advisor_id": first_advisor + i})
+        # Danışmanın projesi: her birinin sahibi farklı
+        projects.append({"owner_id": first_student + i, "advisor_id": 2})
+    db.session.execute(Project.__table__.insert(), [
+        dict(project, title=f"Proje {i}", description="Açıklama", category="web", technologies="python",
+             status=("planning", "development", "testing", "completed")[i % 4], competition_id=i // 2 + 1,
+             created_at=datetime(2024, 1, 1), updated_at=datetime(2024, 1, 1) + timedelta(minutes=i))
+        for i, project in enumerate(projects)
+    ])
+    db.session.commit()
+
+
+def bench_views(args):
+    """Sayfaların süresi ve sorgu sayısı, az / çok satırla (doğruluk: tests/test_views.py)"""
+    from models import db
+
+    # (kullanıcı id, URL); proje 1 öğrencinin, proje 2 danışmanın danışmanlık yaptığı proje
+    views = [
+        (1, "/dashboard"), (1, "/projects"), (1, "/project/1"),
+        (2, "/dashboard"), (2, "/projects"), (2, "/project/2"),
+        (3, "/projects"), (3, "/admin/dashboard"),
+    ]
+    results = {}
+    sizes = (max(1, args.rows // 10), args.rows)
+    for size in sizes:
+        app = _bench_app(TESTING=True)
+        with app.app_context():
+            _seed_views(db, size)
+            engine = db.engine
+        clients = {}
+        for user_id in {user_id for user_id, _ in views}:
+            clients[user_id] = app.test_client()
+            with clients[user_id].session_transaction() as session:
+                session["_user_id"] = str(user_id)
+        for user_id, url in views:
+            client = clients[user_id]
+            # Oturum kullanıcısı yalnızca ilk istekte yüklenir, sonra user_cache.py önbelleğinden gelir
+            with QueryCounter(engine) as counter:
+                started = time.perf_counter()
+                response = client.get(url)
+                elapsed = (time.perf_counter() - started) * 1000
+            if response.status_code != 200:
+                print(f"{url} (kullanıcı {user_id}): HTTP {response.status_code}")
+                return 1
+            results[(size, user_id, url)] = (counter.count, elapsed)
+
+    small, large = sizes
+    print(f"{'sayfa':<32} {'sorgu':>11} {'ms':>17}")
+    for user_id, url in views:
+        (q1, t1), (q2, t2) = results[(small, user_id, url)], results[(large, user_id, url)]
+        label = f"{url} (kullanıcı {user_id})"
+        print(f"{label:<32} {q1:>5} -> {q2:<4} {t1:>7.1f} -> {t2:<7.1f}")
+    print(f"(öğrenci/danışman başına proje {small} -> {large}, admin listesinde {2 * small} -> {2 * large})")
+    return 0
+
+
+def bench_socketio_events(args):
+    """Socket.IO olay hızı ve olay başına sorgu: oturum kullanıcısı önbelleği kapalı / açık"""
+    from app import socketio
+    from models import db, User
+    from user_cache import user_cache
+
+    app = _bench_app(TESTING=True)
+    with app.app_context():
+        user = User(username="ogrenci", email="ogrenci@example.com", password_hash="x", role="student",
+                    first_name="Ad", last_name="Soyad")
+        db.session.add(user)
+        db.session.commit()
+        user_id = user.id
+        engine = db.engine
+
+    flask_client = app.test_client()
+    with flask_client.session_transaction() as session:
+        session["_user_id"] = str(user_id)
+    client = socketio.test_client(app, flask_test_client=flask_client)
+    client.emit("join_room", {"room": "bench"})
+
+    configured_ttl = user_cache.ttl
+    results = []
+    try:
+        for label, ttl in (("önbelleksiz", 0), ("önbellekli", configured_ttl or 30)):
+            user_cache.ttl = ttl
+            user_cache.clear()
+            for _ in range(50):  # ısınma
+                client.emit("typing", {"room": "bench", "typing": True})
+            rates = []
+            for _ in range(args.repeat):
+                with QueryCounter(engine) as counter:
+                    started = time.perf_counter()
+                    for i in range(args.events):
+                        client.emit("typing", {"room": "bench", "typing": i % 2 == 0})
+                    elapsed = time.perf_counter() - started
+                client.get_received()
+                rates.append(args.events / elapsed)
+            results.append((label, statistics.median(rates), counter.count / args.events))
+    finally:
+        user_cache.ttl = configured_ttl
+        client.disconnect()
+
+    print(f"{'user_loader':<14} {'olay/s':>10} {'sorgu/olay':>11}")
+    for label, rate, queries in results:
+        print(f"{label:<14} {rate:>10.0f} {queries:>11.2f}")
+    print(f"(\"typing\" olayı, {args.events} olay x {args.repeat} tekrar, medyan)")
+    return 0
+
+
+def _login_worker(app, username, password, deadline, results):
+    client = app.test_client()
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        response = client.post("/auth/login", data={"username": username, "password": password})
+        results.append((response.status_code, time.perf_counter() - started))
+        if response.status_code == 302:
+            client.get("/auth/logout")
+        elif response.status_code == 503:
+            time.sleep(0.05)
+
+
+def _probe_worker(app, deadline, latencies):
+    """Giriş yükü sırasında ucuz bir isteğin gecikmesi (diğer kullanıcıların gördüğü)"""
+    client = app.test_client()
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        client.get("/auth/login")
+        latencies.append(time.perf_counter() - started)
+        time.sleep(0.01)
+
+
+def bench_login_throughput(args):
+    """Eşzamanlı girişler: hash istek thread'inde / sınırlı havuzda (giriş/s, diğer isteklerin gecikmesi, 503)"""
+    import threading
+    from models import db, User
+    from password_hashing import password_hasher
+
+    configured = (password_hasher.method, password_hasher.workers, password_hasher.max_queue)
+    password_hasher.configure(method=args.method, workers=0)
+    app = _bench_app(TESTING=True)
+    with app.app_context():
+        for i in range(args.concurrency):
+            user = User(username=f"ogrenci{i}", email=f"ogrenci{i}@example.com", role="student",
+                        first_name="Ad", last_name="Soyad")
+            user.set_password("sifre123")
+            db.session.add(user)
+        db.session.commit()
+
+    modes = (("istek thread'i", 0, 0), (f"havuz ({args.workers})", args.workers, args.queue))
+    results = []
+    try:
+        for label, workers, queue in modes:
+            password_hasher.configure(workers=workers, max_queue=queue)
+            logins, probes = [], []
+            deadline = time.perf_counter() + args.duration
+            threads = [threading.Thread(target=_login_worker, args=(app, f"ogrenci{i}", "sifre123", deadline, logins))
+                       for i in range(args.concurrency)]
+            threads.append(threading.Thread(target=_probe_worker, args=(app, deadline, probes)))
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            ok = [elapsed for status, elapsed in logins if status == 302]
+            busy = sum(1 for status, _ in logins if status == 503)
+            results.append((label, len(ok) / args.duration, _percentile(ok, 50), busy,
+                            _percentile(probes, 50), _percentile(probes, 99)))
+    finally:
+        method, workers, max_queue = configured
+        password_hasher.configure(method=method, workers=workers, max_queue=max_queue)
+
+    print(f"{'hash':<16} {'giriş/s':>8} {'giriş p50':>10} {'503':>5} {'diğer p50':>10} {'diğer p99':>10}")
+    for label, rate, login_p50, busy, probe_p50, probe_p99 in results:
+        print(f"{label:<16} {rate:>8.1f} {login_p50 * 1000:>8.0f}ms {busy:>5} "
+              f"{probe_p50 * 1000:>8.1f}ms {probe_p99 * 1000:>8.1f}ms")
+    print(f"({args.concurrency} eşzamanlı giriş, {args.duration:.0f}s, {args.method}, CPU: {os.cpu_count()})")
+    return 0
+
+
+def bench_presence(args):
+    """Yazıyor/varlık yayını: tuş başına yayın (eski) / birleştirilmiş presence farkları"""
+    from app import socketio
+    from models import db, User
+    from presence import presence
+
+    app = _bench_app(TESTING=True)
+    with app.app_context():
+        users = [User(username=f"uye{i}", email=f"uye{i}@example.com", password_hash="x", role="student",
+                      first_name="Uye", last_name=str(i)) for i in range(args.members)]
+        db.session.add_all(users)
+        db.session.commit()
+        user_ids = [user.id for user in users]
+        names = {user.id: (user.username, user.get_full_name()) for user in users}
+
+    presence.flush_interval = args.interval
+    clients = []
+    for user_id in user_ids:
+        flask_client = app.test_client()
+        with flask_client.session_transaction() as session:
+            session["_user_id"] = str(user_id)
+        client = socketio.test_client(app, flask_test_client=flask_client)
+        client.emit("join_room", {"room": "bench"})
+        clients.append(client)
+    sids = [socketio.server.manager.sid_from_eio_sid(client.eio_sid, "/") for client in clients]
+    time.sleep(args.interval * 2)  # katılma farkları ölçüme girmesin
+
+    rate = args.keys_per_second
+    ticks = int(args.duration * rate)
+    burst, pause = int(3 * rate), int(2 * rate)  # 3s yazma, 2s duraklama
+
+    def run(legacy):
+        for client in clients:
+            client.get_received()
+        incoming = 0
+        started = time.perf_counter()
+        for tick in range(ticks):
+            for i in range(args.typers):
+                phase = (tick + i * 7) % (burst + pause)
+                if phase >= burst and phase != burst:
+                    continue
+                typing = phase < burst
+                incoming += 1
+                if legacy:
+                    # Eski handle_typing: her olay odadaki herkese (gönderen hariç)
+                    username, full_name = names[user_ids[i]]
+                    socketio.emit("user_typing", {"username": username, "full_name": full_name, "typing": typing},
+                                  room="bench", skip_sid=sids[i])
+                else:
+                    clients[i].emit("typing", {"room": "bench", "typing": typing})
+            delay = started + (tick + 1) / rate - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        time.sleep(args.interval * 2)  # son farkların yayını
+        elapsed = time.perf_counter() - started
+        outgoing = payload = 0
+        for client in clients:
+            for packet in client.get_received():
+                if packet["name"] in ("user_typing", "presence"):
+                    outgoing += 1
+                    payload += len(json.dumps(packet["args"]))
+        return incoming, outgoing, payload, elapsed
+
+    results = [("tuş başına", *run(legacy=True)), (f"presence ({args.interval}s)", *run(legacy=False))]
+    for client in clients:
+        client.disconnect()
+
+    print(f"{'yayın':<18} {'gelen':>7} {'giden mesaj':>12} {'giden/s':>9} {'KB':>8}")
+    for label, incoming, outgoing, payload, elapsed in results:
+        print(f"{label:<18} {incoming:>7} {outgoing:>12} {outgoing / elapsed:>9.0f} {payload / 1024:>8.1f}")
+    print(f"({args.members} üyeli oda, {args.typers} kişi {rate:.0f} tuş/s yazıyor, {args.duration:.0f}s)")
+    return 0
+
+
+SOCKETIO_SERVER_SCRIPT = """
+from app import create_app, socketio
+app = create_app()
+socketio.run(app, host="127.0.0.1", port={port}, allow_unsafe_werkzeug=True, log_output=False)
+"""
+
+
+def _socketio_session(base_url, username, password):
+    """HTTP ile giriş yap, oturum çereziyle Socket.IO istemcisi bağla"""
+    import requests
+    import socketio as socketio_client
+
+    deadline = time.monotonic() + 60
+    while True:
+        try:
+            session = requests.Session()
+            session.post(f"{base_url}/auth/login", data={"username": username, "password": password})
+            break
+        except requests.ConnectionError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.2)
+    cookie = "; ".join(f"{name}={value}" for name, value in session.cookies.items())
+    client = socketio_client.Client()
+    received = []
+    client.on("receive_message", lambda data: received.append((time.perf_counter(), data)))
+    client.connect(base_url, headers={"Cookie": cookie}, transports=["websocket"])
+    client.call("join_room", {"room": "bench"})
+    return client, received
+
+
+def bench_socketio_queue(args):
+    """
+    İki sunucu süreci arasında oda yayını: bellek içi odalar / mesaj kuyruğu (ve sunucu dışından yayın)
+    Teslim doğruluğu: tests/test_socketio_queue.py
+    """
+    from models import db, User
+    from socketio_queue import external_broadcast
+
+    root = os.path.dirname(os.path.abspath(__file__))
+    tmp = tempfile.mkdtemp(prefix="bench_sio_")
+    database_url = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+    app = _bench_app(SQLALCHEMY_DATABASE_URI=database_url)
+    with app.app_context():
+        for name in ("gonderen", "alici"):
+            user = User(username=name, email=f"{name}@example.com", role="student", first_name="Ad", last_name=name)
+            user.set_password("sifre123")
+            db.session.add(user)
+        db.session.commit()
+
+    results = []
+    queue = args.queue or f"filesystem://{os.path.join(tmp, 'queue')}"
+    for label, queue_url in (("bellek içi", ""), (queue.split(":", 1)[0] + "://", queue)):
+        env = dict(os.environ, DATABASE_URL=database_url, SOCKETIO_MESSAGE_QUEUE=queue_url, RAG_PRELOAD="False")
+        ports = [int(_free_address().rsplit(":", 1)[1]) for _ in range(2)]
+        servers = [subprocess.Popen([sys.executable, "-c", SOCKETIO_SERVER_SCRIPT.format(port=port)], cwd=root, env=env,
+                                    stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL) for port in ports]
+        try:
+            sender, _ = _socketio_session(f"http://127.0.0.1:{ports[0]}", "gonderen", "sifre123")
+            receiver, received = _socketio_session(f"http://127.0.0.1:{ports[1]}", "alici", "sifre123")
+            sent = {}
+            for i in range(args.messages):
+                sent[f"bench-{i}"] = time.perf_counter()
+                sender.emit("send_message", {"message": f"bench-{i}", "room": "bench"})
+                time.sleep(args.interval)
+
+            if queue_url:
+                # Arka plan işi gibi: uygulama bağlamı olmadan kuyruğa yaz
+                sent["external"] = time.perf_counter()
+                external_broadcast("bench", {"id": "ai_external", "message": "external", "username": "AI Asistan",
+                                             "full_name": "RAG AI Asistan", "user_role": "ai", "ts": None,
+                                             "is_ai": True, "room": "bench"}, url=queue_url)
+            time.sleep(1.0)
+
+            latencies = [(at - sent[data["message"]]) * 1000 for at, data in received if data.get("message") in sent]
+            external = sum(1 for _, data in received if data.get("message") == "external")
+            results.append((label, len([m for _, m in received if m.get("message", "").startswith("bench-")]),
+                            external, latencies))
+            sender.disconnect()
+            receiver.disconnect()
+        finally:
+            for server in servers:
+                server.terminate()
+                server.wait()
+
+    print(f"{'oda yayını':<16} {'diğer sürece ulaşan':>20} {'sunucu dışı':>12} {'gecikme p50':>12} {'p99':>8}")
+    for label, delivered, external, latencies in results:
+        print(f"{label:<16} {delivered:>14}/{args.messages:<5} {external:>12} "
+              f"{_percentile(latencies, 50):>10.1f}ms {_percentile(latencies, 99):>6.1f}ms")
+    return 0
+
+
+def _socketio_packet_bytes(event, payload):
+    """Socket.IO'nun gönderdiği paket(ler)in boyutu (ikili yükler ek paket olarak gider)"""
+    from socketio import packet
+
+    encoded = packet.Packet(packet.EVENT, data=[event, payload]).encode()
+    parts = encoded if isinstance(encoded, list) else [encoded]
+    return sum(len(part.encode("utf-8") if isinstance(part, str) else part) for part in parts)
+
+
+def bench_chat_protocol(args):
+    """Chat olay yükü: sürüm 1 (JSON sözlükler) / sürüm 2 kompakt JSON / sürüm 2 msgpack (bayt ve CPU)"""
+    from sqlalchemy import text
+    from socketio import packet
+    from models import db
+    from chat_handlers import chat_history_page
+    from chat_protocol import Variant, msgpack, wire_message, wire_page
+
+    app = _bench_app()
+    with app.app_context():
+        _seed_chat(db, args.users, args.messages)
+        sample = ("Projemin veritabanı tasarımında ilişkileri nasıl kurmalıyım, hangi indeksleri eklemeliyim? " * 20)
+        db.session.execute(text("UPDATE chat_message SET message = substr(:text, 1, :m), "
+                                "response = CASE WHEN response IS NULL THEN NULL ELSE substr(:text, 1, :r) END"),
+                           {"text": sample, "m": args.message_chars, "r": args.response_chars})
+        db.session.commit()
+        page = chat_history_page(limit=args.page_size)
+    records = page["messages"]
+    user_records = [record for record in records if not record["is_ai"]]
+
+    variants = [("v1 json", Variant(1)), ("v2 json", Variant(2))]
+    if msgpack is not None:
+        variants.append(("v2 msgpack", Variant(2, "msgpack")))
+
+    def measure(builders, event, count):
+        """Yükü oluştur + Socket.IO paketine kodla; mesaj başına µs ve bayt"""
+        started = time.perf_counter()
+        for _ in range(args.repeat):
+            for build in builders:
+                packet.Packet(packet.EVENT, data=[event, build()]).encode()
+        elapsed = time.perf_counter() - started
+        size = sum(_socketio_packet_bytes(event, build()) for build in builders)
+        return elapsed / args.repeat / count * 1e6, size / count
+
+    results = []
+    for label, variant in variants:
+        page_us, page_bytes = measure([lambda: variant.encode(wire_page(page, variant, set()))],
+                                      "chat_history", len(records))
+        # Oda yayını: kullanıcı mesajları tek tek
+        message_us, message_bytes = measure(
+            [lambda record=record: variant.encode(wire_message(record, variant)) for record in user_records],
+            "receive_message", len(user_records))
+        results.append((label, page_bytes, page_us, message_bytes, message_us))
+
+    base = results[0]
+    print(f"{'protokol':<12} {'geçmiş B/mesaj':>15} {'µs/mesaj':>9} {'yayın B/mesaj':>14} {'µs/mesaj':>9}")
+    for label, page_bytes, page_us, message_bytes, message_us in results:
+        print(f"{label:<12} {page_bytes:>8.0f} ({page_bytes / base[1]:>4.0%}) {page_us:>9.2f} "
+              f"{message_bytes:>7.0f} ({message_bytes / base[3]:>4.0%}) {message_us:>9.2f}")
+    print(f"(geçmiş sayfası {len(records)} mesaj, {args.users} yazar; mesaj {args.message_chars}, "
+          f"yanıt {args.response_chars} karakter)")
+    return 0
+
+
+def bench_project_context(args):
+    """AI mesajı başına proje bağlamı: her mesajda sorgu (eski) / önbellekli sağlayıcı"""
+    from models import db, User, Project, Competition
+    import project_context
+    from project_context import project_context as get_project_context
+
+    app = _bench_app(TESTING=True)
+    with app.app_context():
+        owner = User(username="ogrenci", email="ogrenci@example.com", password_hash="x", role="student",
+                     first_name="Ad", last_name="Soyad")
+        advisor = User(username="danisman", email="danisman@example.com", password_hash="x", role="advisor",
+                       first_name="Danışman", last_name="Hoca")
+        db.session.add_all([owner, advisor])
+        db.session.flush()
+        competition = Competition(name="Teknofest", description="Ulusal teknoloji yarışması", created_by=advisor.id,
+                                  registration_deadline=datetime(2030, 2, 1).date(),
+                                  submission_deadline=datetime(2030, 5, 1).date(),
+                                  requirements=json.dumps(["Ön tasarım raporu", "Çalışan prototip", "Demo videosu"]))
+        db.session.add(competition)
+        db.session.flush()
+        project = Project(title="Akıllı Sera", description="Sensörlerle sera takibi", status="development",
+                          category="iot", technologies="Python, Flask, MQTT", owner_id=owner.id,
+                          advisor_id=advisor.id, competition_id=competition.id,
+                          deadline=datetime(2030, 4, 1).date())
+        db.session.add(project)
+        db.session.commit()
+        project_id, owner_id = project.id, owner.id
+        engine = db.engine
+
+    def legacy(pid):
+        # Eski handle_ai_chat: her mesajda Project.query.get + metin
+        project = db.session.get(Project, pid)
+        return f"Proje: {project.title}\nAçıklama: {project.description}\nDurum: {project.get_status_display()}"
+
+    def run(label, build, reset=None):
+        queries = 0
+        started = time.perf_counter()
+        for _ in range(args.messages):
+            if reset:
+                reset()
+            # Her AI mesajı ayrı bir Socket.IO olayı: oturum kimlik haritası paylaşılmaz
+            with app.app_context():
+                with QueryCounter(engine) as counter:
+                    text = build(project_id)
+                queries += counter.count
+        elapsed = time.perf_counter() - started
+        return label, queries / args.messages, elapsed / args.messages * 1e6, len(text)
+
+    results = [
+        run("eski (her mesaj)", legacy),
+        run("soğuk önbellek", get_project_context, reset=project_context.clear),
+        run("doğrulama (TTL sonrası)", get_project_context, reset=project_context._versions.clear),
+        run("sıcak önbellek", get_project_context),
+    ]
+
+    # Güncellemeler önbelleği temizlemeli
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session["_user_id"] = str(owner_id)
+    client.put(f"/api/projects/{project_id}/status", json={"status": "testing"})
+    with app.app_context():
+        after_status = get_project_context(project_id)
+        competition = db.session.get(Competition, 1)
+        competition.requirements = json.dumps(["Final raporu"])
+        db.session.commit()
+    with app.app_context():
+        after_competition = get_project_context(project_id)
+    fresh = "Test" in after_status and "Final raporu" in after_competition
+
+    print(f"{'bağlam':<24} {'sorgu/mesaj':>12} {'µs/mesaj':>10} {'karakter':>9}")
+    for label, queries, micros, length in results:
+        print(f"{label:<24} {queries:>12.2f} {micros:>10.1f} {length:>9}")
+    print(f"Durum / yarışma güncellemesi sonrası güncel bağlam: {fresh}")
+    print(f"({args.messages} AI mesajı)\n")
+    print(after_competition)
+    return 0 if fresh else 1
+
+
+def bench_conversation_memory(args):
+    """
+    Uzun AI sohbetinde prompt boyutu ve yanıt süresi: tüm geçmiş / sınırlı bellek (stub model)
+    Doğruluk: tests/test_conversation_memory.py
+    """
+    from sqlalchemy import select
+    from models import db, User, Conversation, ChatMessage
+    from rag_system import build_chat_prompt
+    from retrieval import estimate_tokens
+    from stub_model import StubModel
+    import conversation_memory
+    from conversation_memory import SummaryWorker, conversation_history, _format_turns
+
+    app = _bench_app(TESTING=True)
+    with app.app_context():
+        engine = db.engine
+
+    topics = ["sensör kalibrasyonu", "MQTT bağlantısı", "veritabanı şeması", "sunum slaytları",
+              "bütçe planı", "test senaryoları", "rapor formatı", "enerji tüketimi"]
+
+    def full_history(conversation):
+        # "Bariz" çözüm: konuşmanın tüm turları
+        turns = db.session.execute(
+            select(ChatMessage.id, ChatMessage.message, ChatMessage.response)
+            .where(ChatMessage.conversation_id == conversation.id, ChatMessage.response.isnot(None))
+            .order_by(ChatMessage.id)
+        ).all()
+        return _format_turns(turns)
+
+    def run(label, history_for, worker=None):
+        model = StubModel(ms_per_1k_tokens=args.ms_per_1k, answer_words=args.answer_words)
+        with app.app_context():
+            # Kullanıcı başına tek genel konuşma olduğundan her koşu ayrı öğrenci
+            number = User.query.count() + 1
+            user = User(username=f"ogrenci{number}", email=f"ogrenci{number}@example.com", password_hash="x",
+                        role="student", first_name="Ad", last_name="Soyad")
+            db.session.add(user)
+            db.session.flush()
+            user_id = user.id
+            conversation = Conversation(user_id=user_id)
+            db.session.add(conversation)
+            db.session.commit()
+            conversation_id = conversation.id
+        tokens, latencies, queries = [], [], 0
+        for i in range(args.turns):
+            question = f"{i}. soru: {topics[i % len(topics)]} konusunda bir önceki önerini nasıl uygularım?"
+            if worker is not None:
+                # Kullanıcı sonraki soruyu yazarken özet biter; sorgu sayımına karışmasın
+                worker.flush()
+            # Her AI mesajı ayrı bir Socket.IO olayı (ayrı uygulama bağlamı)
+            with app.app_context():
+                started = time.perf_counter()
+                with QueryCounter(engine) as counter:
+                    conversation = db.session.get(Conversation, conversation_id)
+                    history = history_for(conversation)
+                queries += counter.count
+                prompt = build_chat_prompt(question, "student", "Proje: Akıllı Sera", history)
+                response = model.generate_content(prompt).text
+                latencies.append((time.perf_counter() - started) * 1000)
+                tokens.append(estimate_tokens(prompt))
+                db.session.add(ChatMessage(user_id=user_id, conversation_id=conversation_id, role="student",
+                                           message=question, response=response, responded_at=datetime.utcnow()))
+                db.session.commit()
+            if worker is not None:
+                worker.schedule(app, conversation_id)
+        if worker is not None:
+            worker.flush()
+        return {
+            'label': label, 'tokens': tokens, 'latencies': latencies, 'queries': queries / args.turns,
+        }
+
+    summarizer = StubModel(ms_per_1k_tokens=args.ms_per_1k)
+    worker = SummaryWorker(generate=lambda prompt: summarizer.generate_content(prompt).text)
+    results = [
+        run("tüm geçmiş", full_history),
+        run("sınırlı bellek", conversation_history, worker),
+    ]
+
+    recent = conversation_memory.CONVERSATION_RECENT_TURNS
+    print(f"{'geçmiş':<16} {'sorgu/tur':>9} {'ort. token':>10} {'son token':>10} "
+          f"{'p50 ms':>8} {'p95 ms':>8} {'son 10 ms':>10}")
+    for result in results:
+        latencies = result['latencies']
+        print(f"{result['label']:<16} {result['queries']:>9.2f} {statistics.mean(result['tokens']):>10.0f} "
+              f"{result['tokens'][-1]:>10} {_percentile(latencies, 50):>8.2f} {_percentile(latencies, 95):>8.2f} "
+              f"{statistics.mean(latencies[-10:]):>10.2f}")
+    print(f"Bellek: son {recent} tur, özet ≤ {conversation_memory.CONVERSATION_SUMMARY_CHARS} karakter")
+    print(f"Özet çağrısı: {summarizer.calls}, özet token: {summarizer.prompt_tokens} (yanıt yolunun dışında)")
+    print(f"({args.turns} tur, stub model {args.ms_per_1k} ms / 1000 prompt token)")
+    return 0
+
+
+def _synthetic_report(ranges, pages_per_range=20, rng=None):
+    """Başlıklı, her sayfada üst bilgisi olan sentetik rapor: [(sayfa aralığı, metin)], bölüm başlıkları"""
+    rng = rng or random.Random(7)
+    header = "AKILLI SERA PROJE RAPORU"
+    sections, chapters = [], []
+    for r in range(ranges):
+        start = r * pages_per_range + 1
+        page_range = f"{start}-{start + pages_per_range - 1}"
+        chapter = f"{r + 1}. Bölüm Konusu {r + 1}"
+        chapters.append(chapter)
+        lines = [chapter]
+        for page in range(pages_per_range):
+            lines.append(header)
+            if page % 5 == 0:
+                lines.append(f"{r + 1}.{page // 5 + 1} Alt Başlık {r + 1}-{page // 5 + 1}")
+            for _ in range(3):
+                words = [f"konu{r}_terim{rng.randrange(30)}" for _ in range(rng.randint(8, 16))]
+                lines.append(f"Bu bölümde {' '.join(words)} incelenmiştir. Ölçümler {rng.randrange(100)} "
+                             f"örnekle tekrarlanmıştır ve sonuçlar tabloda verilmiştir.")
+        sections.append((page_range, "\n".join(lines)))
+    return sections, chapters
+
+
+def bench_document_digest(args):
+    """
+    Dökümanın bütününe dair sorular: top-3 chunk + LLM / yükleme sırasında hazırlanan özet (stub model)
+    Niyet yönlendirme ve özet / içindekiler doğruluğu: tests/test_document_digest.py
+    """
+    from types import SimpleNamespace
+    from rag_system import build_chat_prompt
+    from retrieval import estimate_tokens
+    from stub_model import StubModel
+    from vector_store import VectorStoreClient
+    from document_digest import (DIGEST_COLLECTION, DocumentDigests, build_digest, digest_answer,
+                                 llm_summarizer, page_sections)
+
+    sections, _ = _synthetic_report(args.ranges)
+    # process_pdf_document çıktısı gibi: sayfa aralığı başına örtüşen chunk'lar
+    documents = []
+    for page_range, text in sections:
+        for i, chunk in enumerate(_split_like_rag(text)):
+            documents.append(SimpleNamespace(text=chunk, metadata={
+                "source": "uploads/rapor.pdf", "filename": "rapor.pdf", "page_range": page_range,
+                "chunk_id": f"{page_range}_{i}", "project_id": "1"}))
+
+    model = StubModel(ms_per_1k_tokens=args.ms_per_1k)
+    store = VectorStoreClient(tempfile.mkdtemp(prefix="bench_chroma_"), address=_free_address(),
+                              authkey=b"benchmark", autostart=True)
+    digests = DocumentDigests(store.get_or_create_collection(DIGEST_COLLECTION),
+                              embed_texts=lambda texts: [_hash_embedding(t).tolist() for t in texts],
+                              embed_query=lambda query: _hash_embedding(query).tolist())
+
+    started = time.perf_counter()
+    digest = build_digest("rapor.pdf", page_sections(documents), llm_summarizer(model))
+    digests.store(digest, "uploads/rapor.pdf", project_id=1)
+    ingest_ms = (time.perf_counter() - started) * 1000
+    ingest_calls = model.calls
+
+    # Başka bir projenin dökümanı yönlendirmeyi şaşırtmamalı
+    other = build_digest("sunum.pdf", _synthetic_report(2, rng=random.Random(9))[0], llm_summarizer(model))
+    digests.store(other, "uploads/sunum.pdf", project_id=2)
+
+    def covered(text):
+        return sum(1 for page_range, _ in sections if page_range in text) / len(sections)
+
+    # Eski yol: soruya en yakın 3 chunk + LLM
+    chunk_embeddings = [_hash_embedding(doc.text) for doc in documents]
+    question = "Proje raporumu özetler misin?"
+
+    def legacy():
+        import numpy as np
+        query = _hash_embedding(question)
+        scores = [float(e @ query / (np.linalg.norm(e) * np.linalg.norm(query) + 1e-12)) for e in chunk_embeddings]
+        top = sorted(range(len(documents)), key=lambda i: -scores[i])[:3]
+        context = "\n\n".join(f"[s. {documents[i].metadata['page_range']}] {documents[i].text}" for i in top)
+        prompt = build_chat_prompt(question, "student", "", "", context)
+        model.generate_content(prompt)
+        return context, estimate_tokens(prompt)
+
+    def timed(func):
+        times = []
+        for _ in range(args.repeat):
+            began = time.perf_counter()
+            result = func()
+            times.append((time.perf_counter() - began) * 1000)
+        return result, statistics.median(times)
+
+    calls_before = model.calls
+    (legacy_context, legacy_tokens), legacy_ms = timed(legacy)
+    legacy_calls = (model.calls - calls_before) / args.repeat
+    calls_before = model.calls
+    (kind, summary_answer, _), digest_ms = timed(lambda: digest_answer(digests, question, project_id=1))
+    digest_calls = (model.calls - calls_before) / args.repeat
+    outline_answer = digest_answer(digests, "Raporun bölümleri neler?", project_id=1)
+    outline_text = outline_answer[1] if outline_answer else ""
+
+    print(f"Yükleme: {len(documents)} chunk, {len(sections)} aralık -> {len(digest['outline'])} başlık, "
+          f"{ingest_calls} özet çağrısı, {ingest_ms:.0f} ms")
+    print(f"{'yol':<22} {'LLM çağrısı':>11} {'bağlam token':>12} {'aralık kapsamı':>15} {'ms (medyan)':>12}")
+    print(f"{'top-3 chunk + LLM':<22} {legacy_calls:>11.0f} {legacy_tokens:>12} {covered(legacy_context):>14.0%} "
+          f"{legacy_ms:>12.2f}")
+    print(f"{'hazır özet':<22} {digest_calls:>11.0f} {estimate_tokens(summary_answer):>12} "
+          f"{covered(summary_answer):>14.0%} {digest_ms:>12.2f}")
+    print(f"({args.ranges * 20} sayfa, stub model {args.ms_per_1k} ms / 1000 prompt token; "
+          f"gerçek modelde LLM çağrısı saniyeler sürer)\n")
+    print(outline_text[:800])
+    if store.broker is not None:
+        store.broker.stop()
+    return 0
+
+
+class _FlakyModel:
+    """Durumu değiştirilebilen model: ok (latency saniye), hang (hang saniye bekler), error (istisna)"""
+
+    def __init__(self, latency, hang):
+        from stub_model import StubModel
+        self.stub = StubModel(answer_words=20)
+        self.latency = latency
+        self.hang = hang
+        self.mode = "ok"
+
+    def generate_content(self, prompt):
+        if self.mode == "error":
+            raise ConnectionError("503 Service Unavailable")
+        time.sleep(self.hang if self.mode == "hang" else self.latency)
+        return self.stub.generate_content(prompt)
+
+
+def bench_llm_breaker(args):
+    """Model yavaşken / erişilemezken AI yanıt süresi: korumasız çağrı / süre sınırı + devre kesici"""
+    from rag_system import answer_with_fallback, build_chat_prompt
+    from llm_guard import llm_breaker, CLOSED, OPEN
+
+    llm_breaker.configure(deadline=args.deadline, slow_seconds=args.slow, window=10, min_calls=4,
+                          failure_rate=0.5, slow_rate=0.5, cooldown=args.cooldown)
+    question = "Sera sıcaklığı hangi sensörle ölçülüyor?"
+    chunks = [
+        {"text": "Proje kapsamında sera ortamı sürekli izlenir. Sera sıcaklığı DHT22 sensörüyle ölçülüyor ve "
+                 "veriler MQTT ile sunucuya gönderiliyor. Nem oranı da aynı kartla kayıt altına alınır.",
+         "score": 0.7, "metadata": {"filename": "rapor.pdf", "page_range": "1-20", "chunk_id": "1-20_0"}},
+        {"text": "Bütçe planı üç kalemden oluşur ve danışman onayı gerekir. Sıcaklık verisi günlük olarak "
+                 "raporlanır ve haftalık grafiklere dönüştürülür.",
+         "score": 0.5, "metadata": {"filename": "rapor.pdf", "page_range": "21-40", "chunk_id": "21-40_0"}},
+    ]
+    prompt = build_chat_prompt(question, "student", "", "", "\n\n".join(c["text"] for c in chunks))
+    model = _FlakyModel(args.latency, args.hang)
+
+    def phase(label, mode, requests, answer):
+        model.mode = mode
+        latencies, fallbacks, last = [], 0, ""
+        for _ in range(requests):
+            started = time.perf_counter()
+            last = answer()
+            latencies.append((time.perf_counter() - started) * 1000)
+            fallbacks += last.startswith("[Hızlı yanıt]")
+        return {'label': label, 'latencies': latencies, 'fallbacks': fallbacks, 'requests': requests,
+                'state': llm_breaker.state, 'last': last}
+
+    def unprotected():
+        try:
+            return model.generate_content(prompt).text
+        except Exception:
+            return "Üzgünüm, şu anda bir teknik sorun yaşıyorum."
+
+    def protected():
+        return answer_with_fallback(model, prompt, question, chunks)
+
+    results = [phase("korumasız: askıda", "hang", args.unprotected, unprotected)]
+    results.append(phase("sağlıklı", "ok", args.requests, protected))
+    # Yavaş model: süre sınırının altında ama yavaş eşiğinin üstünde
+    model.latency = min(args.slow * 1.5, args.deadline * 0.8)
+    results.append(phase("yavaş", "ok", args.requests, protected))
+    opened_on_slow = results[-1]['state'] == OPEN
+    model.latency = args.latency
+    time.sleep(args.cooldown)
+    results.append(phase("toparlanma", "ok", args.requests, protected))
+    results.append(phase("askıda (hang)", "hang", args.requests, protected))
+    hang_phase = results[-1]
+    results.append(phase("hata (503)", "error", args.requests, protected))
+    time.sleep(args.cooldown)
+    results.append(phase("toparlanma", "ok", args.requests, protected))
+
+    metrics = llm_breaker.metrics()
+    hang_latencies = hang_phase['latencies']
+    checks = {
+        'sağlıklıyken çıkarımsal yanıt yok': results[1]['fallbacks'] == 0,
+        'yavaş modelde devre açıldı': opened_on_slow,
+        'askıdayken en uzun bekleme ≤ süre sınırı': max(hang_latencies) <= args.deadline * 1000 + 100,
+        'devre açıkken yanıt anında': _percentile(hang_latencies, 50) < 10,
+        'toparlanınca devre kapandı': results[-1]['state'] == CLOSED and results[-1]['fallbacks'] == 0,
+        'çıkarımsal yanıt ilgili cümleyi veriyor': "DHT22" in hang_phase['last'].split("\n")[2],
+    }
+
+    print(f"{'aşama':<20} {'istek':>6} {'çıkarımsal':>10} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8} {'devre':>10}")
+    for result in results:
+        latencies = result['latencies']
+        print(f"{result['label']:<20} {result['requests']:>6} {result['fallbacks']:>10} "
+              f"{_percentile(latencies, 50):>8.1f} {_percentile(latencies, 95):>8.1f} {max(latencies):>8.1f} "
+              f"{result['state'] if result['label'] != 'korumasız: askıda' else '-':>10}")
+    print(f"Metrikler: {json.dumps({k: v for k, v in metrics.items() if k != 'settings'}, ensure_ascii=False)}")
+    for name, ok in checks.items():
+        print(f"  {name}: {'OK' if ok else 'HATA'}")
+    print(f"(model {args.latency * 1000:.0f} ms, askıda {args.hang:.1f}s; süre sınırı {args.deadline}s, "
+          f"yavaş eşiği {args.slow}s, devre açık kalma {args.cooldown}s)\n")
+    print(hang_phase['last'])
+    return 0 if all(checks.values()) else 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    p = subparsers.add_parser("vector-store", help=bench_vector_store.__doc__)
+    p.add_argument("--workers", type=int, default=4)
+    p.add_argument("--uploads", type=int, default=20)
+    p.add_argument("--batch", type=int, default=16)
+    p.add_argument("--queries", type=int, default=5)
+    p.add_argument("--dim", type=int, default=384)
+    p.add_argument("--direct", action="store_true",
+                   help="Broker yerine her worker'da ayrı PersistentClient aç (eski davranış)")
+    p.set_defaults(func=bench_vector_store)
+
+    p = subparsers.add_parser("importtime", help=bench_importtime.__doc__)
+    p.add_argument("--module", default="app")
+    p.add_argument("--top", type=int, default=15)
+    p.set_defaults(func=bench_importtime)
+
+    p = subparsers.add_parser("startup", help=bench_startup.__doc__)
+    p.add_argument("--runs", type=int, default=5)
+    p.add_argument("--path", default="/")
+    p.add_argument("--budget-ms", type=int, default=int(os.getenv("STARTUP_BUDGET_MS", "1500")))
+    p.add_argument("--history", help="Sonucu JSON satırı olarak bu dosyaya ekle")
+    p.set_defaults(func=bench_startup)
+
+    p = subparsers.add_parser("rss", help=bench_rss.__doc__)
+    p.add_argument("--pid", type=int, help="Çalışan bir gunicorn master sürecini ölç")
+    p.add_argument("--workers", type=int, default=4)
+    p.add_argument("--port", type=int, default=5055)
+    p.add_argument("--worker-class", default="sync")
+    p.add_argument("--timeout", type=float, default=120)
+    p.add_argument("--compare", action="store_true", help="preload_app açık ve kapalı ölç")
+    p.set_defaults(func=bench_rss)
+
+    p = subparsers.add_parser("mmr", help=bench_mmr.__doc__)
+    p.add_argument("--topics", type=int, default=12)
+    p.add_argument("--section-words", type=int, default=600)
+    p.add_argument("--queries", type=int, default=200)
+    p.add_argument("--top-k", type=int, default=5)
+    p.add_argument("--fetch-k", type=int, default=20)
+    p.add_argument("--lambda-mult", type=float, default=0.5)
+    p.set_defaults(func=bench_mmr)
+
+    p = subparsers.add_parser("chat-history", help=bench_chat_history.__doc__)
+    p.add_argument("--users", type=int, default=25)
+    p.add_argument("--messages", type=int, default=2000)
+    p.add_argument("--limit", type=int, default=50)
+    p.set_defaults(func=bench_chat_history)
+
+    p = subparsers.add_parser("chat-turns", help=bench_chat_turns.__doc__)
+    p.add_argument("--users", type=int, default=10)
+    p.add_argument("--turns", type=int, default=1000)
+    p.set_defaults(func=bench_chat_turns)
+
+    p = subparsers.add_parser("chat-write", help=bench_chat_write.__doc__)
+    p.add_argument("--messages", type=int, default=4000)
+    p.add_argument("--threads", type=int, default=8)
+    p.add_argument("--max-batch", type=int, default=256)
+    p.add_argument("--max-delay-ms", type=int, default=50)
+    p.set_defaults(func=bench_chat_write)
+
+    p = subparsers.add_parser("sqlite-stress", help=bench_sqlite_stress.__doc__)
+    p.add_argument("--writers", type=int, default=4)
+    p.add_argument("--readers", type=int, default=8)
+    p.add_argument("--seconds", type=float, default=5)
+    p.add_argument("--seed", type=int, default=2000)
+    p.set_defaults(func=bench_sqlite_stress)
+
+    p = subparsers.add_parser("admin-dashboard", help=bench_admin_dashboard.__doc__)
+    p.add_argument("--rows", type=int, default=20000)
+    p.add_argument("--repeat", type=int, default=5)
+    p.set_defaults(func=bench_admin_dashboard)
+
+    p = subparsers.add_parser("profile", help=bench_profile.__doc__)
+    p.add_argument("--projects", type=int, default=3000)
+    p.add_argument("--messages", type=int, default=20000)
+    p.set_defaults(func=bench_profile)
+
+    p = subparsers.add_parser("projects-api", help=bench_projects_api.__doc__)
+    p.add_argument("--projects", type=int, default=5000)
+    p.set_defaults(func=bench_projects_api)
+
+    p = subparsers.add_parser("views", help=bench_views.__doc__)
+    p.add_argument("--rows", type=int, default=250)
+    p.set_defaults(func=bench_views)
+
+    p = subparsers.add_parser("socketio-events", help=bench_socketio_events.__doc__)
+    p.add_argument("--events", type=int, default=2000)
+    p.add_argument("--repeat", type=int, default=3)
+    p.set_defaults(func=bench_socketio_events)
+
+    p = subparsers.add_parser("login-throughput", help=bench_login_throughput.__doc__)
+    p.add_argument("--concurrency", type=int, default=16)
+    p.add_argument("--duration", type=float, default=10.0)
+    p.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    p.add_argument("--queue", type=int, default=8)
+    p.add_argument("--method", default="pbkdf2:sha256:100000")
+    p.set_defaults(func=bench_login_throughput)
+
+    p = subparsers.add_parser("presence", help=bench_presence.__doc__)
+    p.add_argument("--members", type=int, default=100)
+    p.add_argument("--typers", type=int, default=10)
+    p.add_argument("--keys-per-second", type=float, default=5.0)
+    p.add_argument("--duration", type=float, default=10.0)
+    p.add_argument("--interval", type=float, default=0.5)
+    p.set_defaults(func=bench_presence)
+
+    p = subparsers.add_parser("socketio-queue", help=bench_socketio_queue.__doc__)
+    p.add_argument("--queue", default=None, help="Varsayılan: geçici klasörde filesystem://")
+    p.add_argument("--messages", type=int, default=50)
+    p.add_argument("--interval", type=float, default=0.02)
+    p.set_defaults(func=bench_socketio_queue)
+
+    p = subparsers.add_parser("chat-protocol", help=bench_chat_protocol.__doc__)
+    p.add_argument("--users", type=int, default=8)
+    p.add_argument("--messages", type=int, default=200)
+    p.add_argument("--page-size", type=int, default=50)
+    p.add_argument("--message-chars", type=int, default=80)
+    p.add_argument("--response-chars", type=int, default=600)
+    p.add_argument("--repeat", type=int, default=200)
+    p.set_defaults(func=bench_chat_protocol)
+
+    p = subparsers.add_parser("project-context", help=bench_project_context.__doc__)
+    p.add_argument("--messages", type=int, default=500)
+    p.set_defaults(func=bench_project_context)
+
+    p = subparsers.add_parser("conversation-memory", help=bench_conversation_memory.__doc__)
+    p.add_argument("--turns", type=int, default=200)
+    p.add_argument("--answer-words", type=int, default=80)
+    p.add_argument("--ms-per-1k", type=float, default=5.0, help="stub modelin 1000 prompt token başına gecikmesi")
+    p.set_defaults(func=bench_conversation_memory)
+
+    p = subparsers.add_parser("document-digest", help=bench_document_digest.__doc__)
+    p.add_argument("--ranges", type=int, default=10, help="20 sayfalık aralık sayısı")
+    p.add_argument("--repeat", type=int, default=20)
+    p.add_argument("--ms-per-1k", type=float, default=5.0, help="stub modelin 1000 prompt token başına gecikmesi")
+    p.set_defaults(func=bench_document_digest)
+
+    p = subparsers.add_parser("llm-breaker", help=bench_llm_breaker.__doc__)
+    p.add_argument("--requests", type=int, default=20)
+    p.add_argument("--unprotected", type=int, default=3, help="korumasız askıda çağrı sayısı")
+    p.add_argument("--latency", type=float, default=0.02, help="sağlıklı model gecikmesi (s)")
+    p.add_argument("--hang", type=float, default=1.0, help="askıdaki modelin bekleme süresi (s)")
+    p.add_argument("--deadline", type=float, default=0.25)
+    p.add_argument("--slow", type=float, default=0.1)
+    p.add_argument("--cooldown", type=float, default=0.5)
+    p.set_defaults(func=bench_llm_breaker)
+
+    args = parser.parse_args()
+    sys.exit(args.func(args))
+
+
+if __name__ == "__main__":
+    main()
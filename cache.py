@@ -0,0 +1,180 @@
+"""
+Süreç İçi Önbellek
+Süreli (TTL) ve boyutu sınırlı, thread-safe anahtar/değer önbelleği
+
+Önbellek her süreçte ayrıdır: bir worker'daki geçersiz kılma diğer
+worker'lara ulaşmaz, bu yüzden TTL kısa tutulmalı ve veriler en fazla
+TTL kadar bayat olabilecek yerlerde kullanılmalıdır.
+
+Invalidations, önbellek kayıtlarını ORM değişikliklerinde (flush ve commit)
+geçersiz kılar. ProcessLocal, süreç başına bir kez oluşturulan nesneleri
+(thread havuzu, arka plan thread'i) fork sonrası yeniden oluşturur.
+"""
+import os
+import time
+import threading
+from collections import OrderedDict
+
+_MISSING = object()
+
+
+class TTLCache:
+    def __init__(self, ttl: float = 60, maxsize: int = 1024):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            if item is not _MISSING:
+                value, expires_at = item
+                if expires_at > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            # En uzun süredir kullanılmayan kayıtları at
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def get_or_set(self, key, factory):
+        """Kayıt yoksa factory() ile hesapla ve sakla"""
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = factory()
+            self.set(key, value)
+        return value
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def delete_where(self, predicate):
+        """predicate(anahtar) doğru olan tüm kayıtları sil"""
+        with self._lock:
+            for key in [key for key in self._data if predicate(key)]:
+                del self._data[key]
+
+    def keys_where(self, predicate):
+        """predicate(anahtar, değer) doğru olan, süresi dolmamış kayıtların anahtarları"""
+        now = time.monotonic()
+        with self._lock:
+            return [key for key, (value, expires_at) in self._data.items() if expires_at > now and predicate(key, value)]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class Invalidations:
+    """
+    ORM değişikliklerinde önbellek kayıtlarının geçersiz kılınması
+
+    Mapper olayında (flush) değişen anahtarlar hemen silinir ve oturumda
+    (`session.info`) hatırlanır; commit'ten sonra bir kez daha silinir. Flush ile
+    commit arasında başka bir istek (ayrı oturum) satırın eski halini okuyup
+    önbelleğe yazmış olabilir. Rollback'te hatırlanan anahtarlar unutulur.
+
+    Her anahtarın son geçersiz kılınma zamanı da tutulur: geçersiz kılmadan önce
+    başlamış bir okuma sonucunu önbelleğe yazmamalıdır (`allows_write`).
+    """
+
+    def __init__(self, name: str, delete, ttl: float, maxsize: int):
+        # delete(anahtar kümesi): önbellek kayıtlarını siler
+        self.delete = delete
+        self._times = TTLCache(ttl=ttl, maxsize=maxsize)
+        self._session_key = f"{name}_invalidate"
+        self._listening = False
+
+    def invalidate(self, *keys):
+        keys = {key for key in keys if key is not None}
+        if not keys:
+            return
+        self.delete(keys)
+        now = time.monotonic()
+        for key in keys:
+            self._times.set(key, now)
+
+    def allows_write(self, key, started: float) -> bool:
+        """`started` (time.monotonic) anında başlamış okuma sonucu önbelleğe yazılabilir mi"""
+        return self._times.get(key, 0) < started
+
+    def changed(self, target, keys):
+        """Mapper olayından çağrılır: anahtarları sil ve commit sonrası için hatırla"""
+        from sqlalchemy.orm import object_session
+
+        keys = {key for key in keys if key is not None}
+        self.invalidate(*keys)
+        session = object_session(target)
+        if session is not None and keys:
+            session.info.setdefault(self._session_key, set()).update(keys)
+
+    def listen(self):
+        """Oturumların commit / rollback olaylarına bağlan (bir kez)"""
+        if self._listening:
+            return
+        from sqlalchemy import event
+        from sqlalchemy.orm import Session
+
+        event.listen(Session, 'after_commit', self._after_commit)
+        event.listen(Session, 'after_rollback', self._after_rollback)
+        self._listening = True
+
+    def _after_commit(self, session):
+        self.invalidate(*session.info.pop(self._session_key, ()))
+
+    def _after_rollback(self, session):
+        session.info.pop(self._session_key, None)
+
+    def clear(self):
+        self._times.clear()
+
+
+class ProcessLocal:
+    """
+    Süreç başına bir kez oluşturulan nesne (thread havuzu, arka plan thread'i)
+
+    gunicorn preload_app ile worker'lar nesneyi oluşturmuş olabilecek master'dan
+    fork edilir; fork sonrası ebeveynin thread'leri çocukta yoktur ve kopyalanan
+    havuz / thread iş almaz. Nesne bu yüzden her süreçte ilk kullanımda
+    factory(*args) ile yeniden oluşturulur.
+    """
+
+    def __init__(self, factory):
+        self.factory = factory
+        self._value = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def get(self, *args):
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._value = self.factory(*args)
+                    self._pid = os.getpid()
+        return self._value
+
+    def current(self):
+        """Bu süreçte oluşturulmuşsa nesne, değilse None"""
+        return self._value if self._pid == os.getpid() else None
+
+    def reset(self):
+        """Nesneyi bırak (sonraki get yeniden oluşturur); bu süreçte oluşturulmuşsa onu döndür"""
+        with self._lock:
+            value = self.current()
+            self._value = self._pid = None
+        return value
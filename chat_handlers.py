@@ -5,18 +5,318 @@ Gerçek zamanlı chat işlevselliği
 
 from flask_socketio import emit, join_room, leave_room, disconnect
 from flask_login import current_user
-from flask import request
+from flask import request, current_app
 import json
+import threading
+import time
+from collections import deque
 from datetime import datetime
+from presence import presence
+from chat_protocol import connections, broadcast_message, epoch, protocol_room, user_table
+
+# Geçmiş sayfalarının boyutu (istemci daha fazlasını isteyemez)
+DEFAULT_HISTORY_LIMIT = 50
+MAX_HISTORY_LIMIT = 100
+
+# Yeniden bağlanmada oda başına bellekte tutulan son mesaj sayısı
+RING_BUFFER_SIZE = 200
+
+class RecentMessages:
+    """
+    Oda başına son mesajların halka tamponu (ring buffer)
+    Yeniden bağlanan istemcinin kaçırdığı mesajlar çoğunlukla buradan verilir.
+    Her oda için `covered_after` tutulur: tampon, odanın bu id'den büyük tüm
+    mesajlarını içerir. Tampon süreç içidir; yalnızca bu süreçten yayınlanan
+    mesajları görür. Bu yüzden mesaj kuyruğuyla (birden fazla süreç) yalnızca
+    veritabanı kullanılır (bkz. missed_messages).
+
+    AI yanıtları sorunun satırına yazıldığından yanıt mesajının imleci
+    (`turn_id`) sorunun id'sidir; yanıt sorudan sonraki mesajlardan sonra
+    gelebilir, bu yüzden imleçler tampon içinde sıralı olmak zorunda değildir.
+    """
+
+    def __init__(self, size=RING_BUFFER_SIZE):
+        self.size = size
+        self._rooms = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def cursor(message_data):
+        """Mesajın veritabanı satırı id'si (AI yanıtı için turun id'si)"""
+        return message_data.get('turn_id', message_data['id'])
+
+    def append(self, room, message_data):
+        cursor = self.cursor(message_data)
+        with self._lock:
+            entry = self._rooms.get(room)
+            if entry is None:
+                # Bu süreç başlamadan önceki mesajlar tamponda yok; ilk kayıt bir
+                # AI yanıtıysa sorusu da tamponda değildir
+                entry = self._rooms[room] = {
+                    'messages': deque(maxlen=self.size),
+                    'covered_after': cursor if 'turn_id' in message_data else cursor - 1
+                }
+            messages = entry['messages']
+            if len(messages) == messages.maxlen:
+                entry['covered_after'] = max(entry['covered_after'], self.cursor(messages[0]))
+            messages.append(message_data)
+
+    def since(self, room, last_id, project_id=None, user_id=None):
+        """
+        last_id'den sonraki mesajları döndür
+        user_id verilirse yalnızca kullanıcının mesajları ve onlara gelen AI yanıtları.
+        Tampon bu aralığı kapsamıyorsa None (veritabanına düşülmeli)
+        """
+        with self._lock:
+            entry = self._rooms.get(room)
+            if entry is None or last_id < entry['covered_after']:
+                return None
+            messages = [
+                m for m in entry['messages']
+                if self.cursor(m) > last_id and (not project_id or str(m.get('project_id')) == str(project_id))
+            ]
+        if user_id is not None:
+            turns = {m['id'] for m in messages if not m.get('is_ai') and m.get('user_id') == user_id}
+            messages = [m for m in messages if self.cursor(m) in turns]
+        return messages
+
+    def senders(self, room):
+        """Tampondaki kullanıcı mesajlarının yazarları"""
+        with self._lock:
+            entry = self._rooms.get(room)
+            if entry is None:
+                return set()
+            return {m.get('user_id') for m in entry['messages'] if not m.get('is_ai')}
+
+    def clear(self):
+        with self._lock:
+            self._rooms.clear()
+
+recent_messages = RecentMessages()
+
+def visible_users(sid, user_id):
+    """
+    Bağlantının get_users ile bilgisini isteyebileceği kullanıcılar: kendisi,
+    ona gönderilmiş yazarlar ve katıldığı odaların üyeleri ve son yazarları
+    Oda durumu süreç içidir (bkz. presence.py).
+    """
+    visible = {user_id} | connections.get(sid)[1]
+    for room in presence.rooms(sid):
+        visible.update(member['id'] for member in presence.members(room))
+        visible.update(recent_messages.senders(room))
+    return visible
+
+def get_or_create_conversation(db, user_id, project_id=None):
+    """
+    Kullanıcının bu projedeki (veya genel) AI konuşması; yoksa oluşturulur
+    Yalnızca oluşturulursa commit edilir; son etkinlik zamanı turla birlikte
+    chat_writer'da yazılır. Aynı anda oluşturan başka bir istek kazanırsa
+    (uq_conversation_user_project) onun konuşması döner.
+    """
+    from sqlalchemy.exc import IntegrityError
+    from models import Conversation
+
+    project_id = int(project_id) if project_id else None
+    query = Conversation.query.filter_by(user_id=user_id, project_id=project_id)
+    conversation = query.first()
+    if conversation is not None:
+        return conversation
+    conversation = Conversation(user_id=user_id, project_id=project_id)
+    db.session.add(conversation)
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        conversation = query.first()
+    return conversation
+
+def chat_scope(user, project_id=None):
+    """
+    Kullanıcının okuyabileceği chat geçmişinin filtresi: {'project_id', 'user_id'}
+    Proje sohbetini projenin sahibi, danışmanı ve admin okur; proje verilmezse
+    yalnızca kullanıcının kendi mesajları. Proje yoksa veya erişim yoksa None.
+    """
+    from models import db, Project
+
+    if not project_id:
+        return {'project_id': None, 'user_id': user.id}
+    try:
+        project = db.session.get(Project, int(project_id))
+    except (TypeError, ValueError):
+        return None
+    if project is None or not project.is_accessible_by(user):
+        return None
+    return {'project_id': project.id, 'user_id': None}
+
+def chat_history_query(project_id=None, before_id=None, user_id=None):
+    """
+    Chat geçmişi sorgusu: yeniden eskiye (timestamp, id) sıralı
+    before_id verilirse o mesajdan daha eski mesajlarla sınırlanır (keyset imleci).
+    Yazarlar aynı sorguda JOIN ile yüklenir.
+    """
+    from sqlalchemy import select, tuple_
+    from sqlalchemy.orm import joinedload
+    from models import ChatMessage
+
+    query = ChatMessage.query.options(joinedload(ChatMessage.user))
+    if project_id:
+        query = query.filter(ChatMessage.project_id == project_id)
+    if user_id:
+        query = query.filter(ChatMessage.user_id == user_id)
+    if before_id:
+        cursor_timestamp = select(ChatMessage.timestamp).where(
+            ChatMessage.id == before_id
+        ).scalar_subquery()
+        # Satır karşılaştırması indeks üzerinde aralık taramasına çevrilebilir
+        query = query.filter(
+            tuple_(ChatMessage.timestamp, ChatMessage.id) < tuple_(cursor_timestamp, before_id)
+        )
+    return query.order_by(ChatMessage.timestamp.desc(), ChatMessage.id.desc())
+
+def fetch_chat_history(project_id=None, before_id=None, limit=DEFAULT_HISTORY_LIMIT, user_id=None):
+    """
+    Chat geçmişinin bir sayfasını getir
+    Dönüş: (kronolojik mesaj listesi, daha eski mesaj var mı)
+    """
+    try:
+        limit = int(limit)
+    except (TypeError, ValueError):
+        limit = DEFAULT_HISTORY_LIMIT
+    limit = max(1, min(limit, MAX_HISTORY_LIMIT))
+
+    # Bir fazlasını çekerek daha eski sayfa olup olmadığını öğren
+    messages = chat_history_query(project_id, before_id, user_id).limit(limit + 1).all()
+    has_more = len(messages) > limit
+    messages = messages[:limit]
+    messages.reverse()  # Kronolojik sıraya çevir
+    return messages, has_more
+
+def fetch_messages_after(last_id, project_id=None, limit=MAX_HISTORY_LIMIT, user_id=None):
+    """
+    last_id'den sonra yazılan mesajlar (id > last_id, birincil anahtar indeksi)
+    Dönüş: (mesajlar, limit aşıldı mı)
+    """
+    from sqlalchemy.orm import joinedload
+    from models import ChatMessage
+
+    query = ChatMessage.query.options(joinedload(ChatMessage.user)).filter(ChatMessage.id > last_id)
+    if project_id:
+        query = query.filter(ChatMessage.project_id == project_id)
+    if user_id:
+        query = query.filter(ChatMessage.user_id == user_id)
+    messages = query.order_by(ChatMessage.id).limit(limit + 1).all()
+    return messages[:limit], len(messages) > limit
+
+def format_chat_history(messages):
+    """Mesajları mesaj kayıtlarına çevir (istemciye chat_protocol ile gönderilir)"""
+    chat_history = []
+    for msg in messages:
+        # Kullanıcı mesajı
+        user_msg = {
+            'id': msg.id,
+            'user_id': msg.user_id,
+            'message': msg.message,
+            'username': msg.user.username,
+            'full_name': msg.user.get_full_name(),
+            'user_role': msg.role or msg.user.role,
+            'timestamp': msg.timestamp.strftime('%H:%M'),
+            'ts': epoch(msg.timestamp),
+            'is_ai': False
+        }
+        if msg.is_awaiting_response():
+            user_msg['pending_response'] = True
+        chat_history.append(user_msg)
+
+        # AI yanıtı varsa ekle (aynı turun satırından)
+        if msg.response:
+            ai_msg = {
+                'id': f'ai_{msg.id}',
+                'turn_id': msg.id,
+                'message': msg.response,
+                'username': 'AI Asistan',
+                'full_name': 'RAG AI Asistan',
+                'user_role': 'ai',
+                'timestamp': (msg.responded_at or msg.timestamp).strftime('%H:%M'),
+                'ts': epoch(msg.responded_at or msg.timestamp),
+                'is_ai': True
+            }
+            chat_history.append(ai_msg)
+    return chat_history
+
+def chat_history_page(project_id=None, before_id=None, limit=DEFAULT_HISTORY_LIMIT, user_id=None):
+    """Socket.IO ve REST için ortak geçmiş yanıtı (erişim filtresi chat_scope ile verilir)"""
+    try:
+        before_id = int(before_id) if before_id else None
+    except (TypeError, ValueError):
+        before_id = None
+    messages, has_more = fetch_chat_history(project_id, before_id, limit, user_id)
+    return {
+        'messages': format_chat_history(messages),
+        'has_more': has_more,
+        # Bir sonraki (daha eski) sayfa için imleç
+        'next_before_id': messages[0].id if messages else None,
+        'before_id': before_id
+    }
+
+def missed_messages(room, last_id, project_id=None, user_id=None):
+    """
+    Yeniden bağlanan istemcinin last_id'den sonra kaçırdığı mesajlar
+    Dönüş: (mesajlar, kaynak: 'buffer' / 'database', reset)
+    Mesaj kuyruğuyla çalışırken diğer süreçlerin yazdığı mesajlar bu sürecin
+    tamponuna girmez; tampon aralığı tam sanıp onları atlayacağından
+    doğrudan veritabanına gidilir.
+    """
+    if not current_app.config.get('SOCKETIO_MESSAGE_QUEUE'):
+        messages = recent_messages.since(room, last_id, project_id, user_id)
+        if messages is not None:
+            return messages, 'buffer', False
+    # Birincil anahtar üzerinden indeksli sorgu
+    rows, reset = fetch_messages_after(last_id, project_id, user_id=user_id)
+    return format_chat_history(rows), 'database', reset
+
+# AI yanıtı geldiğinde turun yazılmasını en fazla bu kadar bekle
+TURN_WRITE_TIMEOUT = 10
+
+def on_message_saved(socketio):
+    """Yazıcı mesajı kaydettiğinde odaya gerçek id'yi bildir"""
+    from profile_stats import invalidate_user
+
+    def callback(pending):
+        # Yazıcı Core INSERT kullanır, ORM olayları tetiklenmez
+        invalidate_user(pending.values.get('user_id'))
+        message_data = dict(pending.payload, id=pending.id, provisional_id=pending.provisional_id)
+        recent_messages.append(pending.room, message_data)
+        socketio.emit('message_saved', {
+            'provisional_id': pending.provisional_id,
+            'id': pending.id,
+            'room': pending.room
+        }, room=pending.room)
+    return callback
+
+def on_message_failed(socketio):
+    def callback(pending):
+        print(f'Chat mesajı kaydedilemedi ({pending.provisional_id}): {pending.error}')
+        socketio.emit('message_failed', {
+            'provisional_id': pending.provisional_id,
+            'room': pending.room
+        }, room=pending.room)
+    return callback
 
 def register_chat_handlers(socketio, db):
     """Socket.IO event handler'larını kaydet"""
+    from chat_writer import chat_writer
+    chat_writer.on_saved = on_message_saved(socketio)
+    chat_writer.on_failed = on_message_failed(socketio)
     
     @socketio.on('connect')
-    def on_connect():
+    def on_connect(auth=None):
         """Kullanıcı bağlandığında"""
         if current_user.is_authenticated:
             print(f'User {current_user.username} connected')
+            presence.start(socketio)
+            # Chat olaylarının biçimi (bkz. chat_protocol.py)
+            variant = connections.register(request.sid, auth)
+            emit('protocol', {'version': variant.version, 'encoding': variant.encoding})
             emit('status', {'msg': f'{current_user.username} has connected'})
         else:
             print('Anonymous user tried to connect')
@@ -25,6 +325,8 @@ def register_chat_handlers(socketio, db):
     @socketio.on('disconnect')
     def on_disconnect():
         """Kullanıcı ayrıldığında"""
+        presence.disconnect(request.sid)
+        connections.unregister(request.sid)
         if current_user.is_authenticated:
             print(f'User {current_user.username} disconnected')
 
@@ -36,11 +338,11 @@ def register_chat_handlers(socketio, db):
         
         room = data.get('room', 'general')
         join_room(room)
+        # Chat mesajları bağlantının protokolüne ait alt odaya yayınlanır
+        join_room(protocol_room(room, connections.get(request.sid)[0]))
         print(f'User {current_user.username} joined room: {room}')
-        emit('status', {
-            'msg': f'{current_user.username} odaya katıldı',
-            'room': room
-        }, room=room)
+        # Katılan istemciye tam liste; diğerleri bir sonraki presence farkında görür
+        emit('presence', presence.join(room, request.sid, current_user))
 
     @socketio.on('leave_room')
     def on_leave_room(data):
@@ -50,11 +352,9 @@ def register_chat_handlers(socketio, db):
         
         room = data.get('room', 'general')
         leave_room(room)
+        leave_room(protocol_room(room, connections.get(request.sid)[0]))
+        presence.leave(room, request.sid)
         print(f'User {current_user.username} left room: {room}')
-        emit('status', {
-            'msg': f'{current_user.username} odadan ayrıldı',
-            'room': room
-        }, room=room)
 
     @socketio.on('send_message')
     def handle_message(data):
@@ -71,32 +371,32 @@ def register_chat_handlers(socketio, db):
                 emit('error', {'message': 'Mesaj boş olamaz'})
                 return
 
-            # Mesajı veritabanına kaydet
-            from models import ChatMessage
-            chat_message = ChatMessage(
-                user_id=current_user.id,
-                project_id=project_id,
-                message=message_text,
-                timestamp=datetime.utcnow()
-            )
-            
-            db.session.add(chat_message)
-            db.session.commit()
-
             # Mesaj verisini hazırla
+            timestamp = datetime.utcnow()
             message_data = {
-                'id': chat_message.id,
+                'user_id': current_user.id,
                 'message': message_text,
                 'username': current_user.username,
                 'full_name': current_user.get_full_name(),
                 'user_role': current_user.role,
-                'timestamp': chat_message.timestamp.strftime('%H:%M'),
+                'timestamp': timestamp.strftime('%H:%M'),
+                'ts': epoch(timestamp),
                 'room': room,
                 'project_id': project_id
             }
 
-            # Odadaki herkese mesajı gönder
-            emit('receive_message', message_data, room=room)
+            # Gerçek id yazıldıktan sonra message_saved ile gelir
+            pending = chat_writer.message({
+                'user_id': current_user.id,
+                'project_id': project_id,
+                'role': current_user.role,
+                'message': message_text,
+                'timestamp': timestamp
+            }, room=room, payload=message_data)
+
+            # Odadaki herkese mesajı geçici id ile hemen gönder, sonra yazıcı kuyruğuna al
+            broadcast_message(emit, room, dict(message_data, id=pending.provisional_id))
+            chat_writer.submit(pending)
             print(f'Message from {current_user.username} in room {room}: {message_text}')
 
         except Exception as e:
@@ -111,102 +411,131 @@ def register_chat_handlers(socketio, db):
 
         try:
             message_text = data.get('message', '').strip()
-            project_id = data.get('project_id')
             room = data.get('room', 'general')
 
             if not message_text:
                 emit('error', {'message': 'Mesaj boş olamaz'})
                 return
 
-            # Kullanıcı mesajını kaydet ve gönder
-            from models import ChatMessage
-            user_message = ChatMessage(
-                user_id=current_user.id,
-                project_id=project_id,
-                message=message_text,
-                timestamp=datetime.utcnow()
-            )
-            
-            db.session.add(user_message)
-            db.session.commit()
+            # Proje bağlamı ve döküman özetleri yalnızca projeye erişimi olana verilir
+            scope = chat_scope(current_user, data.get('project_id'))
+            if scope is None:
+                emit('error', {'message': 'Bu projeye erişim yetkiniz yok.'})
+                return
+            project_id = scope['project_id']
+
+            # Turu kaydet: soru bir kez yazılır, yanıt aynı satıra eklenir
+            conversation = get_or_create_conversation(db, current_user.id, project_id)
+            conversation_id = conversation.id
 
-            # Kullanıcı mesajını emit et
+            timestamp = datetime.utcnow()
             user_message_data = {
-                'id': user_message.id,
+                'user_id': current_user.id,
                 'message': message_text,
                 'username': current_user.username,
                 'full_name': current_user.get_full_name(),
                 'user_role': current_user.role,
-                'timestamp': user_message.timestamp.strftime('%H:%M'),
+                'timestamp': timestamp.strftime('%H:%M'),
+                'ts': epoch(timestamp),
                 'room': room,
-                'is_ai': False
+                'project_id': project_id,
+                'is_ai': False,
+                'pending_response': True
             }
-            emit('receive_message', user_message_data, room=room)
+            turn = chat_writer.message({
+                'user_id': current_user.id,
+                'project_id': project_id,
+                'conversation_id': conversation_id,
+                'role': current_user.role,
+                'message': message_text,
+                'timestamp': timestamp
+            }, room=room, payload=user_message_data)
+
+            # Kullanıcı mesajını geçici id ile emit et
+            broadcast_message(emit, room, dict(user_message_data, id=turn.provisional_id))
+            chat_writer.submit(turn)
 
             # AI yanıtı için typing indicator göster
             emit('ai_typing', {'status': True}, room=room)
 
+            started = time.perf_counter()
             try:
                 # RAG sistemini kullanarak AI yanıtı al
-                from rag_system import RAGSystem
-                rag = RAGSystem()
+                from rag_system import get_rag_system
+                rag = get_rag_system()
+                if rag is None:
+                    raise RuntimeError('RAG sistemi başlatılamadı')
                 
-                # Proje bağlamını al
-                project_context = ""
-                if project_id:
-                    from models import Project
-                    project = Project.query.get(project_id)
-                    if project:
-                        project_context = f"Proje: {project.title}\nAçıklama: {project.description}\nDurum: {project.get_status_display()}"
+                # Proje bağlamını al (önbellekli, bkz. project_context.py)
+                from project_context import project_context as get_project_context
+                project_context = get_project_context(project_id) if project_id else ""
+
+                # Son turlar + eski turların özeti (sınırlı boyutlu, bkz. conversation_memory.py)
+                from conversation_memory import conversation_history, summary_worker
+                history = conversation_history(conversation)
 
                 # Kullanıcı rolüne göre AI yanıtı al
                 ai_response = rag.get_ai_response(
                     question=message_text,
                     user_role=current_user.role,
-                    project_context=project_context
+                    project_context=project_context,
+                    history=history,
+                    project_id=project_id
                 )
 
-                # AI yanıtını kaydet
-                ai_message = ChatMessage(
-                    user_id=current_user.id,
-                    project_id=project_id,
-                    message=message_text,
-                    response=ai_response,
-                    timestamp=datetime.utcnow()
-                )
-                
-                db.session.add(ai_message)
-                db.session.commit()
+                # Yanıtı turun satırına yaz (soru genellikle çoktan yazılmıştır)
+                turn_id = turn.wait(TURN_WRITE_TIMEOUT)
+                responded_at = datetime.utcnow()
+                written = chat_writer.update(turn, {
+                    'response': ai_response,
+                    'response_latency_ms': int((time.perf_counter() - started) * 1000),
+                    'responded_at': responded_at
+                })
+                # Özet yanıt yazıldıktan sonra arka planda güncellenir
+                summary_worker.schedule(current_app._get_current_object(), conversation_id, after=written)
 
                 # AI yanıtını emit et
                 ai_message_data = {
-                    'id': ai_message.id,
+                    'id': f'ai_{turn_id}',
+                    'turn_id': turn_id,
                     'message': ai_response,
                     'username': 'AI Asistan',
                     'full_name': 'RAG AI Asistan',
                     'user_role': 'ai',
-                    'timestamp': ai_message.timestamp.strftime('%H:%M'),
+                    'timestamp': responded_at.strftime('%H:%M'),
+                    'ts': epoch(responded_at),
                     'room': room,
+                    'project_id': project_id,
                     'is_ai': True
                 }
-                emit('receive_message', ai_message_data, room=room)
+                broadcast_message(emit, room, ai_message_data)
+                recent_messages.append(room, ai_message_data)
 
             except Exception as e:
                 print(f'AI Chat Error: {str(e)}')
+                # Tur yanıtsız kalır ama artık beklemede değildir
+                chat_writer.update(turn, {
+                    'response_latency_ms': int((time.perf_counter() - started) * 1000)
+                })
+
                 # Hata durumunda basit yanıt ver
                 error_response = "Üzgünüm, şu anda AI sisteminde bir sorun var. Lütfen daha sonra tekrar deneyin."
                 
                 ai_message_data = {
                     'id': 0,
+                    'turn_provisional_id': turn.provisional_id,
+                    # Tur yazılamadıysa (veya henüz yazılmadıysa) gerçek id yoktur
+                    'turn_id': turn.id if turn.id is not None else turn.provisional_id,
                     'message': error_response,
                     'username': 'AI Asistan',
                     'full_name': 'RAG AI Asistan',
                     'user_role': 'ai',
                     'timestamp': datetime.now().strftime('%H:%M'),
+                    'ts': epoch(datetime.utcnow()),
                     'room': room,
                     'is_ai': True
                 }
-                emit('receive_message', ai_message_data, room=room)
+                broadcast_message(emit, room, ai_message_data)
 
             finally:
                 # Typing indicator'ı kapat
@@ -222,14 +551,8 @@ def register_chat_handlers(socketio, db):
         if not current_user.is_authenticated:
             return
 
-        room = data.get('room', 'general')
-        is_typing = data.get('typing', False)
-        
-        emit('user_typing', {
-            'username': current_user.username,
-            'full_name': current_user.get_full_name(),
-            'typing': is_typing
-        }, room=room, include_self=False)
+        # Odaya yayın presence aralığında, yalnızca durum değiştiyse yapılır
+        presence.typing(data.get('room', 'general'), request.sid, bool(data.get('typing', False)))
 
     @socketio.on('load_chat_history')
     def handle_load_chat_history(data):
@@ -238,53 +561,65 @@ def register_chat_handlers(socketio, db):
             return
 
         try:
-            project_id = data.get('project_id')
-            limit = data.get('limit', 50)
-
-            from models import ChatMessage, User
-            
-            # Chat geçmişini al
-            query = ChatMessage.query
-            if project_id:
-                query = query.filter_by(project_id=project_id)
-            
-            messages = query.order_by(ChatMessage.timestamp.desc()).limit(limit).all()
-            messages.reverse()  # Kronolojik sıraya çevir
-
-            # Mesajları formatla
-            chat_history = []
-            for msg in messages:
-                # Kullanıcı mesajı
-                user_msg = {
-                    'id': msg.id,
-                    'message': msg.message,
-                    'username': msg.user.username,
-                    'full_name': msg.user.get_full_name(),
-                    'user_role': msg.user.role,
-                    'timestamp': msg.timestamp.strftime('%H:%M'),
-                    'is_ai': False
-                }
-                chat_history.append(user_msg)
-
-                # AI yanıtı varsa ekle
-                if msg.response:
-                    ai_msg = {
-                        'id': f'ai_{msg.id}',
-                        'message': msg.response,
-                        'username': 'AI Asistan',
-                        'full_name': 'RAG AI Asistan',
-                        'user_role': 'ai',
-                        'timestamp': msg.timestamp.strftime('%H:%M'),
-                        'is_ai': True
-                    }
-                    chat_history.append(ai_msg)
-
-            emit('chat_history', {'messages': chat_history})
+            scope = chat_scope(current_user, data.get('project_id'))
+            if scope is None:
+                emit('error', {'message': 'Bu projeye erişim yetkiniz yok.'})
+                return
+            page = chat_history_page(
+                before_id=data.get('before_id'),
+                limit=data.get('limit', DEFAULT_HISTORY_LIMIT),
+                **scope
+            )
+            emit('chat_history', connections.encode_page(request.sid, page))
 
         except Exception as e:
             print(f'Error loading chat history: {str(e)}')
             emit('error', {'message': 'Chat geçmişi yüklenirken hata oluştu'})
 
+    @socketio.on('resume_chat')
+    def handle_resume_chat(data):
+        """
+        Yeniden bağlanmada yalnızca kaçırılan mesajları gönder
+        data: {'rooms': {oda: son_görülen_id}, 'project_id': ...}
+        """
+        if not current_user.is_authenticated:
+            return
+
+        try:
+            scope = chat_scope(current_user, data.get('project_id'))
+            if scope is None:
+                emit('error', {'message': 'Bu projeye erişim yetkiniz yok.'})
+                return
+            for room, last_id in (data.get('rooms') or {}).items():
+                try:
+                    last_id = int(last_id)
+                except (TypeError, ValueError):
+                    emit('chat_resume', {'room': room, 'messages': [], 'reset': True})
+                    continue
+
+                messages, source, reset = missed_messages(room, last_id, **scope)
+                emit('chat_resume', connections.encode_page(request.sid, {
+                    'room': room,
+                    'messages': messages,
+                    'source': source,
+                    # Çok fazla mesaj kaçırıldıysa istemci geçmişi baştan yüklemeli
+                    'reset': reset
+                }))
+
+        except Exception as e:
+            print(f'Error resuming chat: {str(e)}')
+            emit('chat_resume', {'messages': [], 'reset': True})
+
+    @socketio.on('get_users')
+    def handle_get_users(data):
+        """
+        Kompakt protokolde tanınmayan kullanıcı id'leri (yanıt ack ile döner)
+        Yalnızca bağlantının odalarında gördüğü kullanıcılar; diğer id'ler yanıtta yer almaz
+        """
+        if not current_user.is_authenticated:
+            return {}
+        return user_table((data or {}).get('ids'), allowed=visible_users(request.sid, current_user.id))
+
     @socketio.on('ping')
     def handle_ping():
         """Bağlantı kontrolü"""
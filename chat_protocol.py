@@ -0,0 +1,190 @@
+"""
+Chat Protokolü
+Socket.IO chat olaylarının (receive_message, chat_history, chat_resume) sürümlü biçimleri
+
+Sürüm 1 (eski): her mesajda username, full_name, user_role ve '%H:%M' zaman metni.
+Sürüm 2 (kompakt):
+- Mesajlar yalnızca kullanıcı id'si taşır ('u'); kullanıcı bilgileri
+  (`[username, full_name, role]`) bağlantı başına bir kez `users` tablosunda
+  gönderilir. Bilinmeyen id'ler `get_users` olayıyla istenir.
+  AI asistanı her zaman 0 numaralı kullanıcıdır.
+- Zaman UTC epoch saniyesidir ('t'); istemci yerel saate çevirir.
+- Kısa anahtarlar: id, u, m (metin), t, p (yanıt bekliyor), tid (tur id'si),
+  tpid (turun geçici id'si), pid (mesajın geçici id'si), r (mesajın rolü,
+  kullanıcının güncel rolünden farklıysa).
+- İsteğe bağlı olarak msgpack ile ikili (binary) kodlanır.
+
+İstemci sürümü ve kodlamayı bağlantıda `auth` ile ister:
+`io({auth: {protocol: 2, encoding: 'msgpack'}})`. `auth` göndermeyen
+istemciler sürüm 1 alır. Sunucu kabul ettiğini `protocol` olayıyla bildirir.
+Oda yayınları her protokol için ayrı alt odaya (`<oda>@v1`, `<oda>@v2`,
+`<oda>@v2m`) gönderilir; böylece farklı sürümdeki istemciler aynı odada olabilir.
+"""
+import calendar
+import threading
+
+PROTOCOL_VERSION = 2
+SUPPORTED_VERSIONS = (1, 2)
+AI_USER_ID = 0
+
+# Mesaj kaydındaki iç alanlar (sürüm 1'e gönderilmez)
+INTERNAL_FIELDS = ('user_id', 'ts')
+
+try:
+    import msgpack
+except ImportError:  # msgpack isteğe bağlı; yoksa JSON kullanılır
+    msgpack = None
+
+
+def epoch(value):
+    """Naive UTC datetime -> epoch saniyesi"""
+    return calendar.timegm(value.utctimetuple()) if value else None
+
+
+class Variant:
+    """Bir bağlantının protokolü: sürüm + kodlama"""
+
+    __slots__ = ('version', 'encoding')
+
+    def __init__(self, version=1, encoding='json'):
+        self.version = version
+        self.encoding = encoding
+
+    @property
+    def suffix(self):
+        if self.version == 1:
+            return 'v1'
+        return 'v2m' if self.encoding == 'msgpack' else 'v2'
+
+    def encode(self, payload):
+        if self.encoding == 'msgpack':
+            return msgpack.packb(payload, use_bin_type=True)
+        return payload
+
+
+VARIANTS = (Variant(1), Variant(2, 'json'), Variant(2, 'msgpack'))
+
+
+def negotiate(auth):
+    """Bağlantının `auth` verisinden desteklenen protokolü seç"""
+    auth = auth if isinstance(auth, dict) else {}
+    try:
+        version = int(auth.get('protocol', 1))
+    except (TypeError, ValueError):
+        version = 1
+    if version not in SUPPORTED_VERSIONS:
+        version = 1
+    encoding = 'json'
+    if version >= 2 and auth.get('encoding') == 'msgpack' and msgpack is not None:
+        encoding = 'msgpack'
+    return Variant(version, encoding)
+
+
+def protocol_room(room, variant):
+    return f'{room}@{variant.suffix}'
+
+
+def user_entry(record):
+    return [record.get('username'), record.get('full_name'), record.get('user_role')]
+
+
+def legacy_message(record):
+    """Sürüm 1: iç alanlar çıkarılmış eski sözlük"""
+    return {key: value for key, value in record.items() if key not in INTERNAL_FIELDS}
+
+
+def compact_message(record, users):
+    """Sürüm 2 mesajı; yazar `users` tablosuna eklenir (id -> [username, full_name, role])"""
+    if record.get('is_ai'):
+        user_id = AI_USER_ID
+    else:
+        user_id = record.get('user_id')
+        if user_id not in users:
+            users[user_id] = user_entry(record)
+    message = {'id': record['id'], 'u': user_id, 'm': record['message'], 't': record.get('ts')}
+    if record.get('pending_response'):
+        message['p'] = 1
+    for key, short in (('turn_id', 'tid'), ('turn_provisional_id', 'tpid'), ('provisional_id', 'pid')):
+        if record.get(key) is not None:
+            message[short] = record[key]
+    if user_id != AI_USER_ID and record.get('user_role') != users[user_id][2]:
+        message['r'] = record.get('user_role')
+    return message
+
+
+def wire_message(record, variant):
+    """Tek mesaj (oda yayını); sürüm 2'de yazar bilgisi gönderilmez"""
+    if variant.version == 1:
+        return legacy_message(record)
+    return compact_message(record, {})
+
+
+def wire_page(page, variant, known_users=None):
+    """
+    Mesaj listesi içeren yanıt (chat_history, chat_resume)
+    Sürüm 2'de bağlantının henüz görmediği yazarlar `users` tablosuna eklenir.
+    """
+    if variant.version == 1:
+        return dict(page, messages=[legacy_message(m) for m in page['messages']])
+    users = {}
+    messages = [compact_message(m, users) for m in page['messages']]
+    known = known_users if known_users is not None else set()
+    table = {str(user_id): entry for user_id, entry in users.items() if user_id not in known}
+    known.update(users)
+    return dict(page, messages=messages, users=table)
+
+
+class ConnectionProtocols:
+    """Süreçteki bağlantıların protokolü ve gördükleri kullanıcılar"""
+
+    def __init__(self):
+        self._connections = {}
+        self._lock = threading.Lock()
+
+    def register(self, sid, auth):
+        variant = negotiate(auth)
+        with self._lock:
+            self._connections[sid] = (variant, set())
+        return variant
+
+    def unregister(self, sid):
+        with self._lock:
+            self._connections.pop(sid, None)
+
+    def get(self, sid):
+        with self._lock:
+            return self._connections.get(sid, (VARIANTS[0], set()))
+
+    def encode_page(self, sid, page):
+        variant, known_users = self.get(sid)
+        return variant.encode(wire_page(page, variant, known_users))
+
+
+connections = ConnectionProtocols()
+
+
+def broadcast_message(emit, room, record, event='receive_message'):
+    """Mesajı odadaki her protokol alt odasına kendi biçiminde gönder"""
+    for variant in VARIANTS:
+        if variant.encoding == 'msgpack' and msgpack is None:
+            continue
+        emit(event, variant.encode(wire_message(record, variant)), room=protocol_room(room, variant))
+
+
+def user_table(user_ids, allowed=None):
+    """
+    get_users yanıtı: {id: [username, full_name, role]} (en fazla 100 kullanıcı)
+    allowed verilirse yalnızca bu id'ler yanıtlanır.
+    """
+    from models import User
+
+    ids = []
+    for user_id in list(user_ids or [])[:100]:
+        try:
+            user_id = int(user_id)
+        except (TypeError, ValueError):
+            continue
+        if allowed is None or user_id in allowed:
+            ids.append(user_id)
+    users = User.query.filter(User.id.in_(ids)).all() if ids else []
+    return {str(user.id): [user.username, user.get_full_name(), user.role] for user in users}
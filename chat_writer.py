@@ -0,0 +1,235 @@
+"""
+Chat Mesajı Yazıcısı
+Chat mesajları için toplu commit'li (group commit) arka plan yazıcısı
+
+SQLite'ta her commit bir fsync demektir; her mesaj için ayrı commit yoğun
+odalarda yazmaları sıraya sokar. Bu modülde mesajlar:
+
+- Hemen geçici bir id (`tmp-<pid>-<sıra>`) ile yayınlanır,
+- Arka plandaki tek yazıcı thread'inde kuyruğa alınır ve en fazla
+  `max_batch` mesaj / `max_delay` saniyelik gruplar halinde tek transaction'da
+  yazılır,
+- Yazıldıktan sonra `on_saved` ile gerçek id bildirilir (Socket.IO'da
+  `message_saved` olayı).
+
+AI turlarında konuşmanın son etkinlik zamanı (`conversation.updated_at`) da
+aynı transaction'da güncellenir; istek thread'inde ayrıca commit yapılmaz.
+
+Dayanıklılık penceresi `max_delay` kadardır: süreç bu aralıkta çökerse
+kuyruktaki mesajlar kaybolur. Normal kapanışta kuyruk boşaltılır.
+`CHAT_WRITE_BEHIND=false` ile her mesaj çağıran thread'de hemen yazılır.
+"""
+import os
+import time
+import queue
+import atexit
+import logging
+import itertools
+import threading
+
+from cache import ProcessLocal
+
+logger = logging.getLogger(__name__)
+
+WRITE_BEHIND = os.getenv("CHAT_WRITE_BEHIND", "true").lower() in ("1", "true", "yes")
+MAX_BATCH = int(os.getenv("CHAT_WRITE_MAX_BATCH", "256"))
+MAX_DELAY_MS = int(os.getenv("CHAT_WRITE_MAX_DELAY_MS", "50"))
+
+
+class ChatWriteError(Exception):
+    """Mesaj veritabanına yazılamadı"""
+
+
+class PendingMessage:
+    """Yazıcı kuyruğunda bekleyen tek bir chat mesajı"""
+
+    __slots__ = ("provisional_id", "values", "room", "payload", "id", "saved_at", "done", "error")
+
+    def __init__(self, provisional_id: str, values: dict, room: str = None, payload: dict = None):
+        self.provisional_id = provisional_id
+        self.values = values
+        self.room = room
+        self.payload = payload
+        self.id = None
+        self.saved_at = None  # time.perf_counter() değeri, commit sonrası
+        self.done = threading.Event()
+        self.error = None
+
+    def wait(self, timeout: float = None) -> int:
+        """Mesaj yazılana kadar bekle ve gerçek id'yi döndür"""
+        if not self.done.wait(timeout):
+            raise ChatWriteError(f"{self.provisional_id} zamanında yazılmadı")
+        if self.error is not None:
+            raise ChatWriteError(str(self.error))
+        return self.id
+
+
+class _PendingUpdate:
+    """Kuyruktaki (veya yazılmış) bir mesajın kolonlarını güncelleme isteği"""
+
+    __slots__ = ("message", "values", "done", "error")
+
+    def __init__(self, message: PendingMessage, values: dict):
+        self.message = message
+        self.values = values
+        self.done = threading.Event()
+        self.error = None
+
+
+class ChatWriter:
+    def __init__(self, max_batch: int = MAX_BATCH, max_delay: float = MAX_DELAY_MS / 1000,
+                 write_behind: bool = WRITE_BEHIND):
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.write_behind = write_behind
+        self.app = None
+        # Yazıldıktan sonra çağrılır: on_saved(PendingMessage), on_failed(PendingMessage)
+        self.on_saved = None
+        self.on_failed = None
+        self._queue = queue.Queue()
+        self._counter = itertools.count(1)
+        self._writer = ProcessLocal(self._start_writer)
+        self._atexit_registered = False
+
+    def init_app(self, app):
+        self.app = app
+        if not self._atexit_registered:
+            atexit.register(self.flush)
+            self._atexit_registered = True
+
+    def message(self, values: dict, room: str = None, payload: dict = None) -> PendingMessage:
+        """
+        Geçici id'li mesaj oluştur (henüz kuyruğa alınmaz)
+        values: chat_message kolonları (timestamp çağıran tarafından verilmeli ki sıra korunsun)
+        """
+        return PendingMessage(f"tmp-{os.getpid()}-{next(self._counter)}", values, room, payload)
+
+    def submit(self, message: PendingMessage) -> PendingMessage:
+        """
+        Mesajı yazılmak üzere kuyruğa al
+        Geçici id ile yayın bundan önce yapılmalı: senkron modda on_saved hemen çağrılır
+        """
+        self._enqueue(message)
+        return message
+
+    def update(self, message: PendingMessage, values: dict) -> _PendingUpdate:
+        """Daha önce kuyruğa alınmış mesajı güncelle (ör. AI yanıtını turun satırına yaz)"""
+        pending = _PendingUpdate(message, values)
+        self._enqueue(pending)
+        return pending
+
+    def flush(self):
+        """Kuyruktaki tüm yazmalar bitene kadar bekle"""
+        if self._writer.current() is not None:
+            self._queue.join()
+
+    def _enqueue(self, item):
+        if not self.write_behind:
+            self._apply_batch([item])
+            return
+        self._writer.get()
+        self._queue.put(item)
+
+    def _start_writer(self):
+        # Ebeveynden kopyalanan kuyruğu okuyan thread bu süreçte yok
+        self._queue = queue.Queue()
+        thread = threading.Thread(target=self._writer_loop, name="chat-writer", daemon=True)
+        thread.start()
+        return thread
+
+    def _writer_loop(self):
+        while True:
+            first = self._queue.get()
+            batch = [first]
+            deadline = time.monotonic() + self.max_delay
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            try:
+                self._apply_batch(batch)
+            except Exception as e:
+                logger.error(f"Chat yazıcısı hatası: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _apply_batch(self, batch):
+        """Grubu tek transaction'da yaz; başarısız olursa her isteği ayrı dene"""
+        with self.app.app_context():
+            from models import db
+            try:
+                with db.engine.begin() as conn:
+                    self._write(conn, batch)
+            except Exception as e:
+                logger.warning(f"{len(batch)} chat yazması toplu yazılamadı, tek tek deneniyor: {e}")
+                for item in batch:
+                    try:
+                        with db.engine.begin() as conn:
+                            self._write(conn, [item])
+                    except Exception as item_error:
+                        item.error = item_error
+                        if isinstance(item, PendingMessage):
+                            item.id = None
+        self._finish(batch)
+
+    def _write(self, conn, batch):
+        from sqlalchemy import insert, update, bindparam
+        from models import ChatMessage, Activity, Conversation
+        from activity import chat_activity
+
+        table = ChatMessage.__table__
+        inserts = [item for item in batch if isinstance(item, PendingMessage)]
+        if inserts:
+            # Toplu INSERT için tüm satırlar aynı kolonları taşımalı
+            columns = set().union(*(item.values for item in inserts))
+            rows = [{column: item.values.get(column) for column in columns} for item in inserts]
+            # Tek INSERT ... VALUES (...), (...) RETURNING id; sıra parametre sırasıyla aynı
+            result = conn.execute(insert(table).returning(table.c.id, sort_by_parameter_order=True), rows)
+            for item, row in zip(inserts, result.all()):
+                item.id = row.id
+            # Core INSERT ORM olaylarını tetiklemez; aktivite kayıtları aynı transaction'da
+            conn.execute(insert(Activity.__table__), [chat_activity(item.values) for item in inserts])
+
+            # AI turlarının konuşmalarının son etkinlik zamanı
+            touched = {}
+            for item in inserts:
+                conversation_id, timestamp = item.values.get('conversation_id'), item.values.get('timestamp')
+                if conversation_id and timestamp:
+                    touched[conversation_id] = max(touched.get(conversation_id, timestamp), timestamp)
+            if touched:
+                conversations = Conversation.__table__
+                conn.execute(
+                    update(conversations).where(conversations.c.id == bindparam('b_id'))
+                    .values(updated_at=bindparam('b_updated_at')),
+                    [{'b_id': key, 'b_updated_at': value} for key, value in touched.items()]
+                )
+
+        for item in batch:
+            if isinstance(item, _PendingUpdate):
+                if item.message.id is None:
+                    raise ChatWriteError(f"{item.message.provisional_id} yazılmadığı için güncellenemedi")
+                conn.execute(update(table).where(table.c.id == item.message.id).values(**item.values))
+
+    def _finish(self, batch):
+        saved_at = time.perf_counter()
+        for item in batch:
+            if isinstance(item, PendingMessage):
+                item.saved_at = saved_at
+                callback = self.on_saved if item.error is None else self.on_failed
+                if callback is not None:
+                    try:
+                        callback(item)
+                    except Exception as e:
+                        logger.error(f"Chat yazıcısı geri çağrı hatası: {e}")
+            elif item.error is not None:
+                logger.error(f"Chat mesajı güncellenemedi: {item.error}")
+            item.done.set()
+
+
+chat_writer = ChatWriter()
@@ -0,0 +1,225 @@
+"""
+Konuşma Belleği
+AI sohbetinde önceki turların boyutu sınırlı prompt bağlamı
+
+get_ai_response her soruyu bağımsız yanıtlıyordu; takip soruları önceki turları
+bilmiyordu. Tüm ChatMessage geçmişini prompt'a eklemek ise prompt boyutunu ve
+yanıt süresini konuşmanın uzunluğuyla büyütür. Bu modülde:
+
+- Son CONVERSATION_RECENT_TURNS yanıtlanmış tur prompt'a aynen girer.
+- Daha eski turlar konuşmanın `summary` kolonundaki birikimli özete katlanır
+  (`summarized_through_id`: özete giren son tur). Özet en fazla
+  CONVERSATION_SUMMARY_CHARS karakterdir; böylece geçmişin prompt'taki payı
+  konuşma ne kadar uzarsa uzasın sabit kalır.
+- Özet, yanıt yazıldıktan sonra arka planda güncellenir; yanıt süresine eklenmez.
+  Özetleyici geride kalırsa aradaki turlar prompt'a girmez (prompt yine sınırlı
+  kalır) ve sonraki güncellemede özete katılır.
+- Bellek tek indeks sorgusuyla okunur (ix_chat_message_conversation).
+
+CONVERSATION_RECENT_TURNS=0 belleği kapatır.
+"""
+import os
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from cache import ProcessLocal
+
+logger = logging.getLogger(__name__)
+
+CONVERSATION_RECENT_TURNS = int(os.getenv("CONVERSATION_RECENT_TURNS", "6"))
+CONVERSATION_SUMMARY_CHARS = int(os.getenv("CONVERSATION_SUMMARY_CHARS", "2000"))
+# Prompt'taki tek soru / yanıt metninin sınırı
+TURN_CHAR_LIMIT = int(os.getenv("CONVERSATION_TURN_CHARS", "1200"))
+# Bir özet güncellemesinde katlanan en fazla tur (özet prompt'u da sınırlı kalsın)
+FOLD_BATCH = 20
+# Yanıtın veritabanına yazılmasını en fazla bu kadar bekle
+SUMMARY_WAIT_TIMEOUT = 10
+
+# Özet prompt'unun bölüm başlıkları (stub model de bunları okur)
+PREVIOUS_SUMMARY = "Önceki özet:"
+NEW_TURNS = "Yeni turlar:"
+
+
+def _clip(text, limit=TURN_CHAR_LIMIT):
+    text = (text or '').strip()
+    return text if len(text) <= limit else text[:limit].rstrip() + '…'
+
+
+def _format_turns(turns):
+    return "\n".join(f"Kullanıcı: {_clip(question)}\nAsistan: {_clip(response)}" for _, question, response in turns)
+
+
+def recent_turns(conversation_id, after_id=0, limit=CONVERSATION_RECENT_TURNS):
+    """after_id'den sonraki son `limit` yanıtlanmış tur, eskiden yeniye [(id, soru, yanıt)]"""
+    from sqlalchemy import select
+    from models import db, ChatMessage
+
+    if limit <= 0:
+        return []
+    rows = db.session.execute(
+        select(ChatMessage.id, ChatMessage.message, ChatMessage.response)
+        .where(ChatMessage.conversation_id == conversation_id,
+               ChatMessage.id > after_id,
+               ChatMessage.response.isnot(None))
+        .order_by(ChatMessage.id.desc())
+        .limit(limit)
+    ).all()
+    return [tuple(row) for row in reversed(rows)]
+
+
+def load(conversation):
+    """Prompt belleği: {'summary': özet, 'turns': [(id, soru, yanıt), ...]}"""
+    if conversation is None or CONVERSATION_RECENT_TURNS <= 0:
+        return {'summary': '', 'turns': []}
+    return {
+        'summary': conversation.summary or '',
+        'turns': recent_turns(conversation.id, conversation.summarized_through_id or 0),
+    }
+
+
+def render(memory):
+    """Belleği prompt metnine çevir; bellek boşsa boş metin"""
+    parts = []
+    if memory['summary']:
+        parts.append(f"Önceki konuşmanın özeti:\n{memory['summary']}")
+    if memory['turns']:
+        parts.append(f"Son mesajlar:\n{_format_turns(memory['turns'])}")
+    return "\n\n".join(parts)
+
+
+def conversation_history(conversation):
+    """AI prompt'u için konuşma geçmişi metni"""
+    return render(load(conversation))
+
+
+def summary_prompt(summary, turns, max_chars=CONVERSATION_SUMMARY_CHARS):
+    return (
+        "Aşağıdaki AI sohbetinin özetini yeni turlarla güncelle. Kullanıcının projesi, "
+        "hedefleri, verilen kararlar ve açık kalan sorular korunmalı; selamlaşma ve "
+        f"tekrarlar atılmalı. Özet Türkçe ve en fazla {max_chars} karakter olsun; "
+        "yalnızca özeti yaz.\n\n"
+        f"{PREVIOUS_SUMMARY}\n{summary or '(yok)'}\n\n"
+        f"{NEW_TURNS}\n{_format_turns(turns)}\n"
+    )
+
+
+def fold(conversation_id, generate):
+    """
+    Son CONVERSATION_RECENT_TURNS dışındaki özetlenmemiş turları (en fazla
+    FOLD_BATCH) özete kat. Katlanan tur sayısını döndürür.
+    Başka bir süreç aynı turları önce katladıysa hiçbir şey yazılmaz.
+    """
+    from sqlalchemy import select, update, func
+    from models import db, ChatMessage, Conversation
+
+    row = db.session.execute(
+        select(Conversation.summary, Conversation.summarized_through_id).where(Conversation.id == conversation_id)
+    ).first()
+    if row is None:
+        return 0
+    summary, through = row.summary, row.summarized_through_id or 0
+    keep = max(CONVERSATION_RECENT_TURNS, 0)
+    turns = db.session.execute(
+        select(ChatMessage.id, ChatMessage.message, ChatMessage.response)
+        .where(ChatMessage.conversation_id == conversation_id,
+               ChatMessage.id > through,
+               ChatMessage.response.isnot(None))
+        .order_by(ChatMessage.id)
+        .limit(FOLD_BATCH + keep)
+    ).all()
+    folded = [tuple(turn) for turn in turns[:max(0, len(turns) - keep)]]
+    # Model çağrısı sürerken okuma transaction'ı açık kalmasın
+    db.session.commit()
+    if not folded:
+        return 0
+
+    new_summary = generate(summary_prompt(summary, folded))
+    if not new_summary:
+        return 0
+    result = db.session.execute(
+        update(Conversation)
+        .where(Conversation.id == conversation_id,
+               func.coalesce(Conversation.summarized_through_id, 0) == through)
+        # Özet güncellemesi konuşmanın son etkinlik zamanını değiştirmesin
+        .values(summary=_clip(new_summary, CONVERSATION_SUMMARY_CHARS),
+                summarized_through_id=folded[-1][0],
+                updated_at=Conversation.updated_at)
+    )
+    db.session.commit()
+    return len(folded) if result.rowcount else 0
+
+
+def summarize(conversation_id, generate):
+    """Özetleyici yetişene kadar katla; toplam katlanan tur sayısı"""
+    total = 0
+    while True:
+        folded = fold(conversation_id, generate)
+        total += folded
+        if folded < FOLD_BATCH:
+            return total
+
+
+def default_generate(prompt):
+    """Özeti yanıtlarla aynı modelle üret; model yapılandırılmamışsa None"""
+    from rag_system import get_llm
+    from llm_guard import llm_breaker
+
+    model = get_llm()
+    if model is None:
+        return None
+    # Model erişilemezse LLMUnavailable; özet bir sonraki yanıttan sonra tekrar denenir
+    response = llm_breaker.generate(model, prompt)
+    return response.text
+
+
+class SummaryWorker:
+    """Konuşma özetlerini yanıt yolunun dışında, tek bir arka plan thread'inde günceller"""
+
+    def __init__(self, generate=default_generate):
+        self.generate = generate
+        self._executor = ProcessLocal(self._new_executor)
+        self._pending = set()
+        self._lock = threading.Lock()
+
+    def _new_executor(self):
+        # Ebeveynde planlanmış işler bu süreçte çalışmayacak
+        self._pending = set()
+        return ThreadPoolExecutor(max_workers=1, thread_name_prefix="conversation-summary")
+
+    def schedule(self, app, conversation_id, after=None):
+        """
+        Konuşmanın özetini arka planda güncelle
+        after: beklenecek yazma (chat_writer.update dönüşü); yanıt yazılmadan turlar sayılmaz.
+        Aynı konuşma için bekleyen iş varsa yenisi eklenmez.
+        """
+        if CONVERSATION_RECENT_TURNS <= 0 or conversation_id is None:
+            return False
+        executor = self._executor.get()
+        with self._lock:
+            if conversation_id in self._pending:
+                return False
+            self._pending.add(conversation_id)
+        executor.submit(self._run, app, conversation_id, after)
+        return True
+
+    def _run(self, app, conversation_id, after):
+        with self._lock:
+            # Bu iş çalışırken gelen yeni turlar için tekrar planlanabilsin
+            self._pending.discard(conversation_id)
+        try:
+            if after is not None:
+                after.done.wait(SUMMARY_WAIT_TIMEOUT)
+            with app.app_context():
+                summarize(conversation_id, self.generate)
+        except Exception as e:
+            logger.error(f"Konuşma özeti güncellenemedi ({conversation_id}): {e}")
+
+    def flush(self):
+        """Planlanmış tüm özet işleri bitene kadar bekle"""
+        executor = self._executor.current()
+        if executor is not None:
+            executor.submit(lambda: None).result()
+
+
+summary_worker = SummaryWorker()
@@ -0,0 +1,96 @@
+"""
+Veritabanı Performans Profili
+SQLite bağlantı ayarları (PRAGMA) ve bağlantı havuzu
+
+Varsayılan SQLite ayarlarında (rollback journal) bir yazma işlemi sürerken
+okumalar bekler, okuma sürerken de yazma kilidi alınamaz; eşzamanlı
+Socket.IO yazmaları ve HTTP okumaları "database is locked" hatasına düşer.
+`production` profili:
+
+- journal_mode=WAL: okuyucular yazıcıyı, yazıcı okuyucuları beklemez
+- synchronous=NORMAL: WAL ile güvenli; commit başına fsync yerine checkpoint'te
+- busy_timeout: kilit meşgulse hemen hata vermek yerine bekle
+- mmap_size / cache_size: okumalar için bellek eşlemeli G/Ç ve daha büyük sayfa önbelleği
+
+Profil `SQLITE_PROFILE` ile seçilir (`production` veya SQLite varsayılanları
+için `default`); tek tek değerler ortam değişkenleriyle değiştirilebilir.
+"""
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+PROFILES = {
+    "production": {
+        "journal_mode": os.getenv("SQLITE_JOURNAL_MODE", "WAL"),
+        "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+        "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000")),
+        "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))),
+        # Negatif değer KiB cinsindendir (-20000 ≈ 20MB)
+        "cache_size": int(os.getenv("SQLITE_CACHE_SIZE", "-20000")),
+    },
+    "default": {},
+}
+
+# Dosya tabanlı SQLite için bağlantı havuzu
+POOL_SIZE = int(os.getenv("SQLITE_POOL_SIZE", "10"))
+MAX_OVERFLOW = int(os.getenv("SQLITE_MAX_OVERFLOW", "20"))
+
+
+def is_file_sqlite(uri: str) -> bool:
+    return uri.startswith("sqlite") and ":memory:" not in uri and uri.rstrip("/") not in ("sqlite:", "sqlite")
+
+
+def engine_options(uri: str, profile: str) -> dict:
+    """SQLALCHEMY_ENGINE_OPTIONS değeri (SQLite dışı veritabanlarında boş)"""
+    pragmas = PROFILES.get(profile)
+    if pragmas is None:
+        raise ValueError(f"Bilinmeyen SQLite profili: {profile}")
+    if not pragmas or not is_file_sqlite(uri):
+        return {}
+    return {
+        "pool_size": POOL_SIZE,
+        "max_overflow": MAX_OVERFLOW,
+        "pool_recycle": 3600,
+        "connect_args": {
+            # pysqlite'ın kendi bekleme süresi busy_timeout ile aynı olmalı
+            "timeout": pragmas["busy_timeout"] / 1000,
+            # Bağlantılar havuzdan farklı thread'lere (ör. chat yazıcısı) verilebilir
+            "check_same_thread": False,
+        },
+    }
+
+
+def apply_pragmas(dbapi_connection, pragmas: dict):
+    """Yeni açılan bağlantıya profil PRAGMA'larını uygula"""
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+    finally:
+        cursor.close()
+
+
+def configure_database(app):
+    """
+    Profili uygulamaya uygula
+    db.init_app'ten önce çağrılır; PRAGMA'lar motor oluşturulduktan sonra
+    register_pragmas ile bağlanır.
+    """
+    app.config.setdefault("SQLITE_PROFILE", os.getenv("SQLITE_PROFILE", "production"))
+    options = engine_options(app.config["SQLALCHEMY_DATABASE_URI"], app.config["SQLITE_PROFILE"])
+    for key, value in options.items():
+        app.config.setdefault("SQLALCHEMY_ENGINE_OPTIONS", {}).setdefault(key, value)
+
+
+def register_pragmas(app, engine):
+    """Motorun her yeni bağlantısında profil PRAGMA'larını çalıştır"""
+    from sqlalchemy import event
+
+    pragmas = PROFILES[app.config["SQLITE_PROFILE"]]
+    if not pragmas or engine.dialect.name != "sqlite" or not is_file_sqlite(str(engine.url)):
+        return
+
+    @event.listens_for(engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        apply_pragmas(dbapi_connection, pragmas)
@@ -0,0 +1,350 @@
+"""
+Döküman Özetleri ve Ana Hatları
+Dökümanın bütününe dair sorular için yükleme sırasında hazırlanan özet ve içindekiler
+
+"Raporumu özetle" veya "bölümler neler?" gibi sorular top-k chunk aramasıyla
+hem yavaş hem eksik yanıtlanıyordu: birkaç chunk dökümanın tamamını temsil etmez.
+Bu modülde döküman yüklenirken (process_pdf_document sonrası) hiyerarşik bir
+özet hazırlanır:
+
+1. Her sayfa aralığının (process_pdf_document'ın 20 sayfalık grupları) metni
+   chunk'lardan yeniden birleştirilir, özetlenir ve başlıkları çıkarılır.
+2. Aralık özetleri birleştirilip döküman özeti üretilir.
+
+Sonuçlar vektörlerle aynı Chroma veritabanında, ayrı bir koleksiyonda
+(`document_digests`, broker üzerinden) saklanır: döküman başına bir kayıt
+(kind=document; özet + JSON içindekiler) ve aralık başına bir kayıt (kind=range).
+
+Soru dökümanın bütününü hedefliyorsa (whole_document_intent) yanıt doğrudan bu
+kayıtlardan verilir; LLM ve chunk araması çalışmaz. DOCUMENT_DIGEST_DIRECT=false
+ise özetler LLM'e kompakt bağlam olarak verilir.
+
+Özetler yanıt modeliyle üretilir (RAG_LLM_BACKEND; stub ile yerel ve
+deterministik). Model yoksa her paragrafın ilk cümlelerinden oluşan çıkarımsal
+(extractive) özet kullanılır.
+"""
+import os
+import re
+import json
+import time
+import logging
+from collections import Counter
+
+from retrieval import merge_adjacent_chunks
+
+logger = logging.getLogger(__name__)
+
+DIGEST_COLLECTION = "document_digests"
+DIGEST_DIRECT = os.getenv("DOCUMENT_DIGEST_DIRECT", "True").lower() in ("1", "true", "yes")
+# Aralık ve döküman özetlerinin hedef uzunluğu (kelime)
+RANGE_SUMMARY_WORDS = int(os.getenv("DOCUMENT_DIGEST_RANGE_WORDS", "120"))
+DOCUMENT_SUMMARY_WORDS = int(os.getenv("DOCUMENT_DIGEST_SUMMARY_WORDS", "250"))
+# Özet prompt'una giren en fazla kaynak metin (karakter)
+SOURCE_CHAR_LIMIT = 60000
+OUTLINE_MAX_ITEMS = 80
+# Yanıttaki "Bölümlere göre" satırlarının uzunluğu (kelime)
+RANGE_LINE_WORDS = 40
+
+# Özet prompt'unun kaynak metin başlığı (stub model de bunu okur)
+SOURCE_TEXT = "Özetlenecek metin:"
+
+_NUMBERED_HEADING_RE = re.compile(r"^(?P<number>\d{1,2}(?:\.\d{1,2}){0,3})[.)]?\s+(?P<title>\S.{1,100})$")
+_CHAPTER_HEADING_RE = re.compile(r"^(?:BÖLÜM|Bölüm|CHAPTER|Chapter|EK|Ek)\s+\S{1,10}(?:\s*[:.-]\s*.{0,80})?$")
+_TOC_LEADER_RE = re.compile(r"\s*(?:\.{2,}|…+)\s*\d*\s*$")
+_SENTENCE_RE = re.compile(r"(?<=[.!?…])\s+")
+_PAGE_RANGE_RE = re.compile(r"^(\d+)")
+
+# Dökümanın bütününe dair soru kalıpları (küçük harfe çevrilmiş metinde)
+_SUMMARY_RE = re.compile(r"\b(özetle|özetini|özetin|özeti\b|özet çıkar|genel bakış|ne anlatıyor|neyi anlatıyor|summar|overview)")
+_OUTLINE_RE = re.compile(r"\b(bölümler|bölümleri|başlıklar|başlıkları|içindekiler|ana hatlar|ana başlık|chapters|outline|table of contents|sections)")
+_DOCUMENT_RE = re.compile(r"\b(rapor|döküman|doküman|belge|pdf|dosya|tez|sunum|şartname|report|document|paper|thesis)")
+
+
+def _normalize(text):
+    """Türkçe büyük harfleri doğru küçült (İ -> i, I -> ı)"""
+    return (text or "").replace("İ", "i").replace("I", "ı").lower()
+
+
+def whole_document_intent(query, filenames=()):
+    """
+    Soru dökümanın bütününü mü hedefliyor: 'outline', 'summary' veya None
+    Soru bir döküman kelimesi (rapor, belge, pdf...) veya dosya adı içermelidir;
+    "bu konuşmayı özetle" gibi sorular yönlendirilmez.
+    """
+    text = _normalize(query)
+    if _OUTLINE_RE.search(text):
+        kind = "outline"
+    elif _SUMMARY_RE.search(text):
+        kind = "summary"
+    else:
+        return None
+    if _DOCUMENT_RE.search(text) or mentioned_filename(query, filenames):
+        return kind
+    return None
+
+
+def mentioned_filename(query, filenames):
+    """Soruda adı (uzantılı veya uzantısız) geçen ilk dosya"""
+    text = _normalize(query)
+    for filename in filenames:
+        name = _normalize(filename)
+        stem = os.path.splitext(name)[0]
+        if name in text or (len(stem) >= 3 and stem in text):
+            return filename
+    return None
+
+
+def lead_summary(text, max_words):
+    """Çıkarımsal özet: paragrafların ilk cümleleri, sonra ikinci cümleleri... max_words'e kadar"""
+    # unstructured her elemanı (paragraf, başlık) ayrı satıra yazar
+    paragraphs = [_SENTENCE_RE.split(p.strip()) for p in (text or "").split("\n") if p.strip()]
+    paragraphs = [[s.strip() for s in sentences if len(s.split()) >= 4] for sentences in paragraphs]
+    picked, words = [], 0
+    for depth in range(max((len(p) for p in paragraphs), default=0)):
+        for index, sentences in enumerate(paragraphs):
+            if depth < len(sentences):
+                sentence = sentences[depth]
+                count = len(sentence.split())
+                if words + count > max_words:
+                    break
+                picked.append((index, depth, sentence))
+                words += count
+        else:
+            continue
+        break
+    # Metindeki sırayla
+    return " ".join(sentence for _, _, sentence in sorted(picked))
+
+
+def extract_outline(text, page_range=""):
+    """Başlık gibi görünen satırlar: [{'level', 'title', 'pages'}]"""
+    items = []
+    for line in (text or "").splitlines():
+        line = _TOC_LEADER_RE.sub("", line.strip())
+        if not line or len(line) > 100:
+            continue
+        match = _NUMBERED_HEADING_RE.match(line)
+        if match:
+            title = match.group("title").strip()
+            # Numaralı liste maddeleri ve cümleler başlık değildir
+            if not title[0].isupper() or title[-1] in ".,;:" or len(title.split()) > 12:
+                continue
+            items.append({'level': match.group("number").count(".") + 1, 'title': line, 'pages': page_range})
+        elif _CHAPTER_HEADING_RE.match(line) or (
+                line.upper() == line and sum(c.isalpha() for c in line) >= 4 and len(line.split()) <= 10):
+            items.append({'level': 1, 'title': line, 'pages': page_range})
+    return items
+
+
+def _clean_outline(items):
+    """Her sayfada tekrar eden üst bilgileri at, içindekiler sayfasındaki tekrarı birleştir"""
+    counts = Counter(_normalize(item['title']) for item in items)
+    seen, outline = set(), []
+    for item in items:
+        key = _normalize(item['title'])
+        if counts[key] > 2 or key in seen:
+            continue
+        seen.add(key)
+        outline.append(item)
+    return outline[:OUTLINE_MAX_ITEMS]
+
+
+def _first_page(page_range):
+    match = _PAGE_RANGE_RE.match(str(page_range or ""))
+    return int(match.group(1)) if match else 0
+
+
+def page_sections(documents):
+    """
+    process_pdf_document çıktısından sayfa aralığı metinleri: [(aralık, metin)]
+    Örtüşen chunk'lar retrieval.merge_adjacent_chunks ile tek metne birleştirilir.
+    """
+    chunks = [{'text': doc.text, 'metadata': dict(doc.metadata or {})} for doc in documents]
+    blocks = merge_adjacent_chunks(chunks)
+    sections = {}
+    for block in blocks:
+        page_range = block['metadata'].get('page_range') or "tümü"
+        sections[page_range] = (sections[page_range] + "\n" + block['text']) if page_range in sections else block['text']
+    return sorted(sections.items(), key=lambda item: _first_page(item[0]))
+
+
+def summary_prompt(text, max_words, scope):
+    return (
+        f"Aşağıdaki {scope} Türkçe olarak en fazla {max_words} kelimeyle özetle. "
+        "Amaç, problem, yöntem, sonuçlar ve önemli sayıları koru; yalnızca özeti yaz.\n\n"
+        f"{SOURCE_TEXT}\n{text[:SOURCE_CHAR_LIMIT]}\n"
+    )
+
+
+def llm_summarizer(model=None):
+    """Verilen (yoksa yanıt) modeliyle özetleyen fonksiyon; model yoksa çıkarımsal özet"""
+    from llm_guard import llm_breaker
+
+    if model is None:
+        from rag_system import get_llm
+        model = get_llm()
+
+    def summarize(text, max_words, scope):
+        if model is not None:
+            try:
+                response = llm_breaker.generate(model, summary_prompt(text, max_words, scope))
+                if response.text:
+                    return response.text.strip()
+            except Exception as e:
+                logger.warning(f"Özet modeli hatası, çıkarımsal özet kullanılıyor: {e}")
+        return lead_summary(text, max_words)
+    return summarize
+
+
+def build_digest(filename, sections, summarize=None):
+    """
+    Hiyerarşik özet: önce her sayfa aralığı, sonra aralık özetlerinden döküman
+    sections: [(sayfa aralığı, metin)]
+    """
+    summarize = summarize or llm_summarizer()
+    ranges, outline = [], []
+    for page_range, text in sections:
+        ranges.append({'pages': page_range, 'summary': summarize(text, RANGE_SUMMARY_WORDS, "döküman bölümünü")})
+        outline.extend(extract_outline(text, page_range))
+    if len(ranges) == 1:
+        summary = ranges[0]['summary']
+    else:
+        combined = "\n\n".join(f"Sayfa {item['pages']}: {item['summary']}" for item in ranges)
+        summary = summarize(combined, DOCUMENT_SUMMARY_WORDS, "bölüm özetlerinden dökümanın tamamını")
+    return {'filename': filename, 'summary': summary, 'ranges': ranges, 'outline': _clean_outline(outline)}
+
+
+def _where(**conditions):
+    """Chroma where ifadesi ($and en az iki koşul ister)"""
+    clauses = [{key: value} for key, value in conditions.items() if value is not None]
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+
+class DocumentDigests:
+    """
+    Döküman özetleri koleksiyonu
+    embed_texts: metin listesi -> embedding listesi; embed_query: soru -> embedding (isteğe bağlı)
+    """
+
+    def __init__(self, collection, embed_texts, embed_query=None):
+        self.collection = collection
+        self.embed_texts = embed_texts
+        self.embed_query = embed_query
+
+    def store(self, digest, source, project_id=None):
+        """Dökümanın özet kayıtlarını yaz (aynı kaynak yeniden yüklenirse eskileri silinir)"""
+        project = str(project_id) if project_id else ""
+        base = {'source': str(source), 'filename': digest['filename'], 'project_id': project}
+        ids = [f"{source}#document"]
+        texts = [digest['summary']]
+        metadatas = [dict(base, kind="document", outline=json.dumps(digest['outline'], ensure_ascii=False),
+                          ranges=len(digest['ranges']), ingested_at=time.time())]
+        for order, item in enumerate(digest['ranges']):
+            ids.append(f"{source}#{item['pages']}")
+            texts.append(item['summary'])
+            metadatas.append(dict(base, kind="range", pages=item['pages'], order=order))
+        self.collection.delete(where={'source': str(source)})
+        self.collection.upsert(ids=ids, embeddings=self.embed_texts(texts), documents=texts, metadatas=metadatas)
+        return len(ids)
+
+    def _documents(self, project_id=None):
+        # Proje verilmezse yalnızca projesiz yüklenen dökümanlar (filtre hiç kaldırılmaz)
+        result = self.collection.get(
+            where=_where(kind="document", project_id=str(project_id) if project_id else ""),
+            include=["documents", "metadatas"]
+        )
+        return [{'summary': text, **metadata}
+                for text, metadata in zip(result.get("documents") or [], result.get("metadatas") or [])]
+
+    def find(self, query, project_id=None):
+        """
+        Sorunun hedeflediği döküman kaydı
+        Dosya adı geçiyorsa o, tek döküman varsa o; yoksa özeti soruya en yakın
+        (embedding) veya en son yüklenen döküman.
+        """
+        documents = self._documents(project_id)
+        if len(documents) <= 1:
+            return documents[0] if documents else None
+        filename = mentioned_filename(query, [doc['filename'] for doc in documents])
+        if filename:
+            return next(doc for doc in documents if doc['filename'] == filename)
+        if self.embed_query is not None:
+            result = self.collection.query(
+                query_embeddings=[self.embed_query(query)], n_results=1,
+                where=_where(kind="document", project_id=str(project_id) if project_id else ""),
+                include=["metadatas"]
+            )
+            metadatas = (result.get("metadatas") or [[]])[0]
+            if metadatas:
+                return next(doc for doc in documents if doc['source'] == metadatas[0]['source'])
+        return max(documents, key=lambda doc: doc.get('ingested_at', 0))
+
+    def ranges(self, source):
+        result = self.collection.get(where=_where(source=str(source), kind="range"),
+                                     include=["documents", "metadatas"])
+        items = [{'pages': metadata['pages'], 'summary': text, 'order': metadata.get('order', 0)}
+                 for text, metadata in zip(result.get("documents") or [], result.get("metadatas") or [])]
+        return sorted(items, key=lambda item: item['order'])
+
+    def filenames(self, project_id=None):
+        return [doc['filename'] for doc in self._documents(project_id)]
+
+
+def render_outline(document):
+    outline = json.loads(document.get('outline') or "[]")
+    if not outline:
+        return None
+    lines = [f"{document['filename']} - içindekiler (yükleme sırasında çıkarıldı):"]
+    for item in outline:
+        pages = f" (s. {item['pages']})" if item.get('pages') and item['pages'] != "tümü" else ""
+        lines.append(f"{'  ' * (item['level'] - 1)}- {item['title']}{pages}")
+    return "\n".join(lines)
+
+
+def render_summary(document, ranges):
+    lines = [f"{document['filename']} - özet (yükleme sırasında hazırlandı):", "", document['summary']]
+    if len(ranges) > 1:
+        lines += ["", "Bölümlere göre:"]
+        for item in ranges:
+            words = item['summary'].split()
+            line = " ".join(words[:RANGE_LINE_WORDS]) + ("…" if len(words) > RANGE_LINE_WORDS else "")
+            lines.append(f"- Sayfa {item['pages']}: {line}")
+    return "\n".join(lines)
+
+
+def digest_chunks(document, ranges):
+    """Döküman ve aralık özetleri chunk biçiminde (model erişilemezse çıkarımsal yanıt için)"""
+    chunks = [{'text': document['summary'], 'metadata': {'filename': document['filename']}}]
+    for item in ranges:
+        chunks.append({'text': item['summary'],
+                       'metadata': {'filename': document['filename'], 'page_range': item['pages']}})
+    return chunks
+
+
+def digest_answer(digests, query, project_id=None):
+    """
+    Dökümanın bütününü hedefleyen soru için hazır yanıt / bağlam
+    Dönüş: (tür, metin, chunk'lar) veya None. Tür 'outline' veya 'summary';
+    chunk'lar metnin dayandığı özetlerdir (bkz. digest_chunks).
+    Dökümanlar projelere yüklenir; proje verilmeyen (genel) sohbette None.
+    """
+    if not project_id:
+        return None
+    text = _normalize(query)
+    if not (_SUMMARY_RE.search(text) or _OUTLINE_RE.search(text)):
+        return None
+    filenames = digests.filenames(project_id)
+    kind = whole_document_intent(query, filenames)
+    if kind is None or not filenames:
+        return None
+    document = digests.find(query, project_id)
+    if document is None:
+        return None
+    ranges = digests.ranges(document['source'])
+    chunks = digest_chunks(document, ranges)
+    if kind == "outline":
+        outline = render_outline(document)
+        if outline:
+            return kind, outline, chunks
+    # İçindekiler çıkarılamadıysa bölüm özetleri dökümanın yapısını da verir
+    return "summary", render_summary(document, ranges), chunks
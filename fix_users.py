@@ -8,9 +8,11 @@ import sys
 # Add current directory to path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from app import app, db
+from app import create_app, db
 from models import User
 
+app = create_app()
+
 def fix_user_data():
     """None olan kullanıcı verilerini düzelt"""
     with app.app_context():
@@ -0,0 +1,44 @@
+"""
+Gunicorn yapılandırması
+gunicorn -c gunicorn.conf.py wsgi:app
+
+Worker'lar arasında Socket.IO yayınları mesaj kuyruğundan geçer
+(SOCKETIO_MESSAGE_QUEUE) ve Chroma'ya tek yazıcı (broker) erişir. Bu yüzden kuyruk
+ayarlıysa varsayılan olarak CPU başına bir worker çalışır ve preload edilen
+uygulama worker'lar arasında copy-on-write paylaşılır; kuyruk yoksa odalar
+süreç içi olduğundan tek worker. Aynı portu paylaşan worker'lar long-polling
+istemcisine sticky session sağlayamaz; uygulamanın istemcisi websocket ile
+bağlanır. Long-polling kullanan istemciler için her süreci ayrı portta
+başlatın (GUNICORN_BIND) ve önüne ip_hash kullanan bir proxy koyun (bkz. README,
+Çoklu Süreç).
+"""
+import os
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:5000')
+# Kuyruk yoksa odalar süreç içidir: tek worker
+_default_workers = (os.cpu_count() or 1) if os.getenv('SOCKETIO_MESSAGE_QUEUE') else 1
+workers = int(os.getenv('WEB_CONCURRENCY', str(_default_workers)))
+# Varsayılan thread'li worker: Flask-SocketIO threading modunda websocket'i
+# simple-websocket ile sunar, monkey patch gerekmez. eventlet/gevent isteğe bağlıdır.
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+threads = int(os.getenv('GUNICORN_THREADS', '100'))
+
+# Uygulama ve modeller master süreçte bir kez yüklenir, worker'lar fork ile kopyalanır.
+# eventlet/gevent monkey patch'i worker'da fork sonrası yapar; master'da önceden
+# oluşturulmuş thread ve kilitler yamalanmaz. Bu worker'larda preload varsayılan olarak kapalıdır.
+_green_worker = worker_class in ('eventlet', 'gevent') or worker_class.endswith(('EventletWorker', 'GeventWorker'))
+preload_app = os.getenv('GUNICORN_PRELOAD', str(not _green_worker)).lower() in ('1', 'true', 'yes')
+
+def post_fork(server, worker):
+    """Master'dan devralınan veritabanı bağlantılarını worker'da kullanma"""
+    if not preload_app:
+        return
+    from wsgi import app
+    from models import db
+    with app.app_context():
+        db.engine.dispose(close=False)
+
+def worker_exit(server, worker):
+    """Kuyrukta bekleyen chat mesajlarını kapanmadan önce yaz"""
+    from chat_writer import chat_writer
+    chat_writer.flush()
@@ -0,0 +1,200 @@
+"""
+LLM Devre Kesici (Circuit Breaker)
+Yanıt modeli çağrılarını süre sınırı ve devre kesiciyle korur
+
+Gemini erişilemezken her soru aynı hatayı bekleyerek alıyor, yavaşken kullanıcı
+yanıtı dakikalarca bekliyordu. Bu modülde:
+
+- Her çağrı sınırlı bir thread havuzunda çalışır ve en fazla LLM_DEADLINE saniye
+  beklenir; süre dolunca çağıran LLMUnavailable alır (çağrı arka planda biter,
+  sonucu atılır).
+- Son LLM_BREAKER_WINDOW çağrının hata (istisna + süre aşımı) oranı
+  LLM_BREAKER_FAILURE_RATE'i veya LLM_SLOW_SECONDS'tan uzun süren çağrıların
+  oranı LLM_BREAKER_SLOW_RATE'i aşarsa (en az LLM_BREAKER_MIN_CALLS çağrı)
+  devre açılır: LLM_BREAKER_COOLDOWN saniye boyunca model hiç çağrılmaz.
+- Süre dolunca devre yarı açık olur; tek bir deneme çağrısı geçer. Başarılı ve
+  hızlıysa devre kapanır, değilse tekrar açılır.
+
+Çağıranlar LLMUnavailable'da çıkarımsal (extractive) yanıta düşer (bkz.
+rag_system.answer_with_fallback). Durum ve sayaçlar metrics() ile okunur
+(/admin/api/ai-status). Durum süreç içidir; her worker kendi devresini tutar.
+"""
+import os
+import time
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+from cache import ProcessLocal
+
+LLM_DEADLINE = float(os.getenv("LLM_DEADLINE", "15"))
+LLM_SLOW_SECONDS = float(os.getenv("LLM_SLOW_SECONDS", "8"))
+LLM_WORKERS = int(os.getenv("LLM_WORKERS", "8"))
+LLM_BREAKER_WINDOW = int(os.getenv("LLM_BREAKER_WINDOW", "20"))
+LLM_BREAKER_MIN_CALLS = int(os.getenv("LLM_BREAKER_MIN_CALLS", "5"))
+LLM_BREAKER_FAILURE_RATE = float(os.getenv("LLM_BREAKER_FAILURE_RATE", "0.5"))
+LLM_BREAKER_SLOW_RATE = float(os.getenv("LLM_BREAKER_SLOW_RATE", "0.5"))
+LLM_BREAKER_COOLDOWN = float(os.getenv("LLM_BREAKER_COOLDOWN", "30"))
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class LLMUnavailable(Exception):
+    """Model çağrılmadı (devre açık) veya zamanında / hatasız yanıt vermedi"""
+
+    def __init__(self, message, reason):
+        super().__init__(message)
+        self.reason = reason  # 'open', 'timeout' veya 'error'
+
+
+class CircuitBreaker:
+    def __init__(self, deadline: float = LLM_DEADLINE, slow_seconds: float = LLM_SLOW_SECONDS,
+                 workers: int = LLM_WORKERS, window: int = LLM_BREAKER_WINDOW,
+                 min_calls: int = LLM_BREAKER_MIN_CALLS, failure_rate: float = LLM_BREAKER_FAILURE_RATE,
+                 slow_rate: float = LLM_BREAKER_SLOW_RATE, cooldown: float = LLM_BREAKER_COOLDOWN):
+        self.deadline = deadline
+        self.slow_seconds = slow_seconds
+        self.workers = workers
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_rate = slow_rate
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        self._executor = ProcessLocal(
+            lambda: ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="llm"))
+        self._window = deque(maxlen=window)  # (başarılı, yavaş, süre)
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._counters = {'calls': 0, 'failures': 0, 'timeouts': 0, 'slow': 0,
+                          'short_circuited': 0, 'fallbacks': 0, 'opened': 0}
+        self._last_error = None
+
+    def configure(self, **settings):
+        """Ayarları değiştir ve durumu sıfırla (ör. benchmark)"""
+        with self._lock:
+            window = settings.pop('window', self._window.maxlen)
+            for name, value in settings.items():
+                if not hasattr(self, name):
+                    raise AttributeError(name)
+                setattr(self, name, value)
+            self._window = deque(maxlen=window)
+            self._state = CLOSED
+            self._probe_in_flight = False
+            self._counters = dict.fromkeys(self._counters, 0)
+            self._last_error = None
+            executor = self._executor.reset()
+            if executor is not None:
+                executor.shutdown(wait=False)
+
+    def _get_executor(self):
+        return self._executor.get()
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._current_state(time.monotonic())
+
+    def _current_state(self, now):
+        if self._state == OPEN and now - self._opened_at >= self.cooldown:
+            self._state = HALF_OPEN
+        return self._state
+
+    def _allow(self):
+        with self._lock:
+            state = self._current_state(time.monotonic())
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            self._counters['short_circuited'] += 1
+            return False
+
+    def _open(self, now):
+        self._state = OPEN
+        self._opened_at = now
+        self._probe_in_flight = False
+        self._counters['opened'] += 1
+
+    def _record(self, ok, duration, error=None):
+        slow = ok and duration >= self.slow_seconds
+        with self._lock:
+            now = time.monotonic()
+            self._counters['calls'] += 1
+            if not ok:
+                self._counters['failures'] += 1
+                self._last_error = error
+            if slow:
+                self._counters['slow'] += 1
+            self._window.append((ok, slow, duration))
+            if self._state == HALF_OPEN:
+                if ok and not slow:
+                    self._state = CLOSED
+                    self._probe_in_flight = False
+                    self._window.clear()
+                else:
+                    self._open(now)
+                return
+            if self._state == CLOSED and len(self._window) >= self.min_calls:
+                failures = sum(1 for item in self._window if not item[0]) / len(self._window)
+                slow_calls = sum(1 for item in self._window if item[1]) / len(self._window)
+                if failures >= self.failure_rate or slow_calls >= self.slow_rate:
+                    self._open(now)
+
+    def call(self, func, *args):
+        """func(*args)'ı süre sınırı ve devre kesiciyle çalıştır"""
+        if not self._allow():
+            raise LLMUnavailable("AI modeli geçici olarak devre dışı (devre açık)", "open")
+        started = time.perf_counter()
+        future = self._get_executor().submit(func, *args)
+        try:
+            result = future.result(timeout=self.deadline)
+        except FutureTimeoutError:
+            # Henüz başlamadıysa kuyruktan çıkar; başladıysa sonucu beklenmez
+            future.cancel()
+            with self._lock:
+                self._counters['timeouts'] += 1
+            self._record(False, time.perf_counter() - started, f"{self.deadline:g}s içinde yanıt gelmedi")
+            raise LLMUnavailable("AI modeli zamanında yanıt vermedi", "timeout")
+        except Exception as e:
+            self._record(False, time.perf_counter() - started, str(e))
+            raise LLMUnavailable(f"AI modeli hatası: {e}", "error") from e
+        self._record(True, time.perf_counter() - started)
+        return result
+
+    def generate(self, model, prompt):
+        """model.generate_content(prompt) korumalı çağrısı"""
+        return self.call(model.generate_content, prompt)
+
+    def note_fallback(self):
+        with self._lock:
+            self._counters['fallbacks'] += 1
+
+    def metrics(self):
+        """Devre durumu, sayaçlar ve son pencerenin oranları / gecikmeleri"""
+        with self._lock:
+            now = time.monotonic()
+            state = self._current_state(now)
+            window = list(self._window)
+            durations = sorted(item[2] for item in window if item[0])
+            return {
+                'state': state,
+                'open_for_seconds': round(max(0.0, self.cooldown - (now - self._opened_at)), 1) if state == OPEN else 0,
+                'window_calls': len(window),
+                'window_failure_rate': round(sum(1 for item in window if not item[0]) / len(window), 3) if window else 0,
+                'window_slow_rate': round(sum(1 for item in window if item[1]) / len(window), 3) if window else 0,
+                'latency_p50_ms': round(durations[len(durations) // 2] * 1000, 1) if durations else None,
+                'latency_p95_ms': round(durations[min(len(durations) - 1, int(len(durations) * 0.95))] * 1000, 1) if durations else None,
+                'last_error': self._last_error,
+                'settings': {
+                    'deadline': self.deadline, 'slow_seconds': self.slow_seconds, 'min_calls': self.min_calls,
+                    'failure_rate': self.failure_rate, 'slow_rate': self.slow_rate, 'cooldown': self.cooldown,
+                },
+                **self._counters,
+            }
+
+
+llm_breaker = CircuitBreaker()
@@ -0,0 +1,243 @@
+"""
+Veritabanı Migration'ları
+Şemayı veri kaybı olmadan, sürüm sürüm yerinde günceller
+
+Uygulanan her migration `schema_version` tablosuna kaydedilir. Yeni bir şema
+değişikliği için dosyanın sonuna bir sonraki sürüm numarasıyla `@migration`
+fonksiyonu ekleyin; fonksiyonlar idempotent olmalıdır (create_all ile yeni
+oluşturulmuş bir veritabanında da sorunsuz çalışmalı).
+"""
+import logging
+from datetime import datetime
+
+from sqlalchemy import inspect, text
+
+from models import db
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS = []
+
+def migration(version, description):
+    """Migration fonksiyonunu sürüm numarasıyla kaydet"""
+    def decorator(func):
+        MIGRATIONS.append((version, description, func))
+        MIGRATIONS.sort(key=lambda item: item[0])
+        return func
+    return decorator
+
+def _ensure_version_table(conn):
+    conn.execute(text(
+        "CREATE TABLE IF NOT EXISTS schema_version ("
+        "version INTEGER PRIMARY KEY, "
+        "description VARCHAR(200), "
+        "applied_at DATETIME)"
+    ))
+
+def current_version(conn=None):
+    """Veritabanına uygulanmış en son migration sürümü"""
+    if conn is None:
+        with db.engine.begin() as conn:
+            return current_version(conn)
+    _ensure_version_table(conn)
+    return conn.execute(text("SELECT COALESCE(MAX(version), 0) FROM schema_version")).scalar()
+
+def upgrade(target=None):
+    """
+    Bekleyen migration'ları sırayla uygula (uygulama bağlamında çağrılmalı)
+    Her migration kendi transaction'ında çalışır. Uygulanan sürümleri döndürür.
+    """
+    applied = []
+    for version, description, func in MIGRATIONS:
+        if target is not None and version > target:
+            break
+        with db.engine.begin() as conn:
+            if version <= current_version(conn):
+                continue
+            logger.info(f"Migration {version} uygulanıyor: {description}")
+            func(conn)
+            conn.execute(
+                text("INSERT INTO schema_version (version, description, applied_at) VALUES (:v, :d, :t)"),
+                {'v': version, 'd': description, 't': datetime.utcnow()}
+            )
+        applied.append(version)
+    return applied
+
+# --- Yardımcılar ---
+
+def create_missing_indexes(conn, model, names=None):
+    """
+    Modelde tanımlı olup veritabanında olmayan indeksleri oluştur
+    names verilirse yalnızca o indeksler (sonraki migration'ların kolonları henüz yok olabilir)
+    """
+    existing = _index_names(conn, model.__table__.name)
+    for index in model.__table__.indexes:
+        if (names is None or index.name in names) and index.name not in existing:
+            index.create(bind=conn)
+
+def _index_names(conn, table_name):
+    """Tablodaki indeks adları (SQLAlchemy ifade indekslerini yansıtmadığı için SQLite'ta sqlite_master)"""
+    if conn.dialect.name == 'sqlite':
+        return set(conn.execute(
+            text("SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = :table"), {'table': table_name}
+        ).scalars())
+    return {index['name'] for index in inspect(conn).get_indexes(table_name)}
+
+def add_column_if_missing(conn, model, column_name):
+    """Modeldeki kolonu tabloya ekle (ALTER TABLE ... ADD COLUMN)"""
+    table = model.__table__
+    existing = {column['name'] for column in inspect(conn).get_columns(table.name)}
+    if column_name in existing:
+        return False
+    column = table.columns[column_name]
+    column_type = column.type.compile(dialect=conn.dialect)
+    conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column_name} {column_type}'))
+    return True
+
+# --- Migration'lar ---
+
+@migration(1, 'Başlangıç şeması (eksik tabloları oluştur)')
+def initial_schema(conn):
+    db.metadata.create_all(bind=conn)
+
+@migration(2, 'Sık kullanılan sorgular için bileşik indeksler')
+def add_hot_query_indexes(conn):
+    from models import ChatMessage, Competition, Project
+    for model in (ChatMessage, Competition, Project):
+        create_missing_indexes(conn, model, names={
+            'ix_competition_is_active',
+            'ix_project_owner_updated', 'ix_project_advisor_updated', 'ix_project_category',
+            'ix_chat_message_project_timestamp', 'ix_chat_message_timestamp', 'ix_chat_message_user_timestamp',
+        })
+
+@migration(3, 'AI sohbet turları: soru bir kez saklanır, yanıt aynı satıra yazılır')
+def normalize_ai_turns(conn, merge_window_seconds=600):
+    from models import ChatMessage, Conversation
+
+    Conversation.__table__.create(bind=conn, checkfirst=True)
+    for column in ('conversation_id', 'role', 'response_latency_ms', 'responded_at'):
+        add_column_if_missing(conn, ChatMessage, column)
+    create_missing_indexes(conn, ChatMessage)
+    create_missing_indexes(conn, Conversation, names={'ix_conversation_user_project'})
+
+    # Yazarın rolünü mesaja kopyala
+    conn.execute(text(
+        'UPDATE chat_message SET role = (SELECT role FROM "user" WHERE "user".id = chat_message.user_id) '
+        'WHERE role IS NULL'
+    ))
+
+    # Eski akış her AI sorusunu iki kez yazıyordu: önce yalnızca soru, sonra
+    # soru + yanıt. Yanıtı sorunun satırına taşı ve ikinci satırı sil.
+    rows = conn.execute(text(
+        'SELECT id, user_id, project_id, message, response, timestamp FROM chat_message '
+        'WHERE conversation_id IS NULL ORDER BY id'
+    )).mappings().all()
+
+    pending_questions = {}
+    merges = []
+    for row in rows:
+        key = (row['user_id'], row['project_id'], row['message'])
+        if row['response'] is None:
+            pending_questions[key] = row
+            continue
+        question = pending_questions.pop(key, None)
+        if question is None:
+            continue
+        asked_at = _as_datetime(question['timestamp'])
+        answered_at = _as_datetime(row['timestamp'])
+        if asked_at and answered_at and (answered_at - asked_at).total_seconds() > merge_window_seconds:
+            continue
+        latency = int((answered_at - asked_at).total_seconds() * 1000) if asked_at and answered_at else None
+        merges.append((question['id'], row['id'], row['response'], answered_at, latency))
+
+    for question_id, answer_id, response, answered_at, latency in merges:
+        conn.execute(
+            text('UPDATE chat_message SET response = :response, responded_at = :answered_at, '
+                 'response_latency_ms = :latency WHERE id = :id'),
+            {'response': response, 'answered_at': answered_at, 'latency': latency, 'id': question_id}
+        )
+        conn.execute(text('DELETE FROM chat_message WHERE id = :id'), {'id': answer_id})
+    if merges:
+        logger.info(f"{len(merges)} yinelenen AI sorusu birleştirildi")
+
+    # Yanıtlı satırlar AI turudur; kullanıcı+proje başına bir konuşmaya bağla
+    turns = conn.execute(text(
+        'SELECT user_id, project_id, MIN(timestamp) AS first_at, MAX(timestamp) AS last_at '
+        'FROM chat_message WHERE response IS NOT NULL AND conversation_id IS NULL '
+        'GROUP BY user_id, project_id'
+    )).mappings().all()
+    for turn in turns:
+        conversation_id = conn.execute(
+            text('INSERT INTO conversation (user_id, project_id, created_at, updated_at) '
+                 'VALUES (:user_id, :project_id, :first_at, :last_at)'),
+            dict(turn)
+        ).lastrowid
+        conn.execute(
+            text('UPDATE chat_message SET conversation_id = :conversation_id '
+                 'WHERE response IS NOT NULL AND conversation_id IS NULL AND user_id = :user_id '
+                 'AND (project_id = :project_id OR (project_id IS NULL AND :project_id IS NULL))'),
+            {'conversation_id': conversation_id, 'user_id': turn['user_id'], 'project_id': turn['project_id']}
+        )
+
+@migration(4, 'Admin paneli toplamları ve tabloları için indeksler')
+def add_admin_indexes(conn):
+    from models import User, Project
+    create_missing_indexes(conn, User, names={'ix_user_created_at', 'ix_user_role_created'})
+    create_missing_indexes(conn, Project, names={'ix_project_updated', 'ix_project_status_updated'})
+
+@migration(5, 'Aktivite kaydı tablosu ve mevcut verinin aktarılması')
+def add_activity_log(conn):
+    from models import Activity
+    from activity import backfill_activity
+
+    Activity.__table__.create(bind=conn, checkfirst=True)
+    create_missing_indexes(conn, Activity)
+    inserted = backfill_activity(conn)
+    if inserted:
+        logger.info(f"{inserted} aktivite kaydı oluşturuldu")
+
+@migration(6, 'Proje listesi imleci için boş updated_at değerlerini doldur')
+def fill_project_updated_at(conn):
+    conn.execute(text(
+        'UPDATE project SET updated_at = COALESCE(created_at, CURRENT_TIMESTAMP) WHERE updated_at IS NULL'
+    ))
+
+@migration(7, 'AI konuşmaları için birikimli özet kolonları')
+def add_conversation_summary(conn):
+    from models import Conversation
+    add_column_if_missing(conn, Conversation, 'summary')
+    add_column_if_missing(conn, Conversation, 'summarized_through_id')
+
+@migration(8, 'AI konuşmaları: kullanıcı ve proje başına tek konuşma')
+def unique_conversations(conn):
+    from models import Conversation
+
+    # Eşzamanlı ilk mesajların oluşturduğu kopyaları en eski konuşmada birleştir
+    rows = conn.execute(text(
+        'SELECT c.id, (SELECT MIN(o.id) FROM conversation o WHERE o.user_id = c.user_id '
+        'AND COALESCE(o.project_id, 0) = COALESCE(c.project_id, 0)) AS keep_id FROM conversation c'
+    )).all()
+    merged = set()
+    for conversation_id, keep_id in rows:
+        if conversation_id == keep_id:
+            continue
+        conn.execute(text('UPDATE chat_message SET conversation_id = :keep WHERE conversation_id = :id'),
+                     {'keep': keep_id, 'id': conversation_id})
+        conn.execute(text('DELETE FROM conversation WHERE id = :id'), {'id': conversation_id})
+        merged.add(keep_id)
+    for keep_id in merged:
+        # Birleşen turlar özete yeniden katlanır
+        conn.execute(text('UPDATE conversation SET summary = NULL, summarized_through_id = NULL WHERE id = :id'),
+                     {'id': keep_id})
+    if merged:
+        logger.info(f"{len(rows) - len({keep for _, keep in rows})} yinelenen konuşma birleştirildi")
+    create_missing_indexes(conn, Conversation, names={'uq_conversation_user_project'})
+
+def _as_datetime(value):
+    """SQLite ham sorgularda DATETIME'ı metin olarak döndürür"""
+    if value is None or isinstance(value, datetime):
+        return value
+    try:
+        return datetime.fromisoformat(str(value))
+    except ValueError:
+        return None
@@ -4,7 +4,6 @@ User, Project, Competition tablolarını tanımlar
 """
 from flask_login import UserMixin
 from datetime import datetime
-from werkzeug.security import generate_password_hash, check_password_hash
 from flask_sqlalchemy import SQLAlchemy
 
 # db instance'ı burada tanımlanacak
@@ -26,13 +25,26 @@ class User(UserMixin, db.Model):
     owned_projects = db.relationship('Project', foreign_keys='Project.owner_id', backref='owner', lazy=True)
     advised_projects = db.relationship('Project', foreign_keys='Project.advisor_id', backref='advisor', lazy=True)
     
+    __table_args__ = (
+        # Admin paneli: son kayıtlar ve role göre filtre / sayım
+        db.Index('ix_user_created_at', 'created_at', 'id'),
+        db.Index('ix_user_role_created', 'role', 'created_at'),
+    )
+    
     def set_password(self, password):
-        """Şifreyi hash'leyerek kaydet"""
-        self.password_hash = generate_password_hash(password)
+        """Şifreyi hash'leyerek kaydet (sınırlı havuzda; dolu ise PasswordHashBusy)"""
+        from password_hashing import password_hasher
+        self.password_hash = password_hasher.hash(password)
     
     def check_password(self, password):
-        """Şifreyi kontrol et"""
-        return check_password_hash(self.password_hash, password)
+        """Şifreyi kontrol et (sınırlı havuzda; dolu ise PasswordHashBusy)"""
+        from password_hashing import password_hasher
+        return password_hasher.verify(self.password_hash, password)
+    
+    def password_needs_rehash(self):
+        """Saklanan hash PASSWORD_HASH_METHOD ile üretilmemiş mi"""
+        from password_hashing import password_hasher
+        return password_hasher.needs_rehash(self.password_hash)
     
     def get_full_name(self):
         """Tam adı döndür"""
@@ -79,6 +91,11 @@ class Competition(db.Model):
     # İlişkiler
     projects = db.relationship('Project', backref='competition', lazy=True)
     
+    __table_args__ = (
+        # Dashboard ve API: aktif yarışmalar
+        db.Index('ix_competition_is_active', 'is_active'),
+    )
+    
     def __repr__(self):
         return f'<Competition {self.name}>'
 
@@ -108,15 +125,27 @@ class Project(db.Model):
     # Proje ekibi (many-to-many için ayrı tablo gerekebilir)
     team_members = db.Column(db.Text)  # JSON formatında ekip üyeleri
     
+    __table_args__ = (
+        # Öğrenci/danışman proje listeleri ve son güncellenenler
+        db.Index('ix_project_owner_updated', 'owner_id', 'updated_at'),
+        db.Index('ix_project_advisor_updated', 'advisor_id', 'updated_at'),
+        # Proje detayı: aynı kategorideki diğer projeler
+        db.Index('ix_project_category', 'category', 'id'),
+        # Admin paneli: son güncellenenler, duruma göre filtre / sayım
+        db.Index('ix_project_updated', 'updated_at', 'id'),
+        db.Index('ix_project_status_updated', 'status', 'updated_at'),
+    )
+    
+    STATUS_DISPLAY = {
+        'planning': 'Planlama',
+        'development': 'Geliştirme',
+        'testing': 'Test',
+        'completed': 'Tamamlandı'
+    }
+    
     def get_status_display(self):
         """Durum görüntü adı"""
-        status_map = {
-            'planning': 'Planlama',
-            'development': 'Geliştirme',
-            'testing': 'Test',
-            'completed': 'Tamamlandı'
-        }
-        return status_map.get(self.status, self.status)
+        return self.STATUS_DISPLAY.get(self.status, self.status)
     
     def get_progress_percentage(self):
         """İlerleme yüzdesi (basit hesaplama)"""
@@ -128,21 +157,100 @@ class Project(db.Model):
         }
         return status_progress.get(self.status, 0)
     
+    def is_accessible_by(self, user):
+        """Projeye sahibi, danışmanı ve admin erişebilir"""
+        return user.is_admin() or self.owner_id == user.id or self.advisor_id == user.id
+    
     def __repr__(self):
         return f'<Project {self.title}>'
 
+class Conversation(db.Model):
+    """AI sohbeti - kullanıcı ve proje (veya genel sohbet) başına bir konuşma"""
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    project_id = db.Column(db.Integer, db.ForeignKey('project.id'))
+    # Eski turların birikimli özeti ve özete giren son tur (bkz. conversation_memory.py)
+    summary = db.Column(db.Text)
+    summarized_through_id = db.Column(db.Integer)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (
+        db.Index('ix_conversation_user_project', 'user_id', 'project_id'),
+    )
+    
+    def __repr__(self):
+        return f'<Conversation {self.id}>'
+
+# Kullanıcı ve proje (veya genel sohbet) başına tek konuşma; SQLite'ta NULL'lar
+# benzersiz indekste birbirinden farklı sayıldığı için genel sohbet 0 ile eşlenir
+db.Index('uq_conversation_user_project', Conversation.user_id,
+         db.func.coalesce(Conversation.project_id, 0), unique=True)
+
 class ChatMessage(db.Model):
-    """Chat mesajları için model"""
+    """
+    Chat mesajları için model
+    AI sohbetinde her satır bir turdur: soru `message`, yanıt aynı satırın
+    `response` alanına yazılır (soru iki kez saklanmaz).
+    """
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     project_id = db.Column(db.Integer, db.ForeignKey('project.id'))
+    conversation_id = db.Column(db.Integer, db.ForeignKey('conversation.id'))  # Yalnızca AI turları
+    role = db.Column(db.String(20))  # Mesajı yazanın o andaki rolü (student, advisor, admin)
     message = db.Column(db.Text, nullable=False)
     response = db.Column(db.Text)
+    response_latency_ms = db.Column(db.Integer)  # Yanıt üretim süresi (hata durumunda da yazılır)
+    responded_at = db.Column(db.DateTime)
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
     
     # İlişkiler
     user = db.relationship('User', backref='chat_messages')
     project = db.relationship('Project', backref='chat_messages')
+    conversation = db.relationship('Conversation', backref='turns')
+    
+    def is_ai_turn(self):
+        return self.conversation_id is not None
+    
+    def is_awaiting_response(self):
+        """AI turu henüz yanıtlanmadı mı"""
+        return self.is_ai_turn() and self.response is None and self.response_latency_ms is None
+    
+    __table_args__ = (
+        # Chat geçmişi: proje filtresi + (timestamp, id) keyset sayfalama
+        db.Index('ix_chat_message_project_timestamp', 'project_id', 'timestamp'),
+        db.Index('ix_chat_message_timestamp', 'timestamp'),
+        # Profil istatistikleri ve aktivite: kullanıcının mesajları
+        db.Index('ix_chat_message_user_timestamp', 'user_id', 'timestamp'),
+        # Konuşmanın turları
+        db.Index('ix_chat_message_conversation', 'conversation_id', 'id'),
+    )
+    
+    def __repr__(self):
+        return f'<ChatMessage {self.id}>'
+
+class Activity(db.Model):
+    """
+    Aktivite kaydı - yalnızca eklenir, güncellenmez
+    Proje ve chat yazmalarında ORM olaylarıyla doldurulur (bkz. activity.py);
+    akışlar (user_id, created_at) veya created_at indeksinden tek aralık taramasıyla okunur.
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)  # Akışında görüneceği kullanıcı
+    actor_id = db.Column(db.Integer)  # İşlemi yapan (danışman akışında öğrenci olabilir)
+    kind = db.Column(db.String(30), nullable=False)  # project_created, project_updated, project_deleted, advised_updated, chat
+    # Proje silinse de kayıt kalır; bu yüzden yabancı anahtar değil
+    project_id = db.Column(db.Integer)
+    subject = db.Column(db.String(200))  # Olay anındaki proje başlığı
+    detail = db.Column(db.String(255))  # Proje durumu veya mesajın başı
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    
+    __table_args__ = (
+        # Kullanıcı akışı
+        db.Index('ix_activity_user_created', 'user_id', 'created_at', 'id'),
+        # Admin akışı ve saklama süresi temizliği
+        db.Index('ix_activity_created', 'created_at', 'id'),
+    )
     
     def __repr__(self):
-        return f'<ChatMessage {self.id}>'
\ No newline at end of file
+        return f'<Activity {self.kind} {self.user_id}>'
@@ -0,0 +1,148 @@
+"""
+Şifre Hash'leme
+Şifre hash'leme ve doğrulamayı istek thread'inden alıp sınırlı bir havuzda çalıştırır
+
+PBKDF2 / scrypt bilerek pahalıdır (varsayılan pbkdf2:sha256:600000 ≈ 0.3s CPU).
+Dönem başında yüzlerce eşzamanlı giriş tüm worker'ları doldurur; eventlet
+worker'ında ise hash süresince olay döngüsü (tüm Socket.IO bağlantıları) durur.
+Bu modülde:
+
+- Aynı anda en fazla PASSWORD_HASH_WORKERS hash çalışır (gerçek OS thread'leri;
+  hashlib hesaplama sırasında GIL'i bırakır). Eventlet ile yamalanmış süreçte
+  iş `eventlet.tpool` üzerinden çalışır, olay döngüsü beklemez.
+- Çalışan + bekleyen iş sayısı PASSWORD_HASH_WORKERS + PASSWORD_HASH_QUEUE'yu
+  aşarsa yeni istek beklemeden PasswordHashBusy ile reddedilir (route'lar 503 döner).
+- Bekleyen iş PASSWORD_HASH_TIMEOUT saniyede tamamlanmazsa da reddedilir;
+  çalışmaya başlamış hash'in yuvası hash bitene kadar dolu kalır.
+
+PASSWORD_HASH_WORKERS=0 hash'i çağıran thread'de (havuzsuz) çalıştırır.
+Saklanan hash'in yöntemi PASSWORD_HASH_METHOD'dan farklıysa girişte yeniden
+hash'lenir (needs_rehash).
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+from cache import ProcessLocal
+
+PASSWORD_HASH_METHOD = os.getenv("PASSWORD_HASH_METHOD", "pbkdf2:sha256:600000")
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 1)))
+PASSWORD_HASH_QUEUE = int(os.getenv("PASSWORD_HASH_QUEUE", "32"))
+PASSWORD_HASH_TIMEOUT = float(os.getenv("PASSWORD_HASH_TIMEOUT", "10"))
+# 503 yanıtlarındaki Retry-After (saniye)
+RETRY_AFTER = 2
+
+
+class PasswordHashBusy(Exception):
+    """Hash havuzu dolu veya iş zamanında bitmedi; istemci daha sonra tekrar denemeli"""
+
+
+def _eventlet_patched():
+    try:
+        from eventlet import patcher
+    except ImportError:
+        return False
+    return patcher.is_monkey_patched('thread')
+
+
+def _release_after(slots, func, *args):
+    """Havuz thread'inde func'ı çalıştır; kabul yuvasını iş bitince bırak"""
+    try:
+        return func(*args)
+    finally:
+        slots.release()
+
+
+class PasswordHasher:
+    def __init__(self, method: str = PASSWORD_HASH_METHOD, workers: int = PASSWORD_HASH_WORKERS,
+                 max_queue: int = PASSWORD_HASH_QUEUE, timeout: float = PASSWORD_HASH_TIMEOUT):
+        self.method = method
+        self.workers = workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._executor = ProcessLocal(
+            lambda: ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="password-hash"))
+        self._lock = threading.Lock()
+        # Çalışan + bekleyen işler için kabul sınırı
+        self._slots = threading.BoundedSemaphore(max(1, workers + max_queue))
+        self.rejected = 0
+
+    def configure(self, method: str = None, workers: int = None, max_queue: int = None, timeout: float = None):
+        """Ayarları değiştir (ör. benchmark); havuz bir sonraki işte yeniden oluşturulur"""
+        with self._lock:
+            if method is not None:
+                self.method = method
+            if workers is not None:
+                self.workers = workers
+            if max_queue is not None:
+                self.max_queue = max_queue
+            if timeout is not None:
+                self.timeout = timeout
+            self._slots = threading.BoundedSemaphore(max(1, self.workers + self.max_queue))
+            executor = self._executor.reset()
+            if executor is not None:
+                executor.shutdown(wait=False)
+
+    def _get_executor(self):
+        return self._executor.get()
+
+    def _run(self, func, *args):
+        if self.workers <= 0:
+            return func(*args)
+        slots = self._slots
+        if not slots.acquire(blocking=False):
+            self.rejected += 1
+            raise PasswordHashBusy("Şifre doğrulama kuyruğu dolu")
+        if _eventlet_patched():
+            # Yeşil thread'ler yerine gerçek OS thread'i; tpool kendi havuz boyutunu kullanır
+            from eventlet import tpool
+            try:
+                return tpool.execute(func, *args)
+            finally:
+                slots.release()
+        try:
+            future = self._get_executor().submit(_release_after, slots, func, *args)
+        except BaseException:
+            slots.release()
+            raise
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            # Henüz başlamadıysa kuyruktan çıkar ve yuvayı bırak; başladıysa yuva iş
+            # bitince bırakılır (zaman aşımları havuzda sınırsız hash biriktirmez)
+            if future.cancel():
+                slots.release()
+            self.rejected += 1
+            raise PasswordHashBusy("Şifre doğrulama zaman aşımına uğradı")
+
+    def hash(self, password: str) -> str:
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, pwhash: str, password: str) -> bool:
+        if not pwhash or password is None:
+            return False
+        return self._run(check_password_hash, pwhash, password)
+
+    def needs_rehash(self, pwhash: str) -> bool:
+        """Saklanan hash'in yöntemi/parametreleri hedef yöntemden farklı mı"""
+        return not pwhash or normalize_method(pwhash.split("$", 1)[0]) != normalize_method(self.method)
+
+
+def normalize_method(method: str) -> str:
+    """Yöntem adını werkzeug varsayılanlarıyla tamamla (ör. pbkdf2 -> pbkdf2:sha256:600000)"""
+    from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS
+
+    name, *params = method.split(":")
+    if name == "pbkdf2":
+        hash_name = params[0] if params else "sha256"
+        iterations = params[1] if len(params) > 1 else DEFAULT_PBKDF2_ITERATIONS
+        return f"pbkdf2:{hash_name}:{iterations}"
+    if name == "scrypt":
+        n, r, p = (params + [None] * 3)[:3]
+        return f"scrypt:{n or 2 ** 15}:{r or 8}:{p or 1}"
+    return method
+
+
+password_hasher = PasswordHasher()
@@ -0,0 +1,178 @@
+"""
+Oda Varlığı (Presence)
+Socket.IO odalarında çevrimiçi üyeler ve "yazıyor" durumu
+
+Eskiden her `typing` olayı (tuş vuruşu başına) ve her katılma/ayrılma odadaki
+herkese ayrı bir mesaj olarak gönderiliyordu. Bu modülde:
+
+- Oda üyeleri ve yazma durumu süreç içinde tutulur (aynı kullanıcının birden
+  fazla sekmesi tek üye sayılır).
+- Yazma durumu kullanıcı başına tutulur; tekrar eden `typing` olayları yalnızca
+  süreyi uzatır. PRESENCE_TYPING_TTL saniye yenilenmeyen durum kendiliğinden düşer.
+- Değişiklikler her PRESENCE_FLUSH_INTERVAL saniyede bir, oda başına tek
+  `presence` olayında net fark olarak gönderilir. Aralık içinde katılıp ayrılan
+  veya yazmaya başlayıp duran kullanıcı hiç yayınlanmaz.
+
+Fark biçimi (boş alanlar gönderilmez):
+    {'room': ..., 'joined': [{'id', 'username', 'full_name', 'role'}], 'left': [id],
+     'typing': [id], 'stopped': [id]}
+Odaya yeni katılan istemciye ayrıca tam liste (`'full': True`, `members`,
+`typing`) gönderilir.
+
+Durum süreç içidir: çoklu worker'da her süreç yalnızca kendi bağlantılarını bilir.
+"""
+import os
+import time
+import threading
+
+from cache import ProcessLocal
+
+PRESENCE_FLUSH_INTERVAL = float(os.getenv("PRESENCE_FLUSH_INTERVAL", "0.5"))
+PRESENCE_TYPING_TTL = float(os.getenv("PRESENCE_TYPING_TTL", "5"))
+
+
+class RoomPresence:
+    """Tek odanın anlık ve en son yayınlanmış durumu"""
+
+    __slots__ = ("members", "typing", "announced_members", "announced_typing")
+
+    def __init__(self):
+        self.members = {}          # user_id -> {'info': {...}, 'sids': set()}
+        self.typing = {}           # user_id -> bitiş zamanı (monotonic)
+        self.announced_members = {}  # user_id -> info (istemcilerin bildiği)
+        self.announced_typing = set()
+
+
+class PresenceTracker:
+    def __init__(self, flush_interval: float = PRESENCE_FLUSH_INTERVAL, typing_ttl: float = PRESENCE_TYPING_TTL):
+        self.flush_interval = flush_interval
+        self.typing_ttl = typing_ttl
+        self._rooms = {}
+        self._sid_rooms = {}       # sid -> {oda: user_id}
+        self._dirty = set()
+        self._lock = threading.Lock()
+        self._flusher = ProcessLocal(lambda socketio: socketio.start_background_task(self._flush_loop, socketio))
+
+    @staticmethod
+    def _info(user):
+        return {'id': user.id, 'username': user.username, 'full_name': user.get_full_name(), 'role': user.role}
+
+    def join(self, room, sid, user):
+        """Bağlantıyı odaya ekle; katılan istemci için tam durum döndür"""
+        with self._lock:
+            state = self._rooms.get(room)
+            if state is None:
+                state = self._rooms[room] = RoomPresence()
+            member = state.members.get(user.id)
+            if member is None:
+                member = state.members[user.id] = {'info': self._info(user), 'sids': set()}
+            member['sids'].add(sid)
+            self._sid_rooms.setdefault(sid, {})[room] = user.id
+            self._dirty.add(room)
+            return {
+                'room': room,
+                'full': True,
+                'members': [m['info'] for m in state.members.values()],
+                'typing': list(state.typing)
+            }
+
+    def _remove(self, room, sid, user_id):
+        state = self._rooms.get(room)
+        member = state.members.get(user_id) if state else None
+        if member is None:
+            return
+        member['sids'].discard(sid)
+        if not member['sids']:
+            del state.members[user_id]
+            state.typing.pop(user_id, None)
+        self._dirty.add(room)
+
+    def leave(self, room, sid):
+        with self._lock:
+            rooms = self._sid_rooms.get(sid, {})
+            user_id = rooms.pop(room, None)
+            if not rooms:
+                self._sid_rooms.pop(sid, None)
+            if user_id is not None:
+                self._remove(room, sid, user_id)
+
+    def disconnect(self, sid):
+        """Bağlantının bulunduğu tüm odalardan çıkar"""
+        with self._lock:
+            for room, user_id in self._sid_rooms.pop(sid, {}).items():
+                self._remove(room, sid, user_id)
+
+    def typing(self, room, sid, is_typing):
+        """Yazma durumunu güncelle; yalnızca odadaki bağlantılar için"""
+        with self._lock:
+            user_id = self._sid_rooms.get(sid, {}).get(room)
+            if user_id is None:
+                return
+            state = self._rooms[room]
+            if is_typing:
+                state.typing[user_id] = time.monotonic() + self.typing_ttl
+            elif state.typing.pop(user_id, None) is None:
+                return
+            self._dirty.add(room)
+
+    def rooms(self, sid):
+        """Bağlantının katıldığı odalar"""
+        with self._lock:
+            return list(self._sid_rooms.get(sid, {}))
+
+    def members(self, room):
+        with self._lock:
+            state = self._rooms.get(room)
+            return [m['info'] for m in state.members.values()] if state else []
+
+    def flush(self, now=None):
+        """
+        Son yayından bu yana değişen odaların net farkları
+        Dönüş: [(oda, fark), ...]
+        """
+        now = time.monotonic() if now is None else now
+        diffs = []
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+            for room in dirty:
+                state = self._rooms.get(room)
+                if state is None:
+                    continue
+                for user_id, expires in list(state.typing.items()):
+                    if expires <= now:
+                        del state.typing[user_id]
+                if state.typing:
+                    # Süresi dolacak yazma durumları için oda sonraki turda da bakılır
+                    self._dirty.add(room)
+
+                diff = {'room': room}
+                joined = [m['info'] for uid, m in state.members.items() if uid not in state.announced_members]
+                left = [uid for uid in state.announced_members if uid not in state.members]
+                typing = [uid for uid in state.typing if uid not in state.announced_typing]
+                stopped = [uid for uid in state.announced_typing if uid not in state.typing]
+                for key, value in (('joined', joined), ('left', left), ('typing', typing), ('stopped', stopped)):
+                    if value:
+                        diff[key] = value
+                state.announced_members = {uid: m['info'] for uid, m in state.members.items()}
+                state.announced_typing = set(state.typing)
+                if not state.members:
+                    del self._rooms[room]
+                if len(diff) > 1:
+                    diffs.append((room, diff))
+        return diffs
+
+    def start(self, socketio):
+        """Farkları periyodik olarak yayınlayan arka plan görevini başlat (süreç başına bir kez)"""
+        self._flusher.get(socketio)
+
+    def _flush_loop(self, socketio):
+        while True:
+            socketio.sleep(self.flush_interval)
+            try:
+                for room, diff in self.flush():
+                    socketio.emit('presence', diff, room=room)
+            except Exception as e:
+                print(f'Presence yayın hatası: {str(e)}')
+
+
+presence = PresenceTracker()
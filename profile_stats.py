@@ -0,0 +1,104 @@
+"""
+Profil İstatistikleri ve Aktivite Akışı
+Rol başına tek toplam sorgusu; aktivite akışı `Activity` tablosundan okunur
+
+Sonuçlar kullanıcı başına önbelleğe alınır; kullanıcının projelerine veya
+chat mesajlarına yazıldığında ilgili kayıtlar silinir (bkz. register_cache_events).
+"""
+import os
+
+from cache import TTLCache
+
+PROFILE_CACHE_TTL = int(os.getenv("PROFILE_CACHE_TTL", "60"))
+ACTIVITY_LIMIT = 10
+
+# Anahtarlar: ('stats', user_id, rol) ve ('activity', user_id, limit)
+profile_cache = TTLCache(ttl=PROFILE_CACHE_TTL, maxsize=4096)
+
+# "Devam eden" projeler
+IN_PROGRESS_STATUSES = ('development', 'testing')
+
+
+def invalidate_user(*user_ids):
+    """Kullanıcıların önbellekteki profil verilerini sil"""
+    user_ids = {user_id for user_id in user_ids if user_id is not None}
+    if user_ids:
+        profile_cache.delete_where(lambda key: key[1] in user_ids)
+
+
+def _student_stats(user_id):
+    from sqlalchemy import case, func, select
+    from models import db, Project, ChatMessage
+
+    row = db.session.execute(
+        select(
+            func.count(Project.id).label('total_projects'),
+            func.coalesce(func.sum(case((Project.status == 'completed', 1), else_=0)), 0).label('completed_projects'),
+            func.coalesce(func.sum(case((Project.status.in_(IN_PROGRESS_STATUSES), 1), else_=0)), 0).label('in_progress_projects'),
+            select(func.count(ChatMessage.id)).where(ChatMessage.user_id == user_id)
+            .scalar_subquery().label('chat_messages'),
+        ).where(Project.owner_id == user_id)
+    ).mappings().one()
+    return dict(row)
+
+
+def _advisor_stats(user_id):
+    from sqlalchemy import case, func, select
+    from models import db, Project, ChatMessage
+
+    advised = Project.advisor_id == user_id
+    advised_project_ids = select(Project.id).where(advised)
+    row = db.session.execute(
+        select(
+            func.coalesce(func.sum(case((advised, 1), else_=0)), 0).label('advised_projects'),
+            func.coalesce(func.sum(case((Project.owner_id == user_id, 1), else_=0)), 0).label('own_projects'),
+            func.count(func.distinct(case((advised, Project.owner_id)))).label('students'),
+            # Ayrı bir geri bildirim tablosu yok: danışmanın danışmanlık yaptığı projelerdeki mesajları
+            select(func.count(ChatMessage.id)).where(
+                ChatMessage.user_id == user_id, ChatMessage.project_id.in_(advised_project_ids)
+            ).scalar_subquery().label('feedbacks'),
+        ).where(advised | (Project.owner_id == user_id))
+    ).mappings().one()
+    return dict(row)
+
+
+def profile_stats(user):
+    """Profil sayfası sayaçları (önbellekli)"""
+    if user.is_student():
+        compute = _student_stats
+    elif user.is_advisor():
+        compute = _advisor_stats
+    else:
+        return {}
+    return profile_cache.get_or_set(('stats', user.id, user.role), lambda: compute(user.id))
+
+
+def profile_activity(user, limit=ACTIVITY_LIMIT):
+    """Son aktiviteler, en yeniden eskiye (önbellekli; bkz. activity.py)"""
+    from activity import user_feed
+    return profile_cache.get_or_set(('activity', user.id, limit), lambda: user_feed(user.id, limit))
+
+
+_events_registered = False
+
+
+def register_cache_events():
+    """Proje ve chat yazmalarında ilgili kullanıcıların önbelleğini temizle (ORM olayları)"""
+    global _events_registered
+    if _events_registered:
+        return
+    from sqlalchemy import event, inspect
+    from models import Project, ChatMessage
+
+    def project_users(target):
+        user_ids = {target.owner_id, target.advisor_id}
+        state = inspect(target)
+        # Sahip veya danışman değiştiyse eski kullanıcılar da etkilenir
+        for attribute in ('owner_id', 'advisor_id'):
+            user_ids.update(state.attrs[attribute].history.deleted or ())
+        return user_ids
+
+    for name in ('after_insert', 'after_update', 'after_delete'):
+        event.listen(Project, name, lambda mapper, connection, target: invalidate_user(*project_users(target)))
+        event.listen(ChatMessage, name, lambda mapper, connection, target: invalidate_user(target.user_id))
+    _events_registered = True
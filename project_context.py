@@ -0,0 +1,211 @@
+"""
+Proje Bağlamı
+AI sohbetinde prompt'a eklenen proje bağlamı metni (önbellekli)
+
+Bağlam; proje bilgileri, teknolojiler, tarihler, danışman ve bağlı yarışmanın
+gereksinimleri ile son tarihlerinden tek sorguyla oluşturulur ve
+(proje id, updated_at) anahtarıyla saklanır. Projenin güncel `updated_at`
+değeri ayrıca PROJECT_CONTEXT_TTL saniye tutulur; bu sürede AI mesajı başına
+hiç sorgu çalışmaz. Süre dolunca tek satırlık birincil anahtar sorgusuyla
+doğrulanır; proje değişmediyse bağlam yeniden oluşturulmaz.
+
+Bu süreçteki proje, yarışma veya kullanıcı güncellemeleri (ORM olayları,
+ör. update_project / update_project_status) kaydı hemen siler. Diğer
+worker'lar proje değişikliklerini en geç PROJECT_CONTEXT_TTL, yarışma ve
+kullanıcı değişikliklerini en geç PROJECT_CONTEXT_MAX_AGE saniye sonra görür.
+"Kalan gün" gibi tarihe bağlı kısımlar her çağrıda hesaplanır.
+"""
+import os
+import json
+import time
+from datetime import date
+
+from cache import Invalidations, TTLCache
+
+PROJECT_CONTEXT_TTL = float(os.getenv("PROJECT_CONTEXT_TTL", "30"))
+PROJECT_CONTEXT_MAX_AGE = float(os.getenv("PROJECT_CONTEXT_MAX_AGE", "600"))
+PROJECT_CONTEXT_SIZE = int(os.getenv("PROJECT_CONTEXT_SIZE", "2000"))
+# Uzun serbest metinler prompt bütçesini doldurmasın
+FIELD_CHAR_LIMIT = 1000
+
+# proje id -> updated_at
+_versions = TTLCache(ttl=PROJECT_CONTEXT_TTL, maxsize=PROJECT_CONTEXT_SIZE)
+# (proje id, updated_at) -> bağlam parçaları
+_contexts = TTLCache(ttl=PROJECT_CONTEXT_MAX_AGE, maxsize=PROJECT_CONTEXT_SIZE)
+
+
+def _delete(project_ids):
+    for project_id in project_ids:
+        _versions.delete(project_id)
+    _contexts.delete_where(lambda key: key[0] in project_ids)
+
+
+_invalidations = Invalidations('project_context', _delete, ttl=max(PROJECT_CONTEXT_TTL, 1),
+                               maxsize=PROJECT_CONTEXT_SIZE)
+
+
+def invalidate_project(*project_ids):
+    _invalidations.invalidate(*project_ids)
+
+
+def clear():
+    _versions.clear()
+    _contexts.clear()
+    _invalidations.clear()
+
+
+def _clip(text, limit=FIELD_CHAR_LIMIT):
+    text = (text or '').strip()
+    return text if len(text) <= limit else text[:limit].rstrip() + '…'
+
+
+def _as_list(value):
+    """JSON liste / virgülle ayrılmış metin -> liste"""
+    if not value:
+        return []
+    if isinstance(value, str):
+        try:
+            parsed = json.loads(value)
+        except ValueError:
+            return [item.strip() for item in value.split(',') if item.strip()]
+        value = parsed
+    if isinstance(value, dict):
+        return [f"{key}: {item}" for key, item in value.items()]
+    if isinstance(value, list):
+        return [str(item).strip() for item in value if str(item).strip()]
+    return [str(value)]
+
+
+def _build(project):
+    """Projeden tarihe bağlı olmayan bağlam parçaları"""
+    lines = [f"Proje: {project.title}"]
+    if project.description:
+        lines.append(f"Açıklama: {_clip(project.description)}")
+    lines.append(f"Durum: {project.get_status_display()} (%{project.get_progress_percentage()})")
+    if project.category:
+        lines.append(f"Kategori: {project.category}")
+    technologies = _as_list(project.technologies)
+    if technologies:
+        lines.append(f"Teknolojiler: {', '.join(technologies)}")
+    if project.advisor:
+        lines.append(f"Danışman: {project.advisor.get_full_name()}")
+
+    competition_lines = []
+    competition = project.competition
+    if competition:
+        competition_lines.append(f"Yarışma: {competition.name}")
+        if competition.description:
+            competition_lines.append(f"Yarışma açıklaması: {_clip(competition.description, 400)}")
+        requirements = _as_list(competition.requirements)
+        if requirements:
+            competition_lines.append("Yarışma gereksinimleri:")
+            competition_lines.extend(f"- {_clip(item, 200)}" for item in requirements[:20])
+
+    return {
+        'lines': lines,
+        'competition_lines': competition_lines,
+        'start_date': project.start_date,
+        'deadline': project.deadline,
+        'registration_deadline': competition.registration_deadline if competition else None,
+        'submission_deadline': (competition.submission_deadline or competition.end_date) if competition else None,
+        'competition_id': project.competition_id,
+        'user_ids': {project.owner_id, project.advisor_id},
+    }
+
+
+def _deadline_text(label, value, today):
+    if not value:
+        return None
+    days = (value - today).days
+    remaining = f"{days} gün kaldı" if days >= 0 else f"{-days} gün geçti"
+    return f"{label}: {value.strftime('%d.%m.%Y')} ({remaining})"
+
+
+def render(parts, today=None):
+    """Parçaları bugünün tarihiyle metne çevir"""
+    today = today or date.today()
+    lines = list(parts['lines'])
+    if parts['start_date']:
+        lines.append(f"Başlangıç: {parts['start_date'].strftime('%d.%m.%Y')}")
+    lines.append(_deadline_text("Proje teslim tarihi", parts['deadline'], today))
+    lines.extend(parts['competition_lines'])
+    lines.append(_deadline_text("Yarışma son başvuru", parts['registration_deadline'], today))
+    lines.append(_deadline_text("Yarışma teslim", parts['submission_deadline'], today))
+    return "\n".join(line for line in lines if line)
+
+
+def _current_version(project_id):
+    from sqlalchemy import select
+    from models import db, Project
+
+    version = _versions.get(project_id)
+    if version is not None:
+        return version
+    started = time.monotonic()
+    version = db.session.execute(select(Project.updated_at).where(Project.id == project_id)).scalar_one_or_none()
+    if version is not None and _invalidations.allows_write(project_id, started):
+        _versions.set(project_id, version)
+    return version
+
+
+def project_context(project_id):
+    """
+    AI prompt'u için proje bağlamı metni
+    Proje yoksa boş metin. Önbellekte ise sorgu çalışmaz.
+    """
+    from sqlalchemy.orm import joinedload
+    from models import db, Project
+
+    try:
+        project_id = int(project_id)
+    except (TypeError, ValueError):
+        return ""
+
+    version = _current_version(project_id)
+    if version is None:
+        return ""
+    key = (project_id, version)
+    parts = _contexts.get(key)
+    if parts is None:
+        started = time.monotonic()
+        project = db.session.get(Project, project_id, options=[
+            joinedload(Project.competition), joinedload(Project.advisor)
+        ])
+        if project is None:
+            return ""
+        parts = _build(project)
+        if project.updated_at == version and _invalidations.allows_write(project_id, started):
+            _contexts.set(key, parts)
+    return render(parts)
+
+
+_events_registered = False
+
+
+def register_context_events():
+    """Proje, yarışma veya kullanıcı güncellenince bağlamı temizle (flush'ta ve commit sonrasında)"""
+    global _events_registered
+    if _events_registered:
+        return
+    from sqlalchemy import event
+    from models import Project, Competition, User
+
+    def on_project(mapper, connection, target):
+        _invalidations.changed(target, {target.id})
+
+    def on_competition(mapper, connection, target):
+        keys = _contexts.keys_where(lambda key, parts: parts['competition_id'] == target.id)
+        _invalidations.changed(target, {key[0] for key in keys})
+
+    def on_user(mapper, connection, target):
+        # Danışman adı bağlamda yer alır
+        keys = _contexts.keys_where(lambda key, parts: target.id in parts['user_ids'])
+        _invalidations.changed(target, {key[0] for key in keys})
+
+    for name in ('after_update', 'after_delete'):
+        event.listen(Project, name, on_project)
+        event.listen(Competition, name, on_competition)
+        event.listen(User, name, on_user)
+
+    _invalidations.listen()
+    _events_registered = True
@@ -0,0 +1,144 @@
+"""
+Proje Listesi Sorguları
+`/api/projects` için imleçli sayfalama, alan seçimi (fields=) ve koşullu
+istekler (ETag / Last-Modified)
+
+Doğrulayıcılar, kullanıcının görebildiği projeler üzerinde tek satırlık bir
+toplamdan (en son updated_at ve proje sayısı) üretilir; eşleşen istekler
+satırlar yüklenmeden 304 ile yanıtlanır. Sayı, silinen projelerin de ETag'i
+değiştirmesini sağlar (silme updated_at'i ilerletmez). Last-Modified sayıyı
+taşıyamadığı için koşul yalnızca ETag ile (If-None-Match) değerlendirilir.
+
+updated_at boş olabilir (kolon nullable; ham INSERT'ler varsayılanı atlar).
+SQLite azalan sıralamada NULL'ları en sona koyar; imleç boş değeri de taşır ve
+dolu satırlar bitince boş olanlar id sırasıyla gelir.
+"""
+import json
+import base64
+import binascii
+import hashlib
+from datetime import datetime
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 500
+
+# Alan adı -> (yüklenecek kolonlar, değer fonksiyonu)
+FIELDS = {
+    'id': (('id',), lambda p: p.id),
+    'title': (('title',), lambda p: p.title),
+    'description': (('description',), lambda p: p.description),
+    'status': (('status',), lambda p: p.status),
+    'progress': (('status',), lambda p: p.get_progress_percentage()),
+    'category': (('category',), lambda p: p.category),
+    'owner_id': (('owner_id',), lambda p: p.owner_id),
+    'advisor_id': (('advisor_id',), lambda p: p.advisor_id),
+    'competition_id': (('competition_id',), lambda p: p.competition_id),
+    'updated_at': (('updated_at',), lambda p: p.updated_at.isoformat() if p.updated_at else None),
+}
+DEFAULT_FIELDS = ('id', 'title', 'description', 'status', 'progress')
+
+
+def parse_fields(value):
+    """fields=id,title -> ('id', 'title'); bilinmeyen alan ValueError"""
+    if not value:
+        return DEFAULT_FIELDS
+    fields = tuple(dict.fromkeys(name.strip() for name in value.split(',') if name.strip()))
+    unknown = [name for name in fields if name not in FIELDS]
+    if unknown or not fields:
+        raise ValueError(f"Bilinmeyen alan: {', '.join(unknown) or value}")
+    return fields
+
+
+def parse_limit(value):
+    try:
+        return max(1, min(int(value), MAX_LIMIT))
+    except (TypeError, ValueError):
+        return DEFAULT_LIMIT
+
+
+def encode_cursor(project):
+    updated_at = project.updated_at.isoformat() if project.updated_at else None
+    raw = json.dumps([updated_at, project.id])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(value):
+    """İmleç -> (updated_at veya None, id); geçersizse ValueError"""
+    try:
+        raw = base64.urlsafe_b64decode(value + '=' * (-len(value) % 4))
+        updated_at, project_id = json.loads(raw)
+        return (datetime.fromisoformat(updated_at) if updated_at is not None else None), int(project_id)
+    except (TypeError, ValueError, UnicodeDecodeError, binascii.Error) as e:
+        raise ValueError(f"Geçersiz imleç: {e}")
+
+
+def visible_projects_filter(user):
+    """Kullanıcının listede gördüğü projeler (öğrenci: kendi, danışman: danışmanı olduğu, admin: tümü)"""
+    from models import Project
+
+    if user.is_student():
+        return Project.owner_id == user.id
+    if user.is_advisor():
+        return Project.advisor_id == user.id
+    return None
+
+
+def list_validators(user):
+    """
+    (ETag, Last-Modified) - tek toplam sorgusu
+    Aynı görünür proje kümesi ve aynı içerik için aynı değer üretilir.
+    """
+    from sqlalchemy import func, select
+    from models import db, Project
+
+    query = select(func.max(Project.updated_at), func.count(Project.id))
+    condition = visible_projects_filter(user)
+    if condition is not None:
+        query = query.where(condition)
+    last_modified, count = db.session.execute(query).one()
+    if isinstance(last_modified, str):
+        last_modified = datetime.fromisoformat(last_modified)
+    return f"{last_modified.isoformat() if last_modified else '-'}:{count}", last_modified
+
+
+def make_etag(validator, user, query_args):
+    """Doğrulayıcı + kullanıcı + sorgu parametreleri (sayfa ve alanlar farklıysa ETag da farklı)"""
+    key = json.dumps([validator, user.id, user.role, sorted(query_args.items(multi=True))])
+    return hashlib.sha1(key.encode()).hexdigest()
+
+
+def project_page(user, fields=DEFAULT_FIELDS, limit=DEFAULT_LIMIT, cursor=None):
+    """
+    Görünür projelerin bir sayfası, en son güncellenenden eskiye
+    Dönüş: (öğe listesi, sonraki sayfanın imleci veya None)
+    """
+    from sqlalchemy import tuple_
+    from sqlalchemy.orm import load_only
+    from models import Project
+
+    columns = {'id', 'updated_at'}
+    for name in fields:
+        columns.update(FIELDS[name][0])
+    query = Project.query.options(load_only(*(getattr(Project, column) for column in sorted(columns))))
+
+    condition = visible_projects_filter(user)
+    if condition is not None:
+        query = query.filter(condition)
+    def fetch(*criteria, count=limit + 1):
+        return query.filter(*criteria).order_by(Project.updated_at.desc(), Project.id.desc()).limit(count).all()
+
+    if not cursor:
+        rows = fetch()
+    else:
+        updated_at, project_id = decode_cursor(cursor)
+        if updated_at is None:
+            rows = fetch(Project.updated_at.is_(None), Project.id < project_id)
+        else:
+            # Satır karşılaştırması indeks üzerinde aralık taramasına çevrilir; NULL'ları
+            # dışarıda bırakır, onlar dolu satırlar bittiğinde ayrıca eklenir
+            rows = fetch(tuple_(Project.updated_at, Project.id) < tuple_(updated_at, project_id))
+            if len(rows) <= limit:
+                rows += fetch(Project.updated_at.is_(None), count=limit + 1 - len(rows))
+    next_cursor = encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    items = [{name: FIELDS[name][1](project) for name in fields} for project in rows[:limit]]
+    return items, next_cursor
@@ -1,32 +1,112 @@
 """
 RAG (Retrieval-Augmented Generation) Sistemi
 PDF işleme, vektör veritabanı ve LLM entegrasyonu
+
+Ağır bağımlılıklar (PyMuPDF, unstructured, LLaMA Index, Chroma, Gemini)
+modül seviyesinde değil, ilk kullanıldıkları yerde import edilir. Böylece
+`import rag_system` ve RAG kullanmayan araçlar (update_db.py, fix_users.py)
+bu maliyeti ödemez.
 """
+from __future__ import annotations
+
 import os
 import logging
-from typing import List, Optional
+from typing import TYPE_CHECKING, List, Optional
 from pathlib import Path
 
-# PDF işleme için
-import fitz  # PyMuPDF
-from unstructured.partition.pdf import partition_pdf
-
-# LLaMA Index için
-from llama_index.core import Document, VectorStoreIndex, Settings
-from llama_index.embeddings.huggingface import HuggingFaceEmbedding
-from llama_index.vector_stores.chroma import ChromaVectorStore
+# Chroma erişimi tek yazıcılı broker üzerinden (chromadb'yi kendisi tembel yükler)
+from vector_store import get_vector_store
+from retrieval import estimate_tokens, extractive_answer, mmr_select, pack_contexts
 
-# Chroma için
-import chromadb
-from chromadb.config import Settings as ChromaSettings
-
-# Gemini API için
-import google.generativeai as genai
+if TYPE_CHECKING:
+    from llama_index.core import Document
 
 # Logging ayarları
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Prompt'a girecek döküman bağlamı için token bütçesi ve aday chunk sayısı
+CONTEXT_TOKEN_BUDGET = int(os.getenv('RAG_CONTEXT_TOKEN_BUDGET', '1500'))
+CONTEXT_CANDIDATES = int(os.getenv('RAG_CONTEXT_CANDIDATES', '8'))
+
+# Çeşitlilik odaklı seçim (MMR): top_k * çarpan aday içinden seçilir
+MMR_ENABLED = os.getenv('RAG_MMR', 'True').lower() in ('1', 'true', 'yes')
+MMR_LAMBDA = float(os.getenv('RAG_MMR_LAMBDA', '0.5'))
+MMR_FETCH_MULTIPLIER = int(os.getenv('RAG_MMR_FETCH_MULTIPLIER', '4'))
+
+# Yanıt ve özet modeli: gemini (varsayılan) veya stub (yerel, deterministik; bkz. stub_model.py)
+LLM_BACKEND = os.getenv('RAG_LLM_BACKEND', 'gemini').lower()
+
+CHAT_ROLE_PROMPTS = {
+    "student": "Sen bir öğrenci proje geliştirme asistanısın. Öğrencilere proje geliştirme sürecinde rehberlik et.",
+    "advisor": "Sen bir danışman asistanısın. Danışmanlara öğrenci projelerini değerlendirme ve yönlendirme konusunda yardım et.",
+    "admin": "Sen bir sistem yöneticisi asistanısın. Genel proje istatistikleri ve sistem yönetimi konularında destek sağla."
+}
+
+def build_chat_prompt(question: str, user_role: str = "student", project_context: str = "",
+                      history: str = "", context_text: str = "") -> str:
+    """AI sohbeti prompt'u: rol, proje bağlamı, konuşma geçmişi, soru ve döküman bilgileri"""
+    system_prompt = CHAT_ROLE_PROMPTS.get(user_role, CHAT_ROLE_PROMPTS["student"])
+    history_section = f"\nKonuşma Geçmişi:\n{history}\n" if history else ""
+    relevant_context = f"\n\nİlgili döküman bilgileri:\n{context_text}" if context_text else ""
+    return f"""
+{system_prompt}
+
+Proje Bağlamı: {project_context}
+{history_section}
+Kullanıcı Sorusu: {question}
+{relevant_context}
+
+Lütfen yardımcı ve bilgilendirici bir yanıt ver. Türkçe yanıt ver.
+"""
+
+FALLBACK_NOTICES = {
+    "open": "AI modeli şu anda yanıt veremiyor",
+    "timeout": "AI modeli zamanında yanıt vermedi",
+    "error": "AI modeli hata verdi",
+    "unconfigured": "AI modeli yapılandırılmamış",
+}
+
+def extractive_fallback(question: str, chunks: List[dict], reason: str) -> str:
+    """Modelsiz, açıkça etiketlenmiş yanıt: dökümanlardan soruyla en ilgili cümleler"""
+    notice = FALLBACK_NOTICES.get(reason, FALLBACK_NOTICES["error"])
+    sentences = extractive_answer(question, chunks)
+    if not sentences:
+        return f"{notice}. Dökümanlarda sorunuzla ilgili bir bölüm bulunamadı; lütfen daha sonra tekrar deneyin."
+    lines = [
+        f"[Hızlı yanıt] {notice}. Aşağıdaki cümleler yüklenen dökümanlardan otomatik olarak "
+        "seçilmiştir; AI tarafından yazılmış bir yanıt değildir.",
+        ""
+    ]
+    for sentence in sentences:
+        metadata = sentence["metadata"]
+        source = metadata.get("filename") or ""
+        if metadata.get("page_range"):
+            source = f"{source}, s. {metadata['page_range']}" if source else f"s. {metadata['page_range']}"
+        lines.append(f"- {sentence['text']}" + (f" ({source})" if source else ""))
+    return "\n".join(lines)
+
+def answer_with_fallback(model, prompt: str, question: str, chunks: List[dict]) -> str:
+    """
+    Modelin yanıtı; model yoksa, devre açıksa, süre aşıldıysa veya hata verdiyse
+    çıkarımsal yanıt (bkz. llm_guard.py)
+    """
+    from llm_guard import llm_breaker, LLMUnavailable
+    
+    if model is None:
+        reason = "unconfigured"
+    else:
+        try:
+            response = llm_breaker.generate(model, prompt)
+            if response.text:
+                return response.text
+            return "Yanıt oluşturulamadı. Lütfen sorunuzu tekrar ifade edin."
+        except LLMUnavailable as e:
+            logger.warning(f"Çıkarımsal yanıta düşüldü ({e.reason}): {e}")
+            reason = e.reason
+    llm_breaker.note_fallback()
+    return extractive_fallback(question, chunks, reason)
+
 class RAGSystem:
     """RAG sistemi ana sınıfı"""
     
@@ -36,25 +116,32 @@ class RAGSystem:
         self.data_dir.mkdir(exist_ok=True)
         self.chroma_db_dir.mkdir(parents=True, exist_ok=True)
         
-        # Embedding model ayarları
-        Settings.embed_model = HuggingFaceEmbedding(
-            model_name="sentence-transformers/all-MiniLM-L6-v2"
-        )
+        from llama_index.core import VectorStoreIndex, StorageContext, Settings
+        from llama_index.vector_stores.chroma import ChromaVectorStore
         
-        # Chroma client'ı başlat
-        self.chroma_client = chromadb.PersistentClient(
-            path=str(self.chroma_db_dir),
-            settings=ChromaSettings(anonymized_telemetry=False)
-        )
+        # Embedding model ayarları (süreç başına bir kez yüklenir)
+        Settings.embed_model = get_embed_model()
+        
+        # Chroma'ya doğrudan değil, süreçler arası paylaşılan broker üzerinden eriş
+        self.store = get_vector_store(str(self.chroma_db_dir))
         
         # Koleksiyon oluştur/al
-        self.collection = self.chroma_client.get_or_create_collection(
+        self.collection = self.store.get_or_create_collection(
             name="project_documents"
         )
         
-        # Vector store ve index
+        # Vector store ve index (diğer süreçlerin eklediği dökümanlar da aranabilsin)
         self.vector_store = ChromaVectorStore(chroma_collection=self.collection)
-        self.index = None
+        self.storage_context = StorageContext.from_defaults(vector_store=self.vector_store)
+        self.index = VectorStoreIndex.from_vector_store(self.vector_store)
+        
+        # Yükleme sırasında hazırlanan döküman özetleri ve içindekiler (ayrı koleksiyon)
+        from document_digest import DIGEST_COLLECTION, DocumentDigests
+        self.digests = DocumentDigests(
+            self.store.get_or_create_collection(name=DIGEST_COLLECTION),
+            embed_texts=lambda texts: get_embed_model().get_text_embedding_batch(texts),
+            embed_query=lambda query: get_embed_model().get_query_embedding(query)
+        )
         
         # Gemini API ayarları
         self.setup_gemini()
@@ -62,15 +149,11 @@ class RAGSystem:
         logger.info("RAG sistemi başlatıldı")
     
     def setup_gemini(self):
-        """Gemini API ayarlarını yap"""
-        # Çevre değişkeninden API key'i al
-        api_key = os.getenv('GEMINI_API_KEY')
-        if api_key:
-            genai.configure(api_key=api_key)
-            self.gemini_model = genai.GenerativeModel('gemini-2.0-flash')
-            logger.info("Gemini API yapılandırıldı")
+        """Yanıt modelini ayarla (RAG_LLM_BACKEND: gemini veya yerel stub)"""
+        self.gemini_model = get_llm()
+        if self.gemini_model is not None:
+            logger.info(f"Yanıt modeli yapılandırıldı ({LLM_BACKEND})")
         else:
-            self.gemini_model = None
             logger.warning("GEMINI_API_KEY çevre değişkeni bulunamadı")
     
     def process_pdf_document(self, file_path: str, chunk_size: int = 1000) -> List[Document]:
@@ -78,6 +161,10 @@ class RAGSystem:
         PDF dökümanını işle ve LlamaIndex Document'larına dönüştür
         Büyük dosyalar için sayfa aralıkları ile çalışır
         """
+        import fitz  # PyMuPDF
+        from unstructured.partition.pdf import partition_pdf
+        from llama_index.core import Document
+        
         documents = []
         file_path = Path(file_path)
         
@@ -202,9 +289,10 @@ class RAGSystem:
         
         try:
             if self.index is None:
+                from llama_index.core import VectorStoreIndex
                 self.index = VectorStoreIndex.from_documents(
                     documents,
-                    vector_store=self.vector_store
+                    storage_context=self.storage_context
                 )
             else:
                 # Mevcut indekse döküman ekle
@@ -216,129 +304,176 @@ class RAGSystem:
         except Exception as e:
             logger.error(f"İndeksleme hatası: {e}")
     
-    def search_documents(self, query: str, top_k: int = 5) -> List[str]:
-        """Dökümanları ara ve ilgili parçaları döndür"""
-        if self.index is None:
-            logger.warning("İndeks bulunamadı")
-            return []
+    def search_chunks(self, query: str, top_k: int = 5, mmr: bool = False,
+                      fetch_k: int = None, lambda_mult: float = None) -> List[dict]:
+        """
+        Dökümanları ara ve chunk'ları skor ve metadata ile döndür
+        Sonuç: [{'text': ..., 'score': ..., 'metadata': {...}}], skora göre azalan
         
+        mmr=True ise fetch_k aday getirilir ve MMR ile birbirine çok benzeyen
+        (örtüşen komşu) chunk'lar yerine çeşitli top_k chunk seçilir.
+        """
         try:
-            query_engine = self.index.as_query_engine(similarity_top_k=top_k)
-            response = query_engine.query(query)
+            query_embedding = get_embed_model().get_query_embedding(query)
+            n_results = max(fetch_k or top_k * MMR_FETCH_MULTIPLIER, top_k) if mmr else top_k
+            include = ["documents", "metadatas", "distances"]
+            if mmr:
+                include.append("embeddings")
+            result = self.collection.query(
+                query_embeddings=[query_embedding],
+                n_results=n_results,
+                include=include
+            )
+            
+            chunks = []
+            documents = (result.get("documents") or [[]])[0]
+            metadatas = (result.get("metadatas") or [[]])[0]
+            distances = (result.get("distances") or [[]])[0]
+            embeddings = result.get("embeddings") if mmr else None
+            embeddings = embeddings[0] if embeddings is not None and len(embeddings) else [None] * len(documents)
+            for text, metadata, distance, embedding in zip(documents, metadatas, distances, embeddings):
+                if text:
+                    chunks.append({
+                        "text": text,
+                        # Mesafeyi sıralama için benzerlik skoruna çevir
+                        "score": 1.0 / (1.0 + float(distance)),
+                        "metadata": metadata or {},
+                        "embedding": embedding
+                    })
             
-            # Kaynak dökümanları al
-            contexts = []
-            if hasattr(response, 'source_nodes'):
-                for node in response.source_nodes:
-                    contexts.append(node.text)
+            if mmr and len(chunks) > top_k:
+                order = mmr_select(
+                    query_embedding,
+                    [chunk["embedding"] for chunk in chunks],
+                    top_k,
+                    MMR_LAMBDA if lambda_mult is None else lambda_mult
+                )
+                chunks = [chunks[i] for i in order]
             
-            return contexts
+            for chunk in chunks:
+                chunk.pop("embedding", None)
+            return chunks[:top_k]
             
         except Exception as e:
             logger.error(f"Arama hatası: {e}")
             return []
     
-    def generate_response(self, query: str, user_role: str = "student", project_context: str = "", top_k: int = 3) -> str:
+    def search_documents(self, query: str, top_k: int = 5, mmr: bool = False) -> List[str]:
+        """Dökümanları ara ve ilgili parçaları döndür"""
+        return [chunk["text"] for chunk in self.search_chunks(query, top_k, mmr=mmr)]
+    
+    def build_context(self, query: str, token_budget: int = None, candidates: int = None) -> str:
         """
-        Gemini API ile yanıt oluştur
-        RAG context'i ile birleştirilen prompt kullanır
+        Soru için prompt'a girecek döküman bağlamını oluştur
+        Aday chunk'lar tekilleştirilir, birleştirilir ve token bütçesine göre paketlenir
         """
-        if not self.gemini_model:
-            return "Gemini API yapılandırılmamış. Lütfen GEMINI_API_KEY çevre değişkenini ayarlayın."
+        return self.retrieve_context(query, token_budget, candidates)[0]
+    
+    def retrieve_context(self, query: str, token_budget: int = None, candidates: int = None):
+        """build_context ile aynı; paketlenen metnin yanında aday chunk'ları da döndürür"""
+        token_budget = token_budget or CONTEXT_TOKEN_BUDGET
+        candidates = candidates or CONTEXT_CANDIDATES
         
+        chunks = self.search_chunks(query, candidates, mmr=MMR_ENABLED)
+        context_text, stats = pack_contexts(chunks, token_budget)
+        logger.info(
+            f"Bağlam paketlendi: {stats['chunks_in']} chunk ({stats['tokens_in']} token) -> "
+            f"{stats['blocks']} blok ({stats['tokens']}/{token_budget} token)"
+        )
+        return context_text, chunks
+    
+    def _log_prompt_size(self, prompt: str, context_text: str, history: str = ""):
+        """İstek başına gönderilen token sayısını kaydet (prompt boyutu takibi için)"""
+        logger.info(
+            f"prompt_tokens={estimate_tokens(prompt)} context_tokens={estimate_tokens(context_text)} "
+            f"history_tokens={estimate_tokens(history)} prompt_chars={len(prompt)}"
+        )
+    
+    def generate_response(self, query: str, user_role: str = "student", project_context: str = "",
+                          top_k: int = None) -> str:
+        """
+        Tek soruya (konuşma geçmişi olmadan) yanıt oluştur
+        Prompt AI sohbetiyle aynıdır (build_chat_prompt); bağlama en fazla top_k
+        chunk girer (varsayılan CONTEXT_CANDIDATES). Model yoksa veya
+        erişilemezse bulunan chunk'lardan çıkarımsal yanıt (answer_with_fallback)
+        """
         try:
-            # İlgili dökümanları ara
-            contexts = self.search_documents(query, top_k)
-            
-            # Rol tabanlı prompt oluştur
-            role_prompts = {
-                "student": "Sen öğrencilere proje geliştirme konusunda yardımcı olan bir AI asistansın. Açıklayıcı, destekleyici ve öğretici bir dil kullan.",
-                "advisor": "Sen danışmanlara proje yönetimi ve öğrenci rehberliği konusunda yardımcı olan bir AI asistansın. Profesyonel ve analitik bir yaklaşım benimse.",
-                "admin": "Sen sistem yöneticilerine platform yönetimi konusunda yardımcı olan bir AI asistansın."
-            }
-            
-            role_prompt = role_prompts.get(user_role, role_prompts["student"])
-            
-            # Context'i birleştir
-            context_text = "\n\n".join(contexts) if contexts else "İlgili döküman bulunamadı."
-            
-            # Ana prompt'u oluştur
-            prompt = f"""
-{role_prompt}
-
-Proje Bağlamı: {project_context}
-
-İlgili Döküman İçeriği:
-{context_text}
-
-Kullanıcı Sorusu: {query}
-
-Lütfen yukarıdaki bağlam ve döküman içeriğini kullanarak kullanıcının sorusunu yanıtla. Eğer döküman içeriği soruyla ilgili değilse, genel bilgilerinle yardım et.
-"""
-            
-            # Gemini'den yanıt al
-            response = self.gemini_model.generate_content(prompt)
+            # İlgili dökümanları ara ve token bütçesine göre paketle
+            context_text, chunks = self.retrieve_context(query, candidates=top_k)
+            prompt = build_chat_prompt(query, user_role, project_context, context_text=context_text)
+            self._log_prompt_size(prompt, context_text)
             
-            if response.text:
-                return response.text
-            else:
-                return "Yanıt oluşturulamadı. Lütfen sorunuzu tekrar ifade edin."
+            # Gemini'den yanıt al (süre sınırı ve devre kesiciyle)
+            return answer_with_fallback(self.gemini_model, prompt, query, chunks)
                 
         except Exception as e:
             logger.error(f"Yanıt oluşturma hatası: {e}")
             return f"Bir hata oluştu: {str(e)}"
     
-    def get_ai_response(self, question: str, user_role: str = "student", project_context: str = "") -> str:
+    def get_ai_response(self, question: str, user_role: str = "student", project_context: str = "",
+                        history: str = "", project_id: int = None) -> str:
         """
         Kullanıcı sorusuna AI yanıtı üret
         RAG sistemi ile döküman bilgilerini kullanarak yanıt oluştur
+        history: konuşma belleği (bkz. conversation_memory.py)
+        Dökümanın bütününe dair sorular hazır özetlerden yanıtlanır (bkz. document_digest.py)
         """
         try:
-            # Rol bazlı prompt oluştur
-            role_prompts = {
-                "student": "Sen bir öğrenci proje geliştirme asistanısın. Öğrencilere proje geliştirme sürecinde rehberlik et.",
-                "advisor": "Sen bir danışman asistanısın. Danışmanlara öğrenci projelerini değerlendirme ve yönlendirme konusunda yardım et.",
-                "admin": "Sen bir sistem yöneticisi asistanısın. Genel proje istatistikleri ve sistem yönetimi konularında destek sağla."
-            }
-            
-            system_prompt = role_prompts.get(user_role, role_prompts["student"])
+            context_text, chunks = "", []
+            digest = self.digest_answer(question, project_id)
+            if digest is not None:
+                from document_digest import DIGEST_DIRECT
+                if DIGEST_DIRECT or not self.gemini_model:
+                    return digest[1]
+                # Chunk araması yerine dökümanın tamamını kapsayan kompakt bağlam;
+                # model erişilemezse çıkarımsal yanıt özetlerin cümlelerinden seçilir
+                context_text, chunks = digest[1], digest[2]
             
             # RAG ile ilgili dokümanları ara
-            relevant_context = ""
-            if self.index:
+            if not context_text:
                 try:
-                    query_engine = self.index.as_query_engine(similarity_top_k=3)
-                    rag_response = query_engine.query(question)
-                    if rag_response.response:
-                        relevant_context = f"\n\nİlgili döküman bilgileri:\n{rag_response.response}"
+                    context_text, chunks = self.retrieve_context(question)
                 except Exception as e:
                     logger.warning(f"RAG sorgu hatası: {e}")
             
             # Final prompt'u oluştur
-            final_prompt = f"""
-{system_prompt}
-
-Proje Bağlamı: {project_context}
+            final_prompt = build_chat_prompt(question, user_role, project_context, history, context_text)
+            self._log_prompt_size(final_prompt, context_text, history)
 
-Kullanıcı Sorusu: {question}
-{relevant_context}
-
-Lütfen yardımcı ve bilgilendirici bir yanıt ver. Türkçe yanıt ver.
-"""
-
-            if self.gemini_model:
-                response = self.gemini_model.generate_content(final_prompt)
-                if response.text:
-                    return response.text
-                else:
-                    return "Yanıt oluşturulamadı. Lütfen sorunuzu tekrar ifade edin."
-            else:
-                return "AI sistemi şu anda kullanılamıyor. Lütfen daha sonra tekrar deneyin."
+            # Model yavaş veya erişilemezse bulunan chunk'lardan çıkarımsal yanıt
+            return answer_with_fallback(self.gemini_model, final_prompt, question, chunks)
                 
         except Exception as e:
             logger.error(f"AI yanıt oluşturma hatası: {e}")
             return "Üzgünüm, şu anda bir teknik sorun yaşıyorum. Lütfen daha sonra tekrar deneyin."
     
+    def digest_answer(self, question: str, project_id: int = None):
+        """Dökümanın bütününe dair soru için (tür, metin, chunk'lar); değilse None"""
+        from document_digest import digest_answer
+        try:
+            return digest_answer(self.digests, question, project_id)
+        except Exception as e:
+            logger.warning(f"Döküman özeti okunamadı: {e}")
+            return None
+    
+    def build_document_digest(self, file_path: str, documents: List[Document], project_id: int = None):
+        """
+        Yükleme aşaması: sayfa aralığı ve döküman özetleri ile içindekileri hazırla ve sakla
+        Hata dökümanın indekslenmesini engellemez.
+        """
+        from document_digest import build_digest, page_sections
+        try:
+            digest = build_digest(Path(file_path).name, page_sections(documents))
+            stored = self.digests.store(digest, str(file_path), project_id)
+            logger.info(
+                f"Döküman özeti hazırlandı: {file_path} ({len(digest['ranges'])} aralık, "
+                f"{len(digest['outline'])} başlık, {stored} kayıt)"
+            )
+            return digest
+        except Exception as e:
+            logger.error(f"Döküman özeti hatası: {e}")
+            return None
+    
     def add_document(self, file_path: str, project_id: int = None):
         """
         Yeni döküman ekle ve indeksle
@@ -352,6 +487,7 @@ Lütfen yardımcı ve bilgilendirici bir yanıt ver. Türkçe yanıt ver.
                         doc.metadata["project_id"] = str(project_id)
                 
                 self.add_documents_to_index(documents)
+                self.build_document_digest(file_path, documents, project_id)
                 logger.info(f"Döküman başarıyla eklendi: {file_path}")
                 return True
             return False
@@ -364,12 +500,59 @@ Lütfen yardımcı ve bilgilendirici bir yanıt ver. Türkçe yanıt ver.
         documents = self.process_pdf_document(file_path)
         if documents:
             self.add_documents_to_index(documents)
+            self.build_document_digest(file_path, documents)
             return True
         return False
 
 # Global RAG sistemi instance'ı
 rag_system = None
 
+# Süreç içinde paylaşılan embedding modeli
+_embed_model = None
+
+# Süreç içinde paylaşılan yanıt modeli
+_llm = None
+
+def get_llm():
+    """Yanıt / özet modeli (RAG_LLM_BACKEND); yapılandırılmamışsa None"""
+    global _llm
+    if _llm is None:
+        if LLM_BACKEND == 'stub':
+            from stub_model import StubModel
+            _llm = StubModel()
+        else:
+            api_key = os.getenv('GEMINI_API_KEY')
+            if api_key:
+                import google.generativeai as genai
+                genai.configure(api_key=api_key)
+                _llm = genai.GenerativeModel('gemini-2.0-flash')
+    return _llm
+
+def get_embed_model():
+    """Embedding modelini bir kez yükle ve paylaş"""
+    global _embed_model
+    if _embed_model is None:
+        from llama_index.embeddings.huggingface import HuggingFaceEmbedding
+        _embed_model = HuggingFaceEmbedding(
+            model_name=os.getenv('EMBEDDING_MODEL', 'sentence-transformers/all-MiniLM-L6-v2')
+        )
+    return _embed_model
+
+def preload():
+    """
+    Worker'lar fork edilmeden önce (gunicorn preload_app) salt okunur yapıları yükle
+    Model ağırlıkları ve modül kodu copy-on-write ile tüm worker'larda paylaşılır.
+    Vektör veritabanı bağlantısı burada açılmaz; her worker kendi bağlantısını açar.
+    """
+    # Tokenizer thread havuzu fork sonrası kilitlenmesin
+    os.environ.setdefault('TOKENIZERS_PARALLELISM', 'false')
+    
+    get_embed_model()
+    from llama_index.core import VectorStoreIndex, StorageContext  # noqa: F401
+    from llama_index.vector_stores.chroma import ChromaVectorStore  # noqa: F401
+    import google.generativeai  # noqa: F401
+    logger.info("Embedding modeli ve RAG modülleri fork öncesi yüklendi")
+
 def init_rag_system():
     """RAG sistemini başlat"""
     global rag_system
@@ -0,0 +1,282 @@
+"""
+Retrieval Sonrası İşleme
+Aranan chunk'ların prompt'a girmeden önce tekilleştirilmesi ve paketlenmesi
+
+Chunk'lar sözlük olarak taşınır: {'text': str, 'score': float, 'metadata': dict}
+"""
+import re
+import math
+import logging
+from typing import Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Gemini tokenizer'ı yerel olarak mevcut değil; Türkçe metin için
+# ~4 karakter/token ve kelime sayısından büyük olanı yeterince yakın bir üst sınır
+CHARS_PER_TOKEN = 4
+
+# _split_text 200 karakter örtüşme kullanır, kelime sınırına uzatma ile biraz fazlası olabilir
+MAX_OVERLAP_CHARS = 400
+MIN_OVERLAP_CHARS = 20
+
+_CHUNK_ID_RE = re.compile(r"^(?P<group>.+)_(?P<index>\d+)$")
+_SENTENCE_END_RE = re.compile(r"[.!?…]\s")
+
+
+def mmr_select(query_embedding, candidate_embeddings, k: int, lambda_mult: float = 0.5) -> List[int]:
+    """
+    Maximal Marginal Relevance ile aday listesinden k indeks seç
+    Her adımda sorguya benzer ama seçilmiş olanlara benzemeyen adayı tercih eder:
+        skor = λ * sim(aday, sorgu) - (1 - λ) * max sim(aday, seçilen)
+    Benzerlik matrisi bir kez hesaplanır, seçim döngüsü numpy vektör işlemleriyle yürür.
+    """
+    import numpy as np
+
+    embeddings = np.asarray(candidate_embeddings, dtype=np.float32)
+    if embeddings.ndim != 2 or len(embeddings) == 0:
+        return []
+    k = min(k, len(embeddings))
+
+    query = np.asarray(query_embedding, dtype=np.float32)
+    embeddings = embeddings / np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+    query = query / max(float(np.linalg.norm(query)), 1e-12)
+
+    query_similarity = embeddings @ query
+    pairwise_similarity = embeddings @ embeddings.T
+
+    selected = [int(np.argmax(query_similarity))]
+    max_similarity = pairwise_similarity[selected[0]].copy()
+    available = np.ones(len(embeddings), dtype=bool)
+    available[selected[0]] = False
+
+    while len(selected) < k:
+        scores = lambda_mult * query_similarity - (1.0 - lambda_mult) * max_similarity
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        available[best] = False
+        np.maximum(max_similarity, pairwise_similarity[best], out=max_similarity)
+
+    return selected
+
+
+def unique_content_ratio(texts: List[str], shingle_size: int = 3) -> float:
+    """
+    Gönderilen içeriğin ne kadarının tekrar olmadığı (0-1)
+    Kelime üçlülerinin (shingle) benzersiz olanlarının toplam üçlü sayısına oranı;
+    token başına benzersiz içerik için yaklaşık ölçü
+    """
+    total = 0
+    shingles = set()
+    for text in texts:
+        words = text.split()
+        grams = [tuple(words[i:i + shingle_size]) for i in range(max(1, len(words) - shingle_size + 1))]
+        total += len(grams)
+        shingles.update(grams)
+    return len(shingles) / total if total else 0.0
+
+
+def estimate_tokens(text: str) -> int:
+    """Metnin yaklaşık token sayısı"""
+    if not text:
+        return 0
+    return max(math.ceil(len(text) / CHARS_PER_TOKEN), len(text.split()))
+
+
+def _overlap_length(left: str, right: str) -> int:
+    """left'in sonu ile right'ın başı arasındaki örtüşen karakter sayısı"""
+    if len(left) < MIN_OVERLAP_CHARS or len(right) < MIN_OVERLAP_CHARS:
+        return 0
+    probe = right[:MIN_OVERLAP_CHARS]
+    window_start = max(0, len(left) - MAX_OVERLAP_CHARS)
+    position = left.find(probe, window_start)
+    while position != -1:
+        tail = left[position:]
+        if right.startswith(tail):
+            return len(tail)
+        position = left.find(probe, position + 1)
+    return 0
+
+
+def _chunk_position(chunk: Dict) -> Tuple[str, str, int]:
+    """(kaynak, sayfa aralığı, sıra) - aynı gruptaki komşu chunk'ları bulmak için"""
+    metadata = chunk.get("metadata") or {}
+    source = metadata.get("source") or metadata.get("filename") or ""
+    match = _CHUNK_ID_RE.match(str(metadata.get("chunk_id", "")))
+    if not match:
+        return source, "", -1
+    return source, match.group("group"), int(match.group("index"))
+
+
+def merge_adjacent_chunks(chunks: List[Dict]) -> List[Dict]:
+    """
+    Aynı dosya ve sayfa aralığından gelen ardışık chunk'ları tek blokta birleştir
+    Örtüşen metin bir kez yazılır, bloğun skoru üyelerin en yükseğidir
+    """
+    positioned = []
+    unpositioned = []
+    for chunk in chunks:
+        source, group, index = _chunk_position(chunk)
+        if index < 0:
+            unpositioned.append(dict(chunk))
+        else:
+            positioned.append(((source, group, index), chunk))
+    positioned.sort(key=lambda item: item[0])
+
+    blocks = []
+    previous_key = None
+    for key, chunk in positioned:
+        if key == previous_key:
+            continue  # aynı chunk iki kez gelmiş
+        if blocks and previous_key and key[:2] == previous_key[:2] and key[2] == previous_key[2] + 1:
+            block = blocks[-1]
+            overlap = _overlap_length(block["text"], chunk["text"])
+            separator = "" if overlap else "\n"
+            block["text"] = block["text"] + separator + chunk["text"][overlap:]
+            block["score"] = max(block["score"], chunk.get("score", 0.0))
+            block["merged"] += 1
+        else:
+            blocks.append({
+                "text": chunk["text"],
+                "score": chunk.get("score", 0.0),
+                "metadata": chunk.get("metadata") or {},
+                "merged": 1
+            })
+        previous_key = key
+
+    for chunk in unpositioned:
+        chunk.setdefault("merged", 1)
+        blocks.append(chunk)
+    return blocks
+
+
+def drop_duplicate_chunks(chunks: List[Dict]) -> List[Dict]:
+    """Başka bir chunk'ın içinde tamamen yer alan (veya aynısı olan) chunk'ları at"""
+    ordered = sorted(chunks, key=lambda c: (-len(c["text"]), -c.get("score", 0.0)))
+    kept = []
+    for chunk in ordered:
+        text = chunk["text"].strip()
+        if not text:
+            continue
+        container = next((k for k in kept if text in k["text"]), None)
+        if container is not None:
+            container["score"] = max(container.get("score", 0.0), chunk.get("score", 0.0))
+            continue
+        kept.append(chunk)
+    return kept
+
+
+def _truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Metni token bütçesine sığacak şekilde mümkünse cümle sonunda kes"""
+    limit = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= limit:
+        return text
+    cut = text[:limit]
+    sentence_ends = [m.end() for m in _SENTENCE_END_RE.finditer(cut)]
+    if sentence_ends and sentence_ends[-1] > limit // 2:
+        return cut[:sentence_ends[-1]].rstrip()
+    return cut.rsplit(" ", 1)[0] + " …"
+
+
+def pack_contexts(chunks: List[Dict], token_budget: int, min_block_tokens: int = 50) -> Tuple[str, Dict]:
+    """
+    Chunk'ları token bütçesine göre paketle
+    1. Ardışık chunk'ları birleştir (örtüşmeyi çıkar)
+    2. Birbirini içeren tekrarları at
+    3. Skora göre sırala ve bütçe dolana kadar ekle
+
+    (context_text, istatistik) döndürür
+    """
+    stats = {
+        "chunks_in": len(chunks),
+        "tokens_in": sum(estimate_tokens(c["text"]) for c in chunks),
+        "blocks": 0,
+        "tokens": 0,
+        "truncated": 0
+    }
+    if not chunks:
+        return "", stats
+
+    blocks = drop_duplicate_chunks(merge_adjacent_chunks(chunks))
+    blocks.sort(key=lambda b: -b.get("score", 0.0))
+
+    selected = []
+    remaining = token_budget
+    for block in blocks:
+        tokens = estimate_tokens(block["text"])
+        if tokens > remaining:
+            if remaining < min_block_tokens:
+                continue
+            block = dict(block, text=_truncate_to_tokens(block["text"], remaining))
+            tokens = estimate_tokens(block["text"])
+            if tokens > remaining:
+                continue
+            stats["truncated"] += 1
+        selected.append(block)
+        remaining -= tokens
+
+    stats["blocks"] = len(selected)
+    stats["tokens"] = token_budget - remaining
+    return "\n\n".join(block["text"] for block in selected), stats
+
+
+# Çıkarımsal yanıtta puanlamaya katılmayan sık kelimeler
+_STOPWORDS = {
+    "bir", "bu", "şu", "ve", "ile", "için", "gibi", "daha", "çok", "olan", "olarak", "ama", "veya",
+    "nasıl", "neden", "hangi", "nedir", "midir", "mıdır", "mi", "mı", "mu", "mü", "ne", "var", "yok",
+    "the", "and", "for", "with", "what", "how", "which", "that", "this", "are", "was",
+}
+_WORD_RE = re.compile(r"\w+")
+_SENTENCE_SPLIT_RE = re.compile(r"(?<=[.!?…])\s+|\n+")
+# Türkçe ekleri kabaca atmak için kelimenin ilk harfleri kök sayılır
+STEM_LENGTH = 5
+
+
+def _stems(text: str) -> List[str]:
+    text = text.replace("İ", "i").replace("I", "ı").lower()
+    return [word[:STEM_LENGTH] for word in _WORD_RE.findall(text)
+            if len(word) > 2 and word not in _STOPWORDS and not word.isdigit()]
+
+
+def extractive_answer(question: str, chunks: List[Dict], max_sentences: int = 4,
+                      min_words: int = 5) -> List[Dict]:
+    """
+    Modelsiz yanıt: chunk cümlelerini soruyla örtüşmelerine göre puanla
+    Puan = sorudaki köklerin cümlede geçenlerinin IDF toplamı / sqrt(cümle uzunluğu),
+    chunk'ın arama skoruyla ağırlıklandırılır. En iyi cümleler (tekrarsız) döner:
+    [{'text', 'score', 'metadata'}], puana göre azalan.
+    """
+    question_stems = set(_stems(question))
+    if not question_stems or not chunks:
+        return []
+
+    sentences = []
+    seen = set()
+    for chunk in drop_duplicate_chunks(merge_adjacent_chunks(chunks)):
+        for sentence in _SENTENCE_SPLIT_RE.split(chunk["text"]):
+            sentence = " ".join(sentence.split())
+            key = sentence.lower()
+            if len(sentence.split()) < min_words or key in seen:
+                continue
+            seen.add(key)
+            sentences.append((sentence, set(_stems(sentence)), chunk))
+    if not sentences:
+        return []
+
+    # Cümle frekansı: her cümlede geçen kökler ayırt edici değildir
+    frequency = {}
+    for _, stems, _ in sentences:
+        for stem in stems & question_stems:
+            frequency[stem] = frequency.get(stem, 0) + 1
+    idf = {stem: math.log(1 + len(sentences) / count) for stem, count in frequency.items()}
+
+    scored = []
+    for sentence, stems, chunk in sentences:
+        overlap = stems & question_stems
+        if not overlap:
+            continue
+        score = sum(idf[stem] for stem in overlap) / math.sqrt(max(len(stems), 1))
+        score *= 0.5 + chunk.get("score", 0.5)
+        scored.append({"text": sentence, "score": score, "metadata": chunk.get("metadata") or {}})
+    scored.sort(key=lambda item: -item["score"])
+    return scored[:max_sentences]
@@ -4,8 +4,9 @@ Ana sayfa, kimlik doğrulama, API ve admin route'ları
 """
 from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, current_app
 from flask_login import login_user, logout_user, login_required, current_user
-from werkzeug.security import check_password_hash
+from sqlalchemy.orm import joinedload
 from models import User, Project, Competition, ChatMessage, db
+from password_hashing import PasswordHashBusy, RETRY_AFTER
 import json
 from datetime import datetime
 
@@ -15,6 +16,15 @@ auth_bp = Blueprint('auth', __name__)
 api_bp = Blueprint('api', __name__)
 admin_bp = Blueprint('admin', __name__)
 
+PASSWORD_BUSY_MESSAGE = 'Sunucu şu anda yoğun, lütfen birkaç saniye sonra tekrar deneyin.'
+
+def password_busy_response():
+    """Şifre hash havuzu doluyken JSON API yanıtı (503 + Retry-After)"""
+    response = jsonify({'success': False, 'message': PASSWORD_BUSY_MESSAGE})
+    response.status_code = 503
+    response.headers['Retry-After'] = str(RETRY_AFTER)
+    return response
+
 # Ana sayfa route'ları
 @main_bp.route('/')
 def index():
@@ -27,15 +37,21 @@ def index():
 @login_required
 def dashboard():
     """Kullanıcı dashboard'u"""
+    # Şablonların kullandığı ilişkiler sorguyla birlikte yüklenir (satır başına ek sorgu yok)
     if current_user.is_student():
-        # Öğrenci için projeler
-        projects = Project.query.filter_by(owner_id=current_user.id).all()
+        # Öğrenci için projeler (kartlarda danışman adı)
+        projects = Project.query.options(joinedload(Project.advisor)).filter_by(owner_id=current_user.id).all()
         competitions = Competition.query.filter_by(is_active=True).all()
         return render_template('student_dashboard.html', projects=projects, competitions=competitions)
     elif current_user.is_advisor():
-        # Danışman için danışmanlık yaptığı projeler
-        advised_projects = Project.query.filter_by(advisor_id=current_user.id).all()
-        return render_template('advisor_dashboard.html', projects=advised_projects)
+        # Danışman için danışmanlık yaptığı projeler (kartlarda öğrenci adı) ve kendi projeleri
+        advised_projects = Project.query.options(joinedload(Project.owner)).filter_by(advisor_id=current_user.id).all()
+        owned_projects = Project.query.filter_by(owner_id=current_user.id).all()
+        competitions = Competition.query.filter_by(is_active=True).all()
+        return render_template('advisor_dashboard.html',
+                             advised_projects=advised_projects,
+                             owned_projects=owned_projects,
+                             competitions=competitions)
     elif current_user.is_admin():
         # Admin için sistem özeti
         return redirect(url_for('admin.dashboard'))
@@ -46,12 +62,16 @@ def dashboard():
 @login_required
 def projects():
     """Proje listesi"""
+    # Kartlar sahip, danışman ve yarışma adlarını gösterir: üçü de aynı sorguda JOIN ile
+    query = Project.query.options(
+        joinedload(Project.owner), joinedload(Project.advisor), joinedload(Project.competition)
+    )
     if current_user.is_student():
-        user_projects = Project.query.filter_by(owner_id=current_user.id).all()
+        user_projects = query.filter_by(owner_id=current_user.id).all()
     elif current_user.is_advisor():
-        user_projects = Project.query.filter_by(advisor_id=current_user.id).all()
+        user_projects = query.filter_by(advisor_id=current_user.id).all()
     else:
-        user_projects = Project.query.all()
+        user_projects = query.all()
     
     return render_template('projects.html', projects=user_projects)
 
@@ -59,7 +79,9 @@ def projects():
 @login_required
 def project_detail(project_id):
     """Proje detayı"""
-    project = db.session.get(Project, project_id)
+    project = db.session.get(Project, project_id, options=[
+        joinedload(Project.owner), joinedload(Project.advisor), joinedload(Project.competition)
+    ])
     if not project:
         flash('Proje bulunamadı.', 'error')
         return redirect(url_for('main.projects'))
@@ -74,7 +96,7 @@ def project_detail(project_id):
     # İlgili projeler - aynı kategorideki diğer projeler
     related_projects = []
     if project.category:
-        related_projects = Project.query.filter(
+        related_projects = Project.query.options(joinedload(Project.owner)).filter(
             Project.category == project.category,
             Project.id != project.id
         ).limit(5).all()
@@ -134,6 +156,9 @@ def update_password():
         db.session.commit()
         
         return jsonify({'success': True, 'message': 'Şifre güncellendi'})
+    except PasswordHashBusy:
+        db.session.rollback()
+        return password_busy_response()
     except Exception as e:
         db.session.rollback()
         return jsonify({'success': False, 'message': str(e)}), 500
@@ -153,43 +178,8 @@ def update_preferences():
 @login_required
 def get_profile_stats():
     try:
-        if current_user.is_student():
-            # Student statistics
-            total_projects = db.session.query(Project).filter_by(student_id=current_user.id).count()
-            completed_projects = db.session.query(Project).filter_by(
-                student_id=current_user.id, status='completed'
-            ).count()
-            in_progress_projects = db.session.query(Project).filter_by(
-                student_id=current_user.id, status='in_progress'
-            ).count()
-            chat_messages = db.session.query(ChatMessage).filter_by(user_id=current_user.id).count()
-            
-            return jsonify({
-                'total_projects': total_projects,
-                'completed_projects': completed_projects,
-                'in_progress_projects': in_progress_projects,
-                'chat_messages': chat_messages
-            })
-        
-        elif current_user.is_advisor():
-            # Advisor statistics
-            advised_projects = db.session.query(Project).filter_by(advisor_id=current_user.id).count()
-            own_projects = db.session.query(Project).filter_by(created_by=current_user.id).count()
-            students = db.session.query(Project.student_id).filter_by(advisor_id=current_user.id).distinct().count()
-            feedbacks = db.session.query(Project).filter(
-                Project.advisor_id == current_user.id,
-                Project.feedback.isnot(None)
-            ).count()
-            
-            return jsonify({
-                'advised_projects': advised_projects,
-                'own_projects': own_projects,
-                'students': students,
-                'feedbacks': feedbacks
-            })
-        
-        else:
-            return jsonify({})
+        from profile_stats import profile_stats
+        return jsonify(profile_stats(current_user))
     
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -198,46 +188,8 @@ def get_profile_stats():
 @login_required
 def get_profile_activity():
     try:
-        activities = []
-        
-        # Get recent projects
-        recent_projects = db.session.query(Project).filter(
-            (Project.student_id == current_user.id) | (Project.advisor_id == current_user.id)
-        ).order_by(Project.updated_at.desc()).limit(5).all()
-        
-        for project in recent_projects:
-            if project.student_id == current_user.id:
-                activities.append({
-                    'icon': 'project-diagram',
-                    'title': f'Proje güncellendi: {project.title}',
-                    'description': f'Durum: {project.get_status_display()}',
-                    'time': project.updated_at.strftime('%d.%m.%Y')
-                })
-            elif project.advisor_id == current_user.id:
-                activities.append({
-                    'icon': 'chalkboard-teacher',
-                    'title': f'Danışmanlık: {project.title}',
-                    'description': f'Öğrenci projesi güncellendi',
-                    'time': project.updated_at.strftime('%d.%m.%Y')
-                })
-        
-        # Get recent chat messages
-        recent_chats = db.session.query(ChatMessage).filter_by(
-            user_id=current_user.id
-        ).order_by(ChatMessage.timestamp.desc()).limit(3).all()
-        
-        for chat in recent_chats:
-            activities.append({
-                'icon': 'comments',
-                'title': 'AI Asistan ile sohbet',
-                'description': chat.message[:50] + '...' if len(chat.message) > 50 else chat.message,
-                'time': chat.timestamp.strftime('%d.%m.%Y')
-            })
-        
-        # Sort activities by time (most recent first)
-        activities.sort(key=lambda x: x['time'], reverse=True)
-        
-        return jsonify(activities[:10])  # Return last 10 activities
+        from profile_stats import profile_activity
+        return jsonify(profile_activity(current_user))
     
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -375,7 +327,20 @@ def login():
         
         user = User.query.filter_by(username=username).first()
         
-        if user and user.check_password(password) and user.is_active:
+        try:
+            valid = bool(user and user.check_password(password) and user.is_active)
+        except PasswordHashBusy:
+            flash(PASSWORD_BUSY_MESSAGE, 'error')
+            return render_template('auth/login.html'), 503, {'Retry-After': str(RETRY_AFTER)}
+        
+        if valid:
+            # Eski yöntem/parametrelerle saklanmış hash'i güncelle (başarısız olursa girişi engellemez)
+            if user.password_needs_rehash():
+                try:
+                    user.set_password(password)
+                    db.session.commit()
+                except PasswordHashBusy:
+                    db.session.rollback()
             login_user(user, remember=remember)
             next_page = request.args.get('next')
             flash(f'Hoş geldiniz, {user.get_full_name()}!', 'success')
@@ -421,7 +386,11 @@ def register():
             first_name=first_name,
             last_name=last_name
         )
-        user.set_password(password)
+        try:
+            user.set_password(password)
+        except PasswordHashBusy:
+            flash(PASSWORD_BUSY_MESSAGE, 'error')
+            return render_template('auth/register.html'), 503, {'Retry-After': str(RETRY_AFTER)}
         
         db.session.add(user)
         db.session.commit()
@@ -443,22 +412,45 @@ def logout():
 @api_bp.route('/projects', methods=['GET', 'POST'])
 @login_required
 def api_projects():
-    """Proje API'si"""
+    """
+    Proje API'si
+    GET: ?fields=id,title&limit=<n>&cursor=<imleç>; gövde dizi olarak kalır,
+    sonraki sayfa varsa imleci X-Next-Cursor başlığındadır. ETag / Last-Modified
+    eşleşirse 304 döner.
+    """
     if request.method == 'GET':
-        if current_user.is_student():
-            projects = Project.query.filter_by(owner_id=current_user.id).all()
-        elif current_user.is_advisor():
-            projects = Project.query.filter_by(advisor_id=current_user.id).all()
+        from project_queries import (
+            list_validators, make_etag, parse_fields, parse_limit, project_page
+        )
+        try:
+            fields = parse_fields(request.args.get('fields'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        # Önce yalnızca doğrulayıcılar: değişiklik yoksa satırlar hiç yüklenmez.
+        # If-Modified-Since değerlendirilmez: silme + düzenleme en son updated_at'i
+        # değiştirmeyebilir, bunu yalnızca ETag'deki proje sayısı yakalar.
+        validator, last_modified = list_validators(current_user)
+        etag = make_etag(validator, current_user, request.args)
+        if request.if_none_match and request.if_none_match.contains(etag):
+            response = current_app.response_class(status=304)
         else:
-            projects = Project.query.all()
-        
-        return jsonify([{
-            'id': p.id,
-            'title': p.title,
-            'description': p.description,
-            'status': p.status,
-            'progress': p.get_progress_percentage()
-        } for p in projects])
+            try:
+                items, next_cursor = project_page(
+                    current_user, fields, parse_limit(request.args.get('limit')), request.args.get('cursor')
+                )
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            response = jsonify(items)
+            if next_cursor:
+                response.headers['X-Next-Cursor'] = next_cursor
+
+        response.set_etag(etag)
+        if last_modified:
+            response.last_modified = last_modified
+        # Tarayıcı saklayabilir ama her seferinde doğrulamalı; paylaşılan önbellekler saklamamalı
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
     
     elif request.method == 'POST':
         data = request.get_json()
@@ -488,6 +480,24 @@ def api_competitions():
         'deadline': c.registration_deadline.isoformat() if c.registration_deadline else None
     } for c in competitions])
 
+@api_bp.route('/chat/history')
+@login_required
+def api_chat_history():
+    """Chat geçmişi API'si (keyset sayfalama: ?before_id=<id>&limit=<n>, kompakt biçim: ?protocol=2)"""
+    from chat_handlers import chat_history_page, chat_scope
+    from chat_protocol import Variant, negotiate, wire_page
+    # Proje sohbeti: sahibi, danışmanı veya admin; proje yoksa yalnızca kendi mesajları
+    scope = chat_scope(current_user, request.args.get('project_id', type=int))
+    if scope is None:
+        return jsonify({'error': 'Bu projeye erişim yetkiniz yok.'}), 403
+    page = chat_history_page(
+        before_id=request.args.get('before_id', type=int),
+        limit=request.args.get('limit', type=int),
+        **scope
+    )
+    variant = negotiate({'protocol': request.args.get('protocol', 1)})
+    return jsonify(wire_page(page, Variant(variant.version)))
+
 @api_bp.route('/projects/<int:project_id>/upload-document', methods=['POST'])
 @login_required
 def upload_project_document(project_id):
@@ -531,8 +541,10 @@ def upload_project_document(project_id):
         
         # RAG sistemine dökümanı ekle (eğer varsa)
         try:
-            from rag_system import RAGSystem
-            rag = RAGSystem()
+            from rag_system import get_rag_system
+            rag = get_rag_system()
+            if rag is None:
+                raise RuntimeError('RAG sistemi başlatılamadı')
             rag.add_document(file_path, project_id)
         except Exception as e:
             print(f"RAG sistemi döküman ekleme hatası: {e}")
@@ -601,23 +613,65 @@ def dashboard():
         flash('Bu sayfaya erişim yetkiniz yok.', 'error')
         return redirect(url_for('main.dashboard'))
     
-    # İstatistikler
-    users = User.query.all()
-    projects = Project.query.all()
-    competitions = Competition.query.all()
-    
-    stats = {
-        'total_users': len(users),
-        'total_projects': len(projects),
-        'total_competitions': len(competitions),
-        'total_messages': 0  # TODO: ChatMessage sayısı eklenecek
-    }
+    # İstatistikler SQL toplamlarıyla; tablolar /admin/api/<tablo> üzerinden sayfa sayfa yüklenir
+    from admin_queries import dashboard_stats, recent_users
+    stats = dashboard_stats()
     
     return render_template('admin_dashboard.html', 
                          stats=stats, 
-                         users=users, 
-                         projects=projects, 
-                         competitions=competitions)
+                         recent_users=recent_users())
+
+@admin_bp.route('/api/stats')
+@login_required
+def stats_api():
+    """API: Dashboard istatistikleri"""
+    if not current_user.is_admin():
+        return jsonify({'success': False, 'message': 'Yetkiniz yok'}), 403
+    
+    from admin_queries import dashboard_stats
+    try:
+        days = int(request.args.get('days', 14))
+    except ValueError:
+        days = 14
+    return jsonify(dashboard_stats(days=max(1, min(days, 90))))
+
+@admin_bp.route('/api/ai-status')
+@login_required
+def ai_status_api():
+    """API: Yanıt modeli devre kesicisinin durumu ve sayaçları (bu worker için)"""
+    if not current_user.is_admin():
+        return jsonify({'success': False, 'message': 'Yetkiniz yok'}), 403
+
+    import os
+    from llm_guard import llm_breaker
+    return jsonify(dict(llm_breaker.metrics(), pid=os.getpid()))
+
+@admin_bp.route('/api/activity')
+@login_required
+def activity_api():
+    """API: Tüm kullanıcıların aktivite akışı (keyset sayfalama: ?before_id=<id>&limit=<n>)"""
+    if not current_user.is_admin():
+        return jsonify({'success': False, 'message': 'Yetkiniz yok'}), 403
+
+    from activity import global_feed
+    items = global_feed(limit=request.args.get('limit', 20), before_id=request.args.get('before_id', type=int))
+    return jsonify({
+        'items': items,
+        'next_before_id': items[-1]['id'] if items else None
+    })
+
+@admin_bp.route('/api/<table>')
+@login_required
+def table_api(table):
+    """API: Sayfalanmış, sıralanabilir ve filtrelenebilir admin tabloları (users, projects, competitions)"""
+    if not current_user.is_admin():
+        return jsonify({'success': False, 'message': 'Yetkiniz yok'}), 403
+    
+    from admin_queries import table_page
+    try:
+        return jsonify(table_page(table, request.args))
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 404
 
 @admin_bp.route('/users')
 @login_required
@@ -716,6 +770,9 @@ def add_user_api():
         
         return jsonify({'success': True, 'message': 'Kullanıcı başarıyla eklendi'})
     
+    except PasswordHashBusy:
+        db.session.rollback()
+        return password_busy_response()
     except Exception as e:
         db.session.rollback()
         return jsonify({'success': False, 'message': str(e)}), 500
@@ -0,0 +1,73 @@
+"""
+Yerel Stub Model
+Ağ ve API anahtarı gerektirmeyen, deterministik yanıt / özet modeli
+
+RAG_LLM_BACKEND=stub ile Gemini yerine kullanılır (geliştirme, benchmark).
+Gemini'nin `generate_content(prompt).text` arayüzünü taklit eder:
+
+- Özet prompt'larında (conversation_memory.summary_prompt) önceki özetin
+  maddelerine her yeni sorunun ilk kelimelerini ekler; en yeni `summary_items`
+  madde tutulur.
+- Döküman özeti prompt'larında (document_digest.summary_prompt) kaynak metnin
+  çıkarımsal özetini (paragrafların ilk cümleleri) döndürür.
+- Diğer prompt'larda soruyu tekrar eden, `answer_words` kelimelik bir yanıt üretir.
+- `ms_per_1k_tokens` verilirse prompt boyutuyla orantılı bekler; gerçek
+  modelde prompt işleme süresinin token sayısıyla büyümesini taklit eder.
+"""
+import os
+import re
+import time
+
+from retrieval import estimate_tokens
+
+STUB_MS_PER_1K_TOKENS = float(os.getenv("RAG_STUB_MS_PER_1K_TOKENS", "0"))
+_MAX_WORDS_RE = re.compile(r"en fazla (\d+) kelime")
+
+
+class StubResponse:
+    __slots__ = ("text",)
+
+    def __init__(self, text):
+        self.text = text
+
+
+class StubModel:
+    def __init__(self, ms_per_1k_tokens: float = STUB_MS_PER_1K_TOKENS, answer_words: int = 80,
+                 summary_items: int = 20):
+        self.ms_per_1k_tokens = ms_per_1k_tokens
+        self.answer_words = answer_words
+        self.summary_items = summary_items
+        self.calls = 0
+        self.prompt_tokens = 0
+
+    def generate_content(self, prompt):
+        from conversation_memory import PREVIOUS_SUMMARY, NEW_TURNS
+        from document_digest import SOURCE_TEXT, lead_summary
+
+        tokens = estimate_tokens(prompt)
+        self.calls += 1
+        self.prompt_tokens += tokens
+        if self.ms_per_1k_tokens:
+            time.sleep(tokens / 1000 * self.ms_per_1k_tokens / 1000)
+        if NEW_TURNS in prompt and PREVIOUS_SUMMARY in prompt:
+            return StubResponse(self._summary(prompt, PREVIOUS_SUMMARY, NEW_TURNS))
+        if SOURCE_TEXT in prompt:
+            match = _MAX_WORDS_RE.search(prompt)
+            return StubResponse(lead_summary(prompt.split(SOURCE_TEXT, 1)[1], int(match.group(1)) if match else 100))
+        return StubResponse(self._answer(prompt))
+
+    def _summary(self, prompt, previous_header, turns_header):
+        previous, turns = prompt.split(previous_header, 1)[1].split(turns_header, 1)
+        items = [line for line in previous.strip().splitlines() if line.startswith("- ")]
+        for line in turns.splitlines():
+            if line.startswith("Kullanıcı: "):
+                items.append("- " + " ".join(line[len("Kullanıcı: "):].split()[:12]))
+        return "\n".join(items[-self.summary_items:])
+
+    def _answer(self, prompt):
+        question = ""
+        for line in prompt.splitlines():
+            if line.startswith("Kullanıcı Sorusu:"):
+                question = line.split(":", 1)[1].strip()
+        filler = " ".join(f"adım{i}" for i in range(self.answer_words))
+        return f"'{question}' için öneriler: {filler}"
@@ -0,0 +1,158 @@
+"""
+Test ortak fixture'ları
+Her test geçici bir SQLite veritabanıyla çalışır; gerçek veritabanına dokunulmaz.
+"""
+import os
+import sys
+
+import pytest
+from flask.testing import FlaskClient
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class QueryCounter:
+    """Blok içinde çalışan SQL ifadelerini say"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.statements = []
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def __enter__(self):
+        from sqlalchemy import event
+        event.listen(self.engine, "before_cursor_execute", self._record)
+        return self
+
+    def __exit__(self, *exc):
+        from sqlalchemy import event
+        event.remove(self.engine, "before_cursor_execute", self._record)
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+
+class FreshContextClient(FlaskClient):
+    """
+    Her istek kendi uygulama bağlamında çalışır
+    Testin açık tuttuğu bağlam istekte yeniden kullanılırsa `g` (Flask-Login'in
+    yüklediği kullanıcı) ve veritabanı oturumu istekler arasında paylaşılır.
+    """
+
+    def open(self, *args, **kwargs):
+        with self.application.app_context():
+            return super().open(*args, **kwargs)
+
+
+@pytest.fixture
+def make_app(tmp_path):
+    """Geçici veritabanıyla uygulama oluşturan fabrika; migration'lar uygulanmış olur"""
+    from app import create_app
+    from migrations import upgrade
+    from user_cache import user_cache
+    from profile_stats import profile_cache
+    from chat_handlers import recent_messages
+    import project_context
+
+    def factory(**config):
+        path = tmp_path / f"test{len(list(tmp_path.glob('*.db')))}.db"
+        config.setdefault("SQLALCHEMY_DATABASE_URI", f"sqlite:///{path}")
+        config.setdefault("TESTING", True)
+        # Socket.IO test istemcisi mesaj kuyruğuyla çalışmaz
+        config.setdefault("SOCKETIO_MESSAGE_QUEUE", "")
+        app = create_app(config)
+        app.test_client_class = FreshContextClient
+        with app.app_context():
+            upgrade()
+        # Süreç içi önbellekler önceki testin satırlarını tutmasın
+        user_cache.clear()
+        profile_cache.clear()
+        project_context.clear()
+        recent_messages.clear()
+        return app
+
+    return factory
+
+
+@pytest.fixture
+def app(make_app):
+    app = make_app()
+    with app.app_context():
+        yield app
+
+
+@pytest.fixture
+def db(app):
+    from models import db
+    return db
+
+
+@pytest.fixture
+def make_user(db):
+    """Kullanıcı oluştur; rol ve ad verilebilir"""
+    from models import User
+
+    def factory(username, role="student", **values):
+        user = User(username=username, email=f"{username}@example.com", role=role,
+                    first_name="Ad", last_name=username, password_hash="x", **values)
+        db.session.add(user)
+        db.session.commit()
+        return user
+
+    return factory
+
+
+class FreshContextSocketClient:
+    """Socket.IO test istemcisi; olaylar FreshContextClient gibi ayrı bağlamda işlenir"""
+
+    def __init__(self, app, flask_client, **kwargs):
+        from app import socketio
+
+        self.app = app
+        with app.app_context():
+            self.client = socketio.test_client(app, flask_test_client=flask_client, **kwargs)
+
+    def emit(self, *args, **kwargs):
+        with self.app.app_context():
+            return self.client.emit(*args, **kwargs)
+
+    def get_received(self, *args, **kwargs):
+        return self.client.get_received(*args, **kwargs)
+
+    def disconnect(self, *args, **kwargs):
+        with self.app.app_context():
+            return self.client.disconnect(*args, **kwargs)
+
+
+@pytest.fixture
+def login(app):
+    """Kullanıcı oturumu açık test istemcisi"""
+    def factory(user):
+        client = app.test_client()
+        with client.session_transaction() as session:
+            session["_user_id"] = str(user.id)
+        return client
+
+    return factory
+
+
+@pytest.fixture
+def socket_client(app, login):
+    """Kullanıcı oturumu açık Socket.IO test istemcisi (auth: protokol isteği)"""
+    def factory(user, **kwargs):
+        return FreshContextSocketClient(app, login(user), **kwargs)
+
+    return factory
+
+
+@pytest.fixture
+def count_queries():
+    """Sorgu sayacı; engine verilmezse açık uygulama bağlamının veritabanı"""
+    def factory(engine=None):
+        from models import db
+        return QueryCounter(engine or db.engine)
+
+    return factory
@@ -0,0 +1,156 @@
+"""
+Chat geçmişi: keyset sayfalama ve erişim kontrolü
+"""
+from datetime import datetime, timedelta
+
+import pytest
+
+
+def seed_messages(db, users, count, project_id=None):
+    """count mesaj; her üç mesaj aynı zaman damgasına düşer, tek sıradakiler yanıtlı"""
+    from models import ChatMessage
+
+    started = datetime(2024, 1, 1)
+    for i in range(count):
+        db.session.add(ChatMessage(
+            user_id=users[i % len(users)].id,
+            project_id=project_id,
+            message=f"mesaj {i}",
+            response=f"yanıt {i}" if i % 2 else None,
+            timestamp=started + timedelta(seconds=i // 3)
+        ))
+    db.session.commit()
+
+
+def walk_pages(limit, **scope):
+    from chat_handlers import chat_history_page
+
+    pages, before_id = [], None
+    while True:
+        page = chat_history_page(before_id=before_id, limit=limit, **scope)
+        pages.append(page)
+        if not page["has_more"]:
+            return pages
+        before_id = page["next_before_id"]
+
+
+@pytest.fixture
+def project(db, make_user):
+    from models import Project
+
+    owner, advisor = make_user("sahip"), make_user("danisman", role="advisor")
+    project = Project(title="Proje", description="Açıklama", owner_id=owner.id, advisor_id=advisor.id)
+    db.session.add(project)
+    db.session.commit()
+    return project
+
+
+@pytest.mark.parametrize("limit", [1, 3, 7, 50])
+def test_pages_cover_every_message_once(db, make_user, project, limit):
+    # Sayfa sınırları aynı zaman damgalı mesajların ortasına düşse de atlanan veya yinelenen olmamalı
+    seed_messages(db, [make_user("a"), make_user("b")], 41, project.id)
+
+    pages = walk_pages(limit, project_id=project.id)
+
+    seen = [m["id"] for page in pages for m in page["messages"] if not m["is_ai"]]
+    assert sorted(seen) == list(range(1, 42))
+    assert len(seen) == len(set(seen))
+    assert all(len(page["messages"]) for page in pages)
+
+
+def test_page_is_chronological_with_replies_after_turns(db, make_user, project):
+    seed_messages(db, [make_user("a")], 6, project.id)
+    from chat_handlers import chat_history_page
+
+    page = chat_history_page(project_id=project.id, limit=10)
+
+    turns = [m for m in page["messages"] if not m["is_ai"]]
+    assert [m["id"] for m in turns] == list(range(1, 7))
+    replies = [m for m in page["messages"] if m["is_ai"]]
+    assert [m["turn_id"] for m in replies] == [2, 4, 6]
+    for reply in replies:
+        position = page["messages"].index(reply)
+        assert page["messages"][position - 1]["id"] == reply["turn_id"]
+
+
+def test_has_more_and_cursor_at_boundary(db, make_user, project):
+    from chat_handlers import chat_history_page
+
+    seed_messages(db, [make_user("a")], 10, project.id)
+
+    first = chat_history_page(project_id=project.id, limit=5)
+    assert first["has_more"] is True
+    assert first["next_before_id"] == 6
+    last = chat_history_page(project_id=project.id, before_id=first["next_before_id"], limit=5)
+    assert last["has_more"] is False
+    assert [m["id"] for m in last["messages"] if not m["is_ai"]] == [1, 2, 3, 4, 5]
+    # Tam sınırda biten geçmişte boş sayfa istenmemeli
+    exact = chat_history_page(project_id=project.id, limit=10)
+    assert exact["has_more"] is False
+
+
+def test_limit_is_clamped(db, make_user, project):
+    from chat_handlers import chat_history_page, MAX_HISTORY_LIMIT, DEFAULT_HISTORY_LIMIT
+
+    seed_messages(db, [make_user("a")], MAX_HISTORY_LIMIT + 20, project.id)
+
+    def turns(page):
+        return len([m for m in page["messages"] if not m["is_ai"]])
+
+    assert turns(chat_history_page(project_id=project.id, limit=10_000)) == MAX_HISTORY_LIMIT
+    assert turns(chat_history_page(project_id=project.id, limit=0)) == 1
+    assert turns(chat_history_page(project_id=project.id, limit="çok")) == DEFAULT_HISTORY_LIMIT
+
+
+def test_one_query_per_page(db, make_user, project, count_queries):
+    seed_messages(db, [make_user(f"u{i}") for i in range(5)], 60, project.id)
+    from chat_handlers import chat_history_page
+
+    project_id, before_id = project.id, None
+    while True:
+        db.session.expire_all()
+        with count_queries() as counter:
+            page = chat_history_page(project_id=project_id, before_id=before_id, limit=20)
+        assert counter.count == 1
+        if not page["has_more"]:
+            break
+        before_id = page["next_before_id"]
+
+
+def test_rest_history_requires_project_access(db, make_user, project, login):
+    seed_messages(db, [project.owner], 3, project.id)
+    stranger, admin = make_user("yabanci"), make_user("yonetici", role="admin")
+
+    for user in (project.owner, project.advisor, admin):
+        response = login(user).get(f"/api/chat/history?project_id={project.id}")
+        assert response.status_code == 200
+        assert len([m for m in response.get_json()["messages"] if not m["is_ai"]]) == 3
+
+    response = login(stranger).get(f"/api/chat/history?project_id={project.id}")
+    assert response.status_code == 403
+    assert login(stranger).get("/api/chat/history?project_id=999").status_code == 403
+
+
+def test_history_without_project_is_own_messages(db, make_user, login):
+    alice, bob = make_user("alice"), make_user("bob")
+    seed_messages(db, [alice, bob], 6)
+
+    messages = login(alice).get("/api/chat/history").get_json()["messages"]
+
+    assert {m["username"] for m in messages if not m["is_ai"]} == {"alice"}
+    assert [m["id"] for m in messages if not m["is_ai"]] == [1, 3, 5]
+
+
+def test_socket_history_uses_same_access_check(db, make_user, project, socket_client):
+    seed_messages(db, [project.owner], 3, project.id)
+
+    client = socket_client(make_user("yabanci"))
+    client.emit("load_chat_history", {"project_id": project.id})
+    events = client.get_received()
+    assert [e["name"] for e in events if e["name"] in ("chat_history", "error")] == ["error"]
+
+    client = socket_client(project.advisor)
+    client.emit("load_chat_history", {"project_id": project.id})
+    pages = [e["args"][0] for e in client.get_received() if e["name"] == "chat_history"]
+    assert len(pages) == 1
+    assert len([m for m in pages[0]["messages"] if not m["is_ai"]]) == 3
@@ -0,0 +1,46 @@
+"""
+Kompakt chat protokolü: get_users yalnızca bağlantının gördüğü kullanıcıları yanıtlar
+"""
+import pytest
+
+COMPACT = {"protocol": 2}
+
+
+@pytest.fixture
+def users(make_user):
+    return [make_user(name) for name in ("a", "b", "c", "d")]
+
+
+def get_users(client, ids):
+    return client.emit("get_users", {"ids": ids}, callback=True)
+
+
+def test_get_users_refuses_unrelated_ids(socket_client, users):
+    me, member, _, stranger = users
+    client = socket_client(me, auth=COMPACT)
+    client.emit("join_room", {"room": "uyeler"})
+    other = socket_client(member, auth=COMPACT)
+    other.emit("join_room", {"room": "uyeler"})
+
+    table = get_users(client, [me.id, member.id, stranger.id, "x"])
+
+    assert set(table) == {str(me.id), str(member.id)}
+    assert table[str(member.id)] == ["b", member.get_full_name(), "student"]
+    # Odaya katılmamış bağlantı kimseyi listeleyemez
+    outsider = socket_client(stranger, auth=COMPACT)
+    assert get_users(outsider, [user.id for user in users]) == {str(stranger.id): ["d", stranger.get_full_name(), "student"]}
+
+
+def test_get_users_allows_senders_who_left(socket_client, users):
+    from chat_writer import chat_writer
+
+    me, sender = users[:2]
+    client = socket_client(me, auth=COMPACT)
+    client.emit("join_room", {"room": "yazarlar"})
+    other = socket_client(sender, auth=COMPACT)
+    other.emit("join_room", {"room": "yazarlar"})
+    other.emit("send_message", {"message": "merhaba", "room": "yazarlar"})
+    chat_writer.flush()
+    other.disconnect()
+
+    assert str(sender.id) in get_users(client, [sender.id])
@@ -0,0 +1,196 @@
+"""
+Yeniden bağlanmada kaçırılan mesajlar: halka tampon ve veritabanı yedeği
+"""
+from datetime import datetime, timedelta
+
+
+def record(message_id, user_id=1, project_id=None, **values):
+    return dict({"id": message_id, "user_id": user_id, "project_id": project_id,
+                 "message": f"mesaj {message_id}", "is_ai": False}, **values)
+
+
+def reply(turn_id, **values):
+    return dict({"id": f"ai_{turn_id}", "turn_id": turn_id, "message": "yanıt", "is_ai": True}, **values)
+
+
+def test_buffer_returns_messages_after_last_id():
+    from chat_handlers import RecentMessages
+
+    buffer = RecentMessages(size=10)
+    for message_id in range(5, 9):
+        buffer.append("genel", record(message_id))
+
+    assert [m["id"] for m in buffer.since("genel", 6)] == [7, 8]
+    assert buffer.since("genel", 8) == []
+    # Tampon 5'ten önceki mesajları görmedi; 4'ten sonrası tam, 3'ten sonrası değil
+    assert [m["id"] for m in buffer.since("genel", 4)] == [5, 6, 7, 8]
+    assert buffer.since("genel", 3) is None
+    assert buffer.since("bilinmeyen", 0) is None
+
+
+def test_evicted_messages_are_not_claimed():
+    from chat_handlers import RecentMessages
+
+    buffer = RecentMessages(size=3)
+    for message_id in range(1, 7):
+        buffer.append("genel", record(message_id))
+
+    assert [m["id"] for m in buffer.since("genel", 4)] == [5, 6]
+    assert buffer.since("genel", 2) is None
+
+
+def test_reply_uses_turn_cursor():
+    from chat_handlers import RecentMessages
+
+    buffer = RecentMessages(size=10)
+    buffer.append("ai", record(1))
+    buffer.append("ai", record(2))
+    # 1. turun yanıtı 2. mesajdan sonra gelir; imleci 1'dir
+    buffer.append("ai", reply(1))
+
+    assert [m["id"] for m in buffer.since("ai", 1)] == [2]
+    assert [m["id"] for m in buffer.since("ai", 0)] == [1, 2, "ai_1"]
+
+
+def test_first_buffered_reply_does_not_cover_its_turn():
+    from chat_handlers import RecentMessages
+
+    buffer = RecentMessages(size=10)
+    # Süreç, sorusu tampona girmeden önce başlamış bir turun yanıtını görür
+    buffer.append("ai", reply(4))
+
+    assert buffer.since("ai", 3) is None
+    assert [m["id"] for m in buffer.since("ai", 4)] == []
+
+
+def test_buffer_scope_filters_project_and_user():
+    from chat_handlers import RecentMessages
+
+    buffer = RecentMessages(size=10)
+    buffer.append("oda", record(1, user_id=1, project_id=7))
+    buffer.append("oda", record(2, user_id=2, project_id=7))
+    buffer.append("oda", record(3, user_id=1, project_id=8))
+    buffer.append("oda", reply(1))
+    buffer.append("oda", reply(2))
+
+    assert [m["id"] for m in buffer.since("oda", 0, project_id=7)] == [1, 2]
+    assert [m["id"] for m in buffer.since("oda", 0, user_id=1)] == [1, 3, "ai_1"]
+
+
+def resume(client, rooms, **data):
+    client.emit("resume_chat", dict(data, rooms=rooms))
+    return [e["args"][0] for e in client.get_received() if e["name"] == "chat_resume"]
+
+
+def seed(db, user, count, project_id=None):
+    from models import ChatMessage
+
+    started = datetime(2024, 1, 1)
+    db.session.add_all(ChatMessage(user_id=user.id, project_id=project_id, message=f"mesaj {i}",
+                                   timestamp=started + timedelta(seconds=i)) for i in range(count))
+    db.session.commit()
+
+
+def test_resume_falls_back_to_database_for_gap(db, make_user, socket_client):
+    from chat_handlers import recent_messages
+
+    user = make_user("a")
+    seed(db, user, 10)
+    # Tampon yalnızca 8 ve sonrasını gördü
+    for message_id in (8, 9, 10):
+        recent_messages.append("genel", record(message_id, user_id=user.id, username="a"))
+    client = socket_client(user)
+
+    from_buffer, = resume(client, {"genel": 8})
+    assert from_buffer["source"] == "buffer"
+    assert [m["id"] for m in from_buffer["messages"]] == [9, 10]
+
+    from_database, = resume(client, {"genel": 3})
+    assert from_database["source"] == "database"
+    assert [m["id"] for m in from_database["messages"]] == [4, 5, 6, 7, 8, 9, 10]
+    assert from_database["reset"] is False
+
+
+def test_resume_resets_when_too_much_was_missed(db, make_user, socket_client):
+    from chat_handlers import MAX_HISTORY_LIMIT
+
+    user = make_user("a")
+    seed(db, user, MAX_HISTORY_LIMIT + 5)
+    client = socket_client(user)
+
+    page, = resume(client, {"genel": 0})
+    assert page["reset"] is True
+    assert len(page["messages"]) == MAX_HISTORY_LIMIT
+
+    invalid, = resume(client, {"genel": "yok"})
+    assert invalid == {"room": "genel", "messages": [], "reset": True}
+
+
+def test_resume_is_scoped_like_history(db, make_user, socket_client):
+    from models import Project
+
+    owner, stranger = make_user("sahip"), make_user("yabanci")
+    project = Project(title="Proje", description="Açıklama", owner_id=owner.id)
+    db.session.add(project)
+    db.session.commit()
+    seed(db, owner, 3, project.id)
+    seed(db, stranger, 2)
+
+    client = socket_client(stranger)
+    client.get_received()
+    client.emit("resume_chat", {"rooms": {"proje": 0}, "project_id": project.id})
+    assert [e["name"] for e in client.get_received()] == ["error"]
+    # Proje verilmezse yalnızca kendi mesajları
+    page, = resume(client, {"genel": 0})
+    assert [m["username"] for m in page["messages"]] == ["yabanci", "yabanci"]
+
+
+def write_from_other_process(database_uri, queue, user_id, count):
+    """Aynı veritabanına kendi chat_writer'ı ile yazan ikinci süreç (başka bir worker)"""
+    from app import create_app
+    from chat_writer import chat_writer
+
+    create_app({"SQLALCHEMY_DATABASE_URI": database_uri, "SOCKETIO_MESSAGE_QUEUE": queue})
+    for i in range(count):
+        chat_writer.submit(chat_writer.message({"user_id": user_id, "message": f"diğer {i}",
+                                                "timestamp": datetime.utcnow()}, room="genel", payload={}))
+    chat_writer.flush()
+
+
+def test_resume_with_message_queue_sees_other_writers(tmp_path, make_app, make_user):
+    import multiprocessing
+    from chat_handlers import missed_messages, recent_messages
+    from chat_writer import chat_writer
+
+    queue = f"filesystem://{tmp_path / 'kuyruk'}"
+    app = make_app(SOCKETIO_MESSAGE_QUEUE=queue)
+
+    def write(text):
+        timestamp = datetime.utcnow()
+        pending = chat_writer.message({"user_id": user.id, "message": text, "timestamp": timestamp},
+                                      room="genel", payload=record(None, user_id=user.id, message=text))
+        chat_writer.submit(pending)
+        chat_writer.flush()
+        return pending.id
+
+    with app.app_context():
+        user = make_user("a")
+        first = write("bu süreç 1")
+        write("bu süreç 2")
+
+        process = multiprocessing.get_context("spawn").Process(
+            target=write_from_other_process,
+            args=(app.config["SQLALCHEMY_DATABASE_URI"], queue, user.id, 2)
+        )
+        process.start()
+        process.join(60)
+        assert process.exitcode == 0
+        last = write("bu süreç 3")
+
+        # Tampon yalnızca bu sürecin mesajlarını gördü
+        assert [m["id"] for m in recent_messages.since("genel", first)] == [first + 1, last]
+
+        messages, source, reset = missed_messages("genel", first)
+        assert source == "database"
+        assert [m["id"] for m in messages] == list(range(first + 1, last + 1))
+        assert len(messages) == 4
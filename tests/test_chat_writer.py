@@ -0,0 +1,169 @@
+"""
+Toplu commit'li chat yazıcısı ve AI konuşmalarının tekilliği
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event, text
+
+
+@pytest.fixture
+def writer(app):
+    from chat_writer import ChatWriter
+
+    writer = ChatWriter(max_batch=64, max_delay=0.05)
+    writer.init_app(app)
+    writer.saved, writer.failed = [], []
+    writer.on_saved = writer.saved.append
+    writer.on_failed = writer.failed.append
+    return writer
+
+
+def message(writer, user_id, text, **values):
+    return writer.message(dict({"user_id": user_id, "message": text, "timestamp": datetime.utcnow()}, **values))
+
+
+def test_batch_is_written_in_order(writer, make_user):
+    from models import ChatMessage
+
+    user = make_user("a")
+    pending = [writer.submit(message(writer, user.id, f"mesaj {i}")) for i in range(20)]
+    writer.flush()
+
+    assert [p.wait(1) for p in pending] == list(range(1, 21))
+    assert len(writer.saved) == 20 and not writer.failed
+    rows = ChatMessage.query.order_by(ChatMessage.id).all()
+    assert [row.message for row in rows] == [f"mesaj {i}" for i in range(20)]
+
+
+def test_failing_message_does_not_sink_its_batch(writer, make_user):
+    from chat_writer import ChatWriteError
+    from models import ChatMessage
+
+    user = make_user("a")
+    good = [message(writer, user.id, f"mesaj {i}") for i in range(4)]
+    # message NOT NULL: tek başına yazılamayan mesaj
+    bad = message(writer, user.id, None)
+    # Toplu transaction başarısız olur, ardından her mesaj ayrı denenir
+    for pending in good[:2] + [bad] + good[2:]:
+        writer.submit(pending)
+    writer.flush()
+
+    assert all(pending.wait(1) for pending in good)
+    with pytest.raises(ChatWriteError):
+        bad.wait(1)
+    assert bad.id is None
+    assert writer.failed == [bad]
+    assert sorted(p.provisional_id for p in writer.saved) == sorted(p.provisional_id for p in good)
+    assert ChatMessage.query.count() == 4
+
+
+def test_update_of_unwritten_message_fails_alone(writer, make_user):
+    from models import ChatMessage
+
+    user = make_user("a")
+    bad = message(writer, user.id, None)
+    turn = message(writer, user.id, "soru")
+    writer.submit(bad)
+    writer.submit(turn)
+    failed_update = writer.update(bad, {"response": "yanıt"})
+    update = writer.update(turn, {"response": "yanıt", "response_latency_ms": 12})
+    writer.flush()
+
+    assert failed_update.error is not None
+    assert update.error is None
+    row = ChatMessage.query.one()
+    assert (row.message, row.response, row.response_latency_ms) == ("soru", "yanıt", 12)
+
+
+def test_ai_turn_bumps_conversation(writer, db, make_user):
+    from models import Conversation
+    from chat_handlers import get_or_create_conversation
+
+    user = make_user("a")
+    conversation = get_or_create_conversation(db, user.id)
+    conversation.updated_at = datetime(2024, 1, 1)
+    db.session.commit()
+    asked_at = datetime(2024, 6, 1)
+    turn = writer.submit(message(writer, user.id, "soru", conversation_id=conversation.id, timestamp=asked_at))
+    writer.flush()
+    turn.wait(1)
+
+    db.session.expire_all()
+    assert db.session.get(Conversation, conversation.id).updated_at == asked_at
+
+
+def test_synchronous_mode_writes_on_submit(app, make_user):
+    from chat_writer import ChatWriter
+
+    writer = ChatWriter(write_behind=False)
+    writer.init_app(app)
+    user = make_user("a")
+    pending = writer.submit(message(writer, user.id, "hemen"))
+
+    assert pending.done.is_set()
+    assert pending.wait(0) == 1
+
+
+def test_conversation_is_unique_per_user_and_project(db, make_user):
+    from sqlalchemy.exc import IntegrityError
+    from models import Conversation
+    from chat_handlers import get_or_create_conversation
+
+    user = make_user("a")
+    general = get_or_create_conversation(db, user.id)
+    assert get_or_create_conversation(db, user.id).id == general.id
+    assert get_or_create_conversation(db, user.id, project_id=None).id == general.id
+
+    # Genel sohbet (project_id NULL) de benzersiz indekse takılır
+    db.session.add(Conversation(user_id=user.id))
+    with pytest.raises(IntegrityError):
+        db.session.commit()
+    db.session.rollback()
+
+
+def test_concurrent_creation_returns_winner(db, make_user):
+    from models import Conversation
+    from chat_handlers import get_or_create_conversation
+
+    user = make_user("a")
+    user_id = user.id
+
+    def competing_insert(session, flush_context, instances):
+        # Başka bir istek bu isteğin sorgusu ile flush'ı arasında konuşmayı oluşturur
+        with db.engine.begin() as conn:
+            conn.execute(text("INSERT INTO conversation (user_id, created_at, updated_at) VALUES (:u, :t, :t)"),
+                         {"u": user_id, "t": datetime.utcnow()})
+
+    event.listen(db.session, "before_flush", competing_insert, once=True)
+    conversation = get_or_create_conversation(db, user_id)
+
+    assert Conversation.query.count() == 1
+    assert conversation.id == Conversation.query.one().id
+
+
+def test_migration_merges_duplicate_conversations(db, make_user):
+    from migrations import upgrade
+    from models import ChatMessage, Conversation
+
+    user, other = make_user("a"), make_user("b")
+    with db.engine.begin() as conn:
+        conn.execute(text("DROP INDEX uq_conversation_user_project"))
+        conn.execute(text("DELETE FROM schema_version WHERE version >= 8"))
+    started = datetime(2024, 1, 1)
+    duplicates = [Conversation(user_id=user.id, summary="özet", summarized_through_id=1) for _ in range(3)]
+    db.session.add_all(duplicates + [Conversation(user_id=other.id)])
+    db.session.flush()
+    for i, conversation in enumerate(duplicates):
+        db.session.add(ChatMessage(user_id=user.id, conversation_id=conversation.id, message=f"soru {i}",
+                                   timestamp=started + timedelta(seconds=i)))
+    db.session.commit()
+
+    assert upgrade() == [8]
+
+    db.session.expire_all()
+    kept = Conversation.query.filter_by(user_id=user.id).one()
+    assert kept.id == duplicates[0].id
+    assert (kept.summary, kept.summarized_through_id) == (None, None)
+    assert {row.conversation_id for row in ChatMessage.query.all()} == {kept.id}
+    assert Conversation.query.filter_by(user_id=other.id).count() == 1
@@ -0,0 +1,182 @@
+"""
+Konuşma belleği: sınırlı prompt bağlamı ve arka planda güncellenen özet
+"""
+import threading
+from types import SimpleNamespace
+from datetime import datetime, timedelta
+
+import pytest
+
+import conversation_memory
+from conversation_memory import (
+    CONVERSATION_RECENT_TURNS, CONVERSATION_SUMMARY_CHARS, FOLD_BATCH, TURN_CHAR_LIMIT,
+    SummaryWorker, fold, load, render, summarize,
+)
+
+
+@pytest.fixture
+def conversation(db, make_user):
+    from models import Conversation
+
+    conversation = Conversation(user_id=make_user("a").id, updated_at=datetime(2024, 1, 1))
+    db.session.add(conversation)
+    db.session.commit()
+    return conversation
+
+
+def add_turns(db, conversation, count, answered=True, question="soru"):
+    from models import ChatMessage
+
+    started = datetime(2024, 1, 1)
+    turns = [ChatMessage(user_id=conversation.user_id, conversation_id=conversation.id,
+                         message=f"{question} {i}", response=f"yanıt {i}" if answered else None,
+                         timestamp=started + timedelta(seconds=i)) for i in range(count)]
+    db.session.add_all(turns)
+    db.session.commit()
+    return [turn.id for turn in turns]
+
+
+def counting_summarizer():
+    calls = []
+
+    def generate(prompt):
+        calls.append(prompt)
+        return f"özet {len(calls)}"
+
+    generate.calls = calls
+    return generate
+
+
+def test_memory_keeps_only_recent_answered_turns(db, conversation, count_queries):
+    from models import Conversation
+
+    ids = add_turns(db, conversation, 20)
+    add_turns(db, conversation, 1, answered=False, question="bekleyen")
+    conversation_id = conversation.id
+    db.session.expire_all()
+    conversation = db.session.get(Conversation, conversation_id)
+
+    with count_queries() as counter:
+        memory = load(conversation)
+
+    assert counter.count == 1
+    assert memory["summary"] == ""
+    assert [turn[0] for turn in memory["turns"]] == ids[-CONVERSATION_RECENT_TURNS:]
+    assert "bekleyen" not in render(memory)
+
+
+def test_memory_starts_after_summary(db, conversation):
+    ids = add_turns(db, conversation, 10)
+    conversation.summary = "önceki özet"
+    conversation.summarized_through_id = ids[7]
+    db.session.commit()
+
+    memory = load(conversation)
+
+    assert [turn[0] for turn in memory["turns"]] == ids[8:]
+    text = render(memory)
+    assert text.index("önceki özet") < text.index("soru 8")
+
+
+def test_rendered_memory_is_bounded(db, conversation):
+    long_text = "x" * (TURN_CHAR_LIMIT * 3)
+    add_turns(db, conversation, 50, question=long_text)
+    conversation.summary = "y" * CONVERSATION_SUMMARY_CHARS
+    db.session.commit()
+
+    text = render(load(conversation))
+
+    # Özet + son turlar (her biri kırpılmış soru ve yanıt) + başlıklar; tur sayısından bağımsız
+    worst_turn = len("Kullanıcı: ") + TURN_CHAR_LIMIT + 1 + len("\nAsistan: ") + TURN_CHAR_LIMIT + 1
+    bound = CONVERSATION_SUMMARY_CHARS + 100 + CONVERSATION_RECENT_TURNS * (worst_turn + 1)
+    assert len(text) <= bound
+
+
+def test_memory_can_be_disabled(db, conversation, monkeypatch):
+    add_turns(db, conversation, 3)
+    monkeypatch.setattr(conversation_memory, "CONVERSATION_RECENT_TURNS", 0)
+
+    assert render(load(conversation)) == ""
+
+
+def test_fold_summarizes_all_but_recent_turns(db, conversation):
+    from models import Conversation
+
+    ids = add_turns(db, conversation, 10)
+    generate = counting_summarizer()
+
+    assert fold(conversation.id, generate) == 10 - CONVERSATION_RECENT_TURNS
+
+    db.session.expire_all()
+    conversation = db.session.get(Conversation, conversation.id)
+    assert conversation.summary == "özet 1"
+    assert conversation.summarized_through_id == ids[-CONVERSATION_RECENT_TURNS - 1]
+    # Özet güncellemesi konuşmanın son etkinlik zamanını değiştirmez
+    assert conversation.updated_at == datetime(2024, 1, 1)
+    assert "soru 0" in generate.calls[0]
+    assert f"soru {10 - CONVERSATION_RECENT_TURNS}" not in generate.calls[0]
+    # Katlanacak tur kalmadıysa model çağrılmaz
+    assert fold(conversation.id, generate) == 0
+    assert len(generate.calls) == 1
+
+
+def test_fold_loses_race_without_overwriting(db, conversation):
+    from models import Conversation
+
+    add_turns(db, conversation, 10)
+    inner = counting_summarizer()
+
+    def generate(prompt):
+        # Model yanıt verirken başka bir worker aynı turları katlar
+        assert fold(conversation_id, inner) > 0
+        return "geç kalan özet"
+
+    conversation_id = conversation.id
+    assert fold(conversation_id, generate) == 0
+
+    db.session.expire_all()
+    assert db.session.get(Conversation, conversation_id).summary == "özet 1"
+
+
+def test_fold_skips_empty_summary(db, conversation):
+    add_turns(db, conversation, 10)
+
+    assert fold(conversation.id, lambda prompt: None) == 0
+    db.session.refresh(conversation)
+    assert conversation.summarized_through_id is None
+
+
+def test_summarize_catches_up_in_batches(db, conversation):
+    from models import Conversation
+
+    ids = add_turns(db, conversation, 2 * FOLD_BATCH + CONVERSATION_RECENT_TURNS + 5)
+    generate = counting_summarizer()
+
+    assert summarize(conversation.id, generate) == 2 * FOLD_BATCH + 5
+    assert len(generate.calls) == 3
+    db.session.expire_all()
+    assert db.session.get(Conversation, conversation.id).summarized_through_id == ids[-CONVERSATION_RECENT_TURNS - 1]
+
+
+def test_worker_runs_one_job_per_conversation(app, db, conversation):
+    from models import Conversation
+
+    add_turns(db, conversation, 10)
+    generate = counting_summarizer()
+    worker = SummaryWorker(generate=generate)
+    conversation_id = conversation.id
+    # Tek thread'lik işçiyi, yazılmasını bekleyen başka bir konuşmanın işiyle meşgul et
+    write = SimpleNamespace(done=threading.Event())
+    assert worker.schedule(app, conversation_id + 1, after=write)
+
+    assert worker.schedule(app, conversation_id)
+    assert not worker.schedule(app, conversation_id)
+    write.done.set()
+    worker.flush()
+
+    assert len(generate.calls) == 1
+    db.session.expire_all()
+    assert db.session.get(Conversation, conversation_id).summary == "özet 1"
+    # İş bittikten sonra yeni turlar için tekrar planlanabilir
+    assert worker.schedule(app, conversation_id)
+    worker.flush()
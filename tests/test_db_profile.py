@@ -0,0 +1,84 @@
+"""
+SQLite production profili: PRAGMA'lar ve eşzamanlı okuyucu / yazıcılar
+"""
+import threading
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from db_profile import PROFILES
+
+
+def insert_message(conn, user_id, message):
+    conn.execute(text("INSERT INTO chat_message (user_id, message, timestamp) VALUES (:u, :m, CURRENT_TIMESTAMP)"),
+                 {"u": user_id, "m": message})
+
+
+def message_count(conn):
+    return conn.execute(text("SELECT COUNT(*) FROM chat_message")).scalar()
+
+
+@pytest.fixture
+def engine(make_app):
+    from models import db, User
+
+    # Ortamdaki SQLITE_PROFILE'dan bağımsız
+    app = make_app(SQLITE_PROFILE="production")
+    with app.app_context():
+        db.session.add(User(username="yazici", email="yazici@example.com", role="student", password_hash="x"))
+        db.session.commit()
+        yield db.engine
+
+
+def test_production_pragmas_are_applied(engine):
+    with engine.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        # NORMAL = 1
+        assert conn.execute(text("PRAGMA synchronous")).scalar() == 1
+        assert conn.execute(text("PRAGMA busy_timeout")).scalar() == PROFILES["production"]["busy_timeout"]
+    assert engine.pool.size() > 1
+
+
+def test_writer_commits_while_reader_holds_snapshot(engine):
+    with engine.connect() as reader, engine.connect() as writer:
+        reader.exec_driver_sql("BEGIN")
+        assert message_count(reader) == 0
+
+        # Rollback journal'da okuyucunun kilidi commit'i engellerdi; WAL'de beklemez
+        with writer.begin():
+            insert_message(writer, 1, "yeni")
+
+        # Okuyucu kendi anlık görüntüsünü görmeye devam eder
+        assert message_count(reader) == 0
+        reader.rollback()
+        assert message_count(reader) == 1
+
+
+def test_busy_writer_waits_instead_of_failing(engine):
+    holding, release = threading.Event(), threading.Event()
+
+    def hold_write_lock():
+        with engine.connect() as conn:
+            conn.exec_driver_sql("BEGIN IMMEDIATE")
+            insert_message(conn, 1, "ilk")
+            holding.set()
+            release.wait(5)
+            conn.commit()
+
+    holder = threading.Thread(target=hold_write_lock)
+    holder.start()
+    assert holding.wait(5)
+    # Kilit busy_timeout'tan çok önce bırakılır; ikinci yazıcı beklemeli, hata almamalı
+    threading.Timer(0.2, release.set).start()
+    try:
+        with engine.begin() as conn:
+            insert_message(conn, 1, "ikinci")
+    except OperationalError as e:  # pragma: no cover - başarısızlık mesajı için
+        pytest.fail(f"busy_timeout beklenmedi: {e}")
+    finally:
+        release.set()
+        holder.join()
+
+    with engine.connect() as conn:
+        assert message_count(conn) == 2
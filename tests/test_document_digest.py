@@ -0,0 +1,176 @@
+"""
+Döküman özetleri: niyet yönlendirme, içindekiler / özet seçimi, doğrudan yanıt
+ve proje kapsamı (RAG_LLM_BACKEND=stub, bellek içi Chroma koleksiyonu)
+"""
+import uuid
+
+import pytest
+
+import document_digest
+from document_digest import DocumentDigests, build_digest, digest_answer, llm_summarizer, whole_document_intent
+
+CHAPTERS = ["1. Giriş", "2. Sensör Ağı", "3. Sonuçlar"]
+HEADER = "AKILLI SERA PROJE RAPORU"
+
+
+def summarize(text, max_words, scope):
+    return text if scope == "döküman bölümünü" else f"Özet: {text.split('.')[0]}."
+
+
+@pytest.fixture
+def digests():
+    """Bellek içi Chroma koleksiyonunda özetler"""
+    import chromadb
+
+    collection = chromadb.EphemeralClient().create_collection(f"ozet_{uuid.uuid4().hex}")
+    return DocumentDigests(collection, embed_texts=lambda texts: [[float(len(t)), 1.0] for t in texts])
+
+
+def store(digests, filename, project_id, sections, summarizer=summarize):
+    digests.store(build_digest(filename, sections, summarizer), f"uploads/{filename}", project_id=project_id)
+
+
+def report_sections():
+    """Üç aralıklı, başlıklı ve her sayfada üst bilgisi olan rapor: [(aralık, metin)]"""
+    sections = []
+    for i, chapter in enumerate(CHAPTERS):
+        lines = [chapter, HEADER, f"{i + 1}.1 Alt Başlık {i + 1}"]
+        lines += [f"Bu bölümde konu{i} ölçümleri ayrıntılı olarak incelenmiştir ve sonuçlar tabloda verilmiştir."] * 3
+        sections.append((f"{i * 20 + 1}-{i * 20 + 20}", "\n".join(lines)))
+    return sections
+
+
+@pytest.fixture
+def stub_model(monkeypatch):
+    """RAG_LLM_BACKEND=stub ile süreçteki yanıt / özet modeli"""
+    import llm_guard
+    import rag_system
+
+    monkeypatch.setattr(rag_system, "LLM_BACKEND", "stub")
+    monkeypatch.setattr(rag_system, "_llm", None)
+    monkeypatch.setattr(llm_guard, "llm_breaker", llm_guard.CircuitBreaker())
+    return rag_system.get_llm()
+
+
+@pytest.fixture
+def report(digests, stub_model):
+    store(digests, "rapor.pdf", 1, report_sections(), llm_summarizer())
+    return digests
+
+
+@pytest.mark.parametrize("question, expected", [
+    ("Proje raporumu özetler misin?", "summary"),
+    ("rapor.pdf dosyasını özetle", "summary"),
+    ("Summarize the document", "summary"),
+    ("Raporun bölümleri neler?", "outline"),
+    ("What are the chapters of the report?", "outline"),
+    ("RAPORUN İÇİNDEKİLER KISMI", "outline"),
+    ("Bu konuşmayı özetle", None),
+    ("Sensör kalibrasyonu nasıl yapılır?", None),
+    ("Raporda nem ölçümü için hangi sensör kullanılmış?", None),
+])
+def test_whole_document_intent(question, expected):
+    assert whole_document_intent(question, ["rapor.pdf"]) == expected
+
+
+def test_intent_accepts_filename_without_document_word():
+    assert whole_document_intent("bütçe özetle", ["bütçe.pdf"]) == "summary"
+    assert whole_document_intent("bütçe özetle", ["rapor.pdf"]) is None
+
+
+def test_outline_question_gets_chapters(report, stub_model):
+    calls = stub_model.calls
+
+    kind, text, _ = digest_answer(report, "Raporun bölümleri neler?", project_id=1)
+
+    assert kind == "outline"
+    assert all(chapter in text for chapter in CHAPTERS)
+    # Her sayfada tekrar eden üst bilgi başlık sayılmaz
+    assert HEADER not in text
+    # Yanıt yükleme sırasında hazırlanan kayıtlardan gelir; model çağrılmaz
+    assert stub_model.calls == calls
+
+
+def test_summary_question_covers_every_range(report):
+    kind, text, chunks = digest_answer(report, "Raporu özetler misin?", project_id=1)
+
+    assert kind == "summary"
+    assert all(f"Sayfa {pages}" in text for pages, _ in report_sections())
+    assert [chunk["metadata"].get("page_range") for chunk in chunks] == [None, "1-20", "21-40", "41-60"]
+
+
+def test_outline_falls_back_to_summary_without_headings(digests):
+    store(digests, "notlar.pdf", 1, [("1-20", "Başlıksız uzun bir not metni burada yer alır."),
+                                     ("21-40", "İkinci kısım da başlık içermeyen düz bir metindir.")])
+
+    kind, text, _ = digest_answer(digests, "Dökümanın bölümleri neler?", project_id=1)
+
+    assert kind == "summary"
+    assert "Sayfa 21-40" in text
+
+
+def test_mentioned_file_is_chosen(report):
+    store(report, "sunum.pdf", 1, [("1-20", "Sunumda proje takvimi anlatılır.")])
+
+    assert digest_answer(report, "sunum.pdf dosyasını özetle", project_id=1)[1].startswith("sunum.pdf")
+    assert digest_answer(report, "rapor.pdf dosyasını özetle", project_id=1)[1].startswith("rapor.pdf")
+
+
+def rag_with(digests, model):
+    """Yalnızca özet yolunu kullanan RAG sistemi (vektör indeksi kurulmaz)"""
+    from rag_system import RAGSystem
+
+    rag = RAGSystem.__new__(RAGSystem)
+    rag.digests, rag.gemini_model = digests, model
+    return rag
+
+
+def test_direct_digest_answer_skips_model(report, stub_model, monkeypatch):
+    monkeypatch.setattr(document_digest, "DIGEST_DIRECT", True)
+    calls = stub_model.calls
+
+    answer = rag_with(report, stub_model).get_ai_response("Raporu özetler misin?", project_id=1)
+
+    assert answer == digest_answer(report, "Raporu özetler misin?", project_id=1)[1]
+    assert stub_model.calls == calls
+
+
+def test_digest_as_context_calls_model_once(report, stub_model, monkeypatch):
+    monkeypatch.setattr(document_digest, "DIGEST_DIRECT", False)
+    prompts = []
+    generate = stub_model.generate_content
+    monkeypatch.setattr(stub_model, "generate_content", lambda prompt: prompts.append(prompt) or generate(prompt))
+
+    answer = rag_with(report, stub_model).get_ai_response("Raporu özetler misin?", project_id=1)
+
+    assert answer.startswith("'Raporu özetler misin?' için öneriler")
+    prompt, = prompts
+    assert "rapor.pdf - özet" in prompt and "Sayfa 41-60" in prompt
+
+
+def test_digest_is_scoped_to_project(digests):
+    store(digests, "gizli.pdf", 1, [("1-20", "Gizli proje planı burada anlatılır.")])
+
+    assert digest_answer(digests, "Raporu özetle", project_id=1)[0] == "summary"
+    # Genel sohbet ve başka proje bu dökümanın özetini görmez
+    assert digest_answer(digests, "Raporu özetle") is None
+    assert digest_answer(digests, "özetle", project_id=None) is None
+    assert digest_answer(digests, "Raporu özetle", project_id=2) is None
+
+
+def test_ai_chat_refuses_inaccessible_project(db, make_user, socket_client):
+    from models import ChatMessage, Project
+
+    owner, stranger = make_user("sahip"), make_user("yabanci")
+    project = Project(title="Proje", description="Açıklama", owner_id=owner.id)
+    db.session.add(project)
+    db.session.commit()
+    client = socket_client(stranger)
+    client.get_received()
+
+    client.emit("ai_chat", {"message": "Raporu özetle", "project_id": project.id, "room": "oda"})
+
+    events = client.get_received()
+    assert [e["args"][0] for e in events if e["name"] == "error"] == [{"message": "Bu projeye erişim yetkiniz yok."}]
+    assert not [e for e in events if e["name"] in ("receive_message", "ai_typing")]
+    assert ChatMessage.query.count() == 0
@@ -0,0 +1,125 @@
+"""
+Model erişilemezse çıkarımsal yanıt: aranan chunk'lardan veya döküman özetlerinden
+"""
+import uuid
+from types import SimpleNamespace
+
+import pytest
+
+import llm_guard
+from llm_guard import CircuitBreaker
+from rag_system import CHAT_ROLE_PROMPTS, CONTEXT_CANDIDATES, answer_with_fallback, extractive_fallback
+from document_digest import DocumentDigests, build_digest, digest_answer
+
+
+class FailingModel:
+    def __init__(self):
+        self.calls = 0
+
+    def generate_content(self, prompt):
+        self.calls += 1
+        raise ConnectionError("bağlantı kesildi")
+
+
+class RecordingModel:
+    def __init__(self):
+        self.prompts = []
+
+    def generate_content(self, prompt):
+        self.prompts.append(prompt)
+        return SimpleNamespace(text="yanıt")
+
+
+@pytest.fixture
+def breaker(monkeypatch):
+    breaker = CircuitBreaker()
+    monkeypatch.setattr(llm_guard, "llm_breaker", breaker)
+    return breaker
+
+
+CHUNKS = [
+    {"text": "Nem ölçümü için DHT22 sensörü kullanıldı. Sensör her dakika okunur.",
+     "score": 0.9, "metadata": {"filename": "rapor.pdf", "page_range": "3-4"}},
+    {"text": "Proje ekibi dört kişiden oluşur.", "score": 0.2, "metadata": {"filename": "rapor.pdf"}},
+]
+
+
+def test_unavailable_model_answers_from_chunks(breaker):
+    model = FailingModel()
+
+    answer = answer_with_fallback(model, "prompt", "Nem ölçümü için hangi sensör kullanıldı?", CHUNKS)
+
+    assert model.calls == 1
+    assert answer.startswith("[Hızlı yanıt] AI modeli hata verdi")
+    assert "DHT22" in answer and "(rapor.pdf, s. 3-4)" in answer
+    assert breaker.metrics()["fallbacks"] == 1
+
+
+def test_unconfigured_model_answers_from_chunks(breaker):
+    answer = answer_with_fallback(None, "prompt", "Nem ölçümü için hangi sensör kullanıldı?", CHUNKS)
+
+    assert answer.startswith("[Hızlı yanıt] AI modeli yapılandırılmamış")
+    assert "DHT22" in answer
+
+
+def test_digest_answer_carries_sections_for_fallback():
+    import chromadb
+
+    collection = chromadb.EphemeralClient().create_collection(f"ozet_{uuid.uuid4().hex}")
+    digests = DocumentDigests(collection, embed_texts=lambda texts: [[float(len(t)), 1.0] for t in texts])
+    sections = [("1-2", "Giriş bölümünde projenin amacı anlatılır."),
+                ("3-4", "Nem ölçümü için DHT22 sensörü kullanıldı.")]
+
+    def summarize(text, max_words, scope):
+        return text if scope == "döküman bölümünü" else "Akıllı sera projesinin raporu."
+
+    digest = build_digest("rapor.pdf", sections, summarize)
+    digests.store(digest, "uploads/rapor.pdf", project_id=1)
+
+    kind, text, chunks = digest_answer(digests, "Raporu özetler misin?", project_id=1)
+
+    assert kind == "summary"
+    assert [chunk["metadata"].get("page_range") for chunk in chunks] == [None, "1-2", "3-4"]
+    # Model bu bağlamla yanıt veremezse özetlerden seçilen cümleler sayfasıyla gösterilir
+    answer = extractive_fallback("Nem ölçümü için hangi sensör kullanıldı?", chunks, "timeout")
+    assert "AI modeli zamanında yanıt vermedi" in answer
+    assert "DHT22" in answer and "s. 3-4" in answer
+
+
+def rag_with_chunks(model, chunks):
+    """Arama sonucu sabit RAG sistemi (vektör indeksi kurulmaz); istenen chunk sayıları kaydedilir"""
+    from rag_system import RAGSystem
+
+    rag = RAGSystem.__new__(RAGSystem)
+    rag.gemini_model = model
+    rag.requested = []
+
+    def search_chunks(query, top_k=5, mmr=False, **kwargs):
+        rag.requested.append(top_k)
+        return chunks[:top_k]
+
+    rag.search_chunks = search_chunks
+    return rag
+
+
+def test_generate_response_uses_chat_prompt_and_top_k(breaker):
+    model = RecordingModel()
+    rag = rag_with_chunks(model, CHUNKS)
+
+    assert rag.generate_response("Hangi sensör?", user_role="advisor", top_k=1) == "yanıt"
+    assert rag.generate_response("Hangi sensör?") == "yanıt"
+
+    assert rag.requested == [1, CONTEXT_CANDIDATES]
+    first, second = model.prompts
+    assert CHAT_ROLE_PROMPTS["advisor"] in first and CHAT_ROLE_PROMPTS["student"] in second
+    assert "DHT22" in first and "dört kişiden" not in first
+    assert "dört kişiden" in second
+
+
+def test_generate_response_falls_back_to_retrieved_chunks(breaker):
+    rag = rag_with_chunks(FailingModel(), CHUNKS)
+
+    answer = rag.generate_response("Nem ölçümü için hangi sensör kullanıldı?")
+
+    assert answer.startswith("[Hızlı yanıt] AI modeli hata verdi")
+    assert "DHT22" in answer
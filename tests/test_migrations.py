@@ -0,0 +1,99 @@
+"""
+Sürümlü migration'lar ve sık kullanılan sorguların indeks kullanımı
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import func, text, tuple_
+
+from models import db, ChatMessage, Competition, Project, User
+from chat_handlers import chat_history_query
+from activity import feed_query
+
+
+# (ad, sorgu, kullanması beklenen indeks); sayfaların gerçekte çalıştırdığı sorgular
+HOT_QUERIES = [
+    ("chat geçmişi (proje)", lambda: chat_history_query(project_id=1).limit(51), "ix_chat_message_project_timestamp"),
+    ("chat geçmişi (tümü)", lambda: chat_history_query().limit(51), "ix_chat_message_timestamp"),
+    ("chat geçmişi (imleç)", lambda: chat_history_query(project_id=1, before_id=500).limit(51),
+     "ix_chat_message_project_timestamp (project_id=? AND timestamp<?)"),
+    ("chat geçmişi (kendi)", lambda: chat_history_query(user_id=1).limit(51), "ix_chat_message_user_timestamp"),
+    ("kullanıcı mesajları",
+     lambda: ChatMessage.query.filter_by(user_id=1).order_by(ChatMessage.timestamp.desc()).limit(3),
+     "ix_chat_message_user_timestamp"),
+    ("öğrenci projeleri", lambda: Project.query.filter_by(owner_id=1), "ix_project_owner_updated"),
+    ("danışman projeleri", lambda: Project.query.filter_by(advisor_id=1), "ix_project_advisor_updated"),
+    ("ilgili projeler", lambda: Project.query.filter(Project.category == "web", Project.id != 1).limit(5),
+     "ix_project_category"),
+    ("aktif yarışmalar", lambda: Competition.query.filter_by(is_active=True), "ix_competition_is_active"),
+    ("admin: kullanıcılar", lambda: User.query.order_by(User.created_at.desc(), User.id.desc()).limit(20),
+     "ix_user_created_at"),
+    ("admin: rol sayımı", lambda: db.session.query(User.role, func.count(User.id)).group_by(User.role),
+     "ix_user_role_created"),
+    ("admin: projeler", lambda: Project.query.order_by(Project.updated_at.desc(), Project.id.desc()).limit(20),
+     "ix_project_updated"),
+    ("admin: durum sayımı",
+     lambda: db.session.query(Project.status, func.count(Project.id)).group_by(Project.status),
+     "ix_project_status_updated"),
+    ("proje listesi (imleç)", lambda: Project.query.filter(
+        Project.owner_id == 1, tuple_(Project.updated_at, Project.id) < tuple_(datetime(2024, 1, 2), 500)
+    ).order_by(Project.updated_at.desc(), Project.id.desc()).limit(101),
+     "ix_project_owner_updated (owner_id=? AND updated_at<?)"),
+    ("aktivite akışı", lambda: feed_query(1).limit(10), "ix_activity_user_created (user_id=?)"),
+    ("admin: aktivite", lambda: feed_query(None, before_id=100).limit(20), "ix_activity_created (created_at<?)"),
+]
+
+
+def query_plan(query):
+    """ORM sorgusunun SQLite sorgu planı (detay satırları)"""
+    sql = str(query.statement.compile(db.engine, compile_kwargs={"literal_binds": True}))
+    return [row[-1] for row in db.session.execute(text(f"EXPLAIN QUERY PLAN {sql}"))]
+
+
+def seed_chat(count):
+    users = [User(username=f"u{i}", email=f"u{i}@example.com", role="student", password_hash="x") for i in range(5)]
+    db.session.add_all(users)
+    db.session.flush()
+    started = datetime(2024, 1, 1)
+    db.session.add_all(ChatMessage(user_id=users[i % 5].id, project_id=1, message=f"mesaj {i}",
+                                   timestamp=started + timedelta(seconds=i)) for i in range(count))
+    db.session.commit()
+
+
+def test_upgrade_is_idempotent(app):
+    from migrations import MIGRATIONS, upgrade, current_version
+
+    assert current_version() == MIGRATIONS[-1][0]
+    assert upgrade() == []
+    versions = db.session.execute(text("SELECT version FROM schema_version ORDER BY version")).scalars().all()
+    assert versions == [version for version, _, _ in MIGRATIONS]
+
+
+def test_migrations_restore_indexes_without_losing_rows(app):
+    from migrations import MIGRATIONS, upgrade, current_version
+
+    seed_chat(200)
+    # Eski şemayı taklit et: indeksleri kaldır, migration ile geri getir
+    with db.engine.begin() as conn:
+        for _, _, index in HOT_QUERIES:
+            conn.execute(text(f"DROP INDEX IF EXISTS {index.split()[0]}"))
+        conn.execute(text("DELETE FROM schema_version WHERE version >= 2"))
+
+    applied = upgrade()
+
+    assert applied == [version for version, _, _ in MIGRATIONS if version >= 2]
+    assert current_version() == MIGRATIONS[-1][0]
+    assert db.session.execute(text("SELECT COUNT(*) FROM chat_message")).scalar() == 200
+    indexes = set(db.session.execute(text("SELECT name FROM sqlite_master WHERE type = 'index'")).scalars())
+    assert {index.split()[0] for _, _, index in HOT_QUERIES} <= indexes
+
+
+@pytest.mark.parametrize("query, index", [(query, index) for _, query, index in HOT_QUERIES],
+                         ids=[label for label, _, _ in HOT_QUERIES])
+def test_hot_query_uses_index(app, query, index):
+    seed_chat(200)
+    db.session.execute(text("ANALYZE"))
+
+    plan = query_plan(query())
+
+    assert any(index in line for line in plan), plan
@@ -0,0 +1,85 @@
+"""
+Şifre hash havuzu: sınırı aşan eşzamanlı istekler 503 alır, zaman aşımına uğrayan hash yuvasını bitene kadar tutar
+"""
+import threading
+
+import pytest
+
+from password_hashing import PasswordHashBusy, PasswordHasher, RETRY_AFTER, password_hasher
+
+
+def occupy(hasher, count):
+    """count hash yuvasını, dönen olay set edilene kadar meşgul tut"""
+    release, threads = threading.Event(), []
+    for _ in range(count):
+        started = threading.Event()
+
+        def job(started=started):
+            started.set()
+            release.wait(5)
+
+        thread = threading.Thread(target=hasher._run, args=(job,))
+        thread.start()
+        assert started.wait(5)
+        threads.append(thread)
+    return release, threads
+
+
+@pytest.fixture
+def pool():
+    """Uygulamanın hasher'ı tek worker'lı, kuyruksuz havuzla; ayarlar test sonunda geri alınır"""
+    configured = (password_hasher.method, password_hasher.workers, password_hasher.max_queue)
+    password_hasher.configure(method="pbkdf2:sha256:1", workers=1, max_queue=0)
+    yield password_hasher
+    method, workers, max_queue = configured
+    password_hasher.configure(method=method, workers=workers, max_queue=max_queue)
+
+
+def test_requests_beyond_pool_are_rejected_without_waiting():
+    hasher = PasswordHasher(method="pbkdf2:sha256:1", workers=2, max_queue=0, timeout=5)
+    release, threads = occupy(hasher, 2)
+    try:
+        with pytest.raises(PasswordHashBusy, match="kuyruğu dolu"):
+            hasher.hash("sifre123")
+        assert hasher.rejected == 1
+    finally:
+        release.set()
+        for thread in threads:
+            thread.join()
+
+    assert hasher.verify(hasher.hash("sifre123"), "sifre123")
+
+
+def test_login_returns_503_while_pool_is_full(app, db, make_user, pool):
+    user = make_user("ogrenci")
+    user.set_password("sifre123")
+    db.session.commit()
+    form = {"username": "ogrenci", "password": "sifre123"}
+
+    release, threads = occupy(pool, 1)
+    try:
+        response = app.test_client().post("/auth/login", data=form)
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == str(RETRY_AFTER)
+    finally:
+        release.set()
+        for thread in threads:
+            thread.join()
+
+    assert app.test_client().post("/auth/login", data=form).status_code == 302
+
+
+def test_timed_out_hash_keeps_its_slot_until_it_finishes():
+    hasher = PasswordHasher(method="pbkdf2:sha256:1", workers=1, max_queue=0, timeout=0.1)
+    release = threading.Event()
+
+    with pytest.raises(PasswordHashBusy, match="zaman aşımı"):
+        hasher._run(release.wait, 5)
+    # İstek döndü ama hash hâlâ çalışıyor; yeni iş havuzda birikmez
+    with pytest.raises(PasswordHashBusy, match="kuyruğu dolu"):
+        hasher.hash("sifre123")
+
+    release.set()
+    # Tek worker: sıradaki iş ancak önceki bitip yuvasını bıraktıktan sonra çalışır
+    hasher._get_executor().submit(lambda: None).result(5)
+    assert hasher.verify(hasher.hash("sifre123"), "sifre123")
@@ -0,0 +1,147 @@
+"""
+Mesaj kuyruğuyla iki sunucu süreci: oda yayını, sunucu dışı yayın ve yeniden bağlanma
+"""
+import os
+import sys
+import time
+import socket
+import subprocess
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SERVER_SCRIPT = """
+from app import create_app, socketio
+app = create_app()
+socketio.run(app, host="127.0.0.1", port={port}, allow_unsafe_werkzeug=True, log_output=False)
+"""
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_for(condition, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.05)
+    return condition()
+
+
+class Session:
+    """HTTP ile giriş yapmış, odaya katılmış Socket.IO istemcisi"""
+
+    def __init__(self, port, username, auth=None):
+        import requests
+        import socketio as socketio_client
+
+        base_url = f"http://127.0.0.1:{port}"
+        deadline = time.monotonic() + 60
+        while True:
+            try:
+                http = requests.Session()
+                http.post(f"{base_url}/auth/login", data={"username": username, "password": "sifre123"})
+                break
+            except requests.ConnectionError:
+                if time.monotonic() > deadline:
+                    raise
+                time.sleep(0.2)
+        cookie = "; ".join(f"{name}={value}" for name, value in http.cookies.items())
+        self.received, self.saved, self.resumed = [], [], []
+        self.client = socketio_client.Client()
+        self.client.on("receive_message", self.received.append)
+        self.client.on("message_saved", self.saved.append)
+        self.client.on("chat_resume", self.resumed.append)
+        self.client.connect(base_url, headers={"Cookie": cookie}, transports=["websocket"], auth=auth)
+        self.client.call("join_room", {"room": "oda"})
+
+    def send(self, text):
+        count = len(self.saved)
+        self.client.emit("send_message", {"message": text, "room": "oda"})
+        assert wait_for(lambda: len(self.saved) > count)
+        return self.saved[-1]["id"]
+
+
+@pytest.fixture
+def servers(tmp_path, make_app):
+    from models import db, User
+
+    app = make_app()
+    with app.app_context():
+        for name in ("gonderen", "alici"):
+            user = User(username=name, email=f"{name}@example.com", role="student", first_name="Ad", last_name=name)
+            user.set_password("sifre123")
+            db.session.add(user)
+        db.session.commit()
+
+    queue = f"filesystem://{tmp_path / 'kuyruk'}"
+    env = dict(os.environ, DATABASE_URL=app.config["SQLALCHEMY_DATABASE_URI"],
+               SOCKETIO_MESSAGE_QUEUE=queue, RAG_PRELOAD="False")
+    ports = [free_port(), free_port()]
+    processes = [subprocess.Popen([sys.executable, "-c", SERVER_SCRIPT.format(port=port)], cwd=ROOT, env=env,
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL) for port in ports]
+    try:
+        yield ports, queue
+    finally:
+        for process in processes:
+            process.terminate()
+            process.wait()
+
+
+def ai_record(text):
+    """Arka plan AI işinin yayınladığı kayıt (chat_handlers.format_chat_history biçimi)"""
+    return {"id": "ai_7", "turn_id": 7, "message": text, "username": "AI Asistan", "full_name": "RAG AI Asistan",
+            "user_role": "ai", "timestamp": "12:00", "ts": 1700000000, "room": "oda", "is_ai": True}
+
+
+def test_room_broadcast_reaches_other_server(servers):
+    from socketio_queue import external_broadcast
+
+    (first, second), queue = servers
+    sender, receiver = Session(first, "gonderen"), Session(second, "alici")
+
+    for i in range(5):
+        sender.send(f"mesaj {i}")
+    # Arka plan işi gibi: uygulama bağlamı olmadan kuyruğa yaz
+    external_broadcast("oda", ai_record("dışarıdan"), url=queue)
+
+    assert wait_for(lambda: len(receiver.received) == 6)
+    assert [m["message"] for m in receiver.received] == [f"mesaj {i}" for i in range(5)] + ["dışarıdan"]
+
+
+def test_resume_on_other_server_includes_its_messages(servers):
+    (first, second), _ = servers
+    # İkinci sunucunun tamponu yalnızca kendi üzerinden yazılan mesajı görür
+    on_second = Session(second, "gonderen")
+    last_seen = on_second.send("ikinci sunucu")
+    on_second.client.disconnect()
+
+    on_first = Session(first, "gonderen")
+    missed = [on_first.send("birinci sunucu 1"), on_first.send("birinci sunucu 2")]
+    on_first.client.disconnect()
+
+    reconnected = Session(second, "gonderen")
+    reconnected.client.emit("resume_chat", {"rooms": {"oda": last_seen}})
+    assert wait_for(lambda: reconnected.resumed)
+    page, = reconnected.resumed
+    assert page["source"] == "database"
+    assert [m["id"] for m in page["messages"]] == missed
+
+
+def test_external_broadcast_reaches_compact_clients(servers):
+    import msgpack
+    from socketio_queue import external_broadcast
+
+    (first, second), queue = servers
+    compact = Session(first, "alici", auth={"protocol": 2})
+    binary = Session(second, "gonderen", auth={"protocol": 2, "encoding": "msgpack"})
+
+    external_broadcast("oda", ai_record("dışarıdan"), url=queue)
+
+    assert wait_for(lambda: compact.received and binary.received)
+    expected = {"id": "ai_7", "u": 0, "m": "dışarıdan", "t": 1700000000, "tid": 7}
+    assert compact.received == [expected]
+    assert [msgpack.unpackb(data, raw=False) for data in binary.received] == [expected]
@@ -0,0 +1,102 @@
+"""
+Oturum kullanıcısı önbelleği: SQL'siz yükleme ve eşzamanlı güncellemelerde geçersiz kılma
+"""
+import threading
+
+import pytest
+from sqlalchemy import event
+
+from user_cache import load_user, user_cache
+
+
+def in_other_request(app, func):
+    """func'ı ayrı thread'de, ayrı uygulama bağlamında (ayrı oturum) çalıştır"""
+    result = {}
+
+    def run():
+        with app.app_context():
+            result["value"] = func()
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    thread.join(10)
+    return result.get("value")
+
+
+def cached_role(app, user_id):
+    return in_other_request(app, lambda: load_user(user_id).role)
+
+
+@pytest.fixture
+def user(make_user):
+    return make_user("a")
+
+
+def test_cached_load_runs_no_sql(app, user, count_queries):
+    user_id = user.id
+    assert cached_role(app, user_id) == "student"
+
+    with count_queries() as counter:
+        assert cached_role(app, user_id) == "student"
+
+    assert counter.count == 0
+
+
+def test_role_change_is_visible_on_next_load(app, db, user):
+    user_id = user.id
+    assert cached_role(app, user_id) == "student"
+
+    user.role = "advisor"
+    db.session.commit()
+
+    assert cached_role(app, user_id) == "advisor"
+
+
+def test_load_racing_an_update_does_not_cache_stale_row(app, db, user):
+    from models import User
+
+    user_id = user.id
+
+    def promote():
+        row = db.session.get(User, user_id)
+        row.role = "admin"
+        db.session.commit()
+
+    def update_while_loading(target, context):
+        # Yükleme satırı okuduktan sonra, önbelleğe yazmadan önce başka istek günceller
+        in_other_request(app, promote)
+
+    event.listen(User, "load", update_while_loading, once=True)
+    try:
+        assert cached_role(app, user_id) == "student"
+    finally:
+        if event.contains(User, "load", update_while_loading):
+            event.remove(User, "load", update_while_loading)
+
+    assert user_cache.get(user_id) is None
+    assert cached_role(app, user_id) == "admin"
+
+
+def test_read_between_flush_and_commit_is_invalidated(app, db, user):
+    user_id = user.id
+    user.role = "advisor"
+    db.session.flush()
+
+    # Flush'ta önbellek temizlendi; commit'ten önce başka istek eski satırı okuyup önbelleğe yazar
+    assert cached_role(app, user_id) == "student"
+    assert user_cache.get(user_id) is not None
+
+    db.session.commit()
+
+    assert cached_role(app, user_id) == "advisor"
+
+
+def test_rollback_keeps_cache(app, db, user):
+    user_id = user.id
+    user.role = "advisor"
+    db.session.flush()
+    db.session.rollback()
+
+    assert cached_role(app, user_id) == "student"
+    db.session.commit()
+    assert user_cache.get(user_id) is not None
@@ -0,0 +1,105 @@
+"""
+Vektör veritabanı broker'ı: tek yazıcı ve toplu yazma, adres çakışması ve platform farkları
+"""
+import logging
+import os
+import threading
+import time
+
+import pytest
+
+import vector_store
+from vector_store import VectorStoreClient
+
+
+@pytest.fixture
+def no_authkey(monkeypatch):
+    """Anahtarsız kurulum: broker veritabanı klasöründeki Unix soketinde dinler"""
+    monkeypatch.delenv("VECTOR_STORE_AUTHKEY", raising=False)
+    monkeypatch.delenv("VECTOR_STORE_ADDRESS", raising=False)
+    monkeypatch.delenv("SECRET_KEY", raising=False)
+
+
+def test_without_unix_socket_locking_opens_in_process(tmp_path, no_authkey, monkeypatch, caplog):
+    # Windows'ta fcntl yoktur
+    monkeypatch.setattr(vector_store, "fcntl", None)
+    client = VectorStoreClient(str(tmp_path))
+
+    with caplog.at_level(logging.WARNING, logger="vector_store"):
+        collection = client.get_or_create_collection("belgeler")
+        collection.upsert(ids=["a"], embeddings=[[1.0, 0.0]], documents=["metin"])
+
+    assert collection.count() == 1
+    assert client.broker is not None
+    assert not os.path.exists(tmp_path / vector_store.SOCKET_NAME)
+    assert "tek süreç modunda" in caplog.text
+    client.broker.stop()
+
+
+def test_live_brokers_socket_is_not_taken_over(tmp_path, no_authkey):
+    import fcntl
+
+    client = VectorStoreClient(str(tmp_path))
+    socket_path = tmp_path / vector_store.SOCKET_NAME
+    # Başka bir süreçteki broker: kilidi tutar, soket dosyası yerinde
+    with open(f"{socket_path}.lock", "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        socket_path.touch()
+
+        assert client._try_become_broker() is False
+
+        assert client.broker is None
+        assert socket_path.exists()
+
+
+def test_second_client_talks_to_the_running_broker(tmp_path, no_authkey):
+    first, second = VectorStoreClient(str(tmp_path)), VectorStoreClient(str(tmp_path))
+    first.get_or_create_collection("belgeler").upsert(ids=["a"], embeddings=[[1.0, 0.0]])
+    try:
+        second.get_or_create_collection("belgeler").upsert(ids=["b"], embeddings=[[0.0, 1.0]])
+
+        assert first.broker is not None and second.broker is None
+        assert first.get_or_create_collection("belgeler").count() == 2
+    finally:
+        first.broker.stop()
+
+
+def test_concurrent_writes_are_batched(tmp_path, monkeypatch):
+    broker = vector_store.VectorStoreBroker(str(tmp_path), max_delay=1.0)
+    collection = broker._collection("belgeler")
+    upsert, calls = type(collection).upsert, []
+    first_write, release = threading.Event(), threading.Event()
+
+    def recording_upsert(self, **kwargs):
+        calls.append(list(kwargs["ids"]))
+        if len(calls) == 1:
+            # Yazıcı ilk yazmada beklerken diğer istekler kuyrukta birikir
+            first_write.set()
+            release.wait(5)
+        return upsert(self, **kwargs)
+
+    monkeypatch.setattr(type(collection), "upsert", recording_upsert)
+
+    def write(i):
+        broker.execute("upsert", "belgeler", {"ids": [f"id{i}"], "embeddings": [[float(i), 1.0]]})
+
+    threads = [threading.Thread(target=write, args=(0,))]
+    threads[0].start()
+    assert first_write.wait(5)
+    threads += [threading.Thread(target=write, args=(i,)) for i in range(1, 9)]
+    for thread in threads[1:]:
+        thread.start()
+    deadline = time.monotonic() + 5
+    while broker._queue.qsize() < 8 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    try:
+        assert calls[0] == ["id0"]
+        assert sorted(calls[1]) == [f"id{i}" for i in range(1, 9)]
+        assert len(calls) == 2
+        assert collection.count() == 9
+    finally:
+        broker.stop()
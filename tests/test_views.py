@@ -0,0 +1,83 @@
+"""
+Sayfaların sorgu sayısı satır sayısıyla büyümemeli (N+1 kontrolü)
+Yeni bir sayfa eklendiğinde VIEWS listesine de ekleyin.
+"""
+from datetime import datetime, timedelta
+
+
+# (kullanıcı id, URL); id 1: öğrenci, id 2: danışman, id 3: admin
+# Proje 1 öğrencinin, proje 2 danışmanın danışmanlık yaptığı proje
+VIEWS = [
+    (1, "/dashboard"), (1, "/projects"), (1, "/project/1"),
+    (2, "/dashboard"), (2, "/projects"), (2, "/project/2"),
+    (3, "/projects"), (3, "/admin/dashboard"),
+]
+
+
+def seed_views(db, rows):
+    """
+    Her projesi farklı sahip, danışman ve yarışmaya bağlı veri
+    (ilişkiler tembel yüklenirse sorgu sayısı satır sayısıyla büyür)
+    """
+    from models import User, Project, Competition
+
+    users = [("student", "ogrenci"), ("advisor", "danisman"), ("admin", "admin")]
+    users += [("advisor", f"d{i}") for i in range(rows)] + [("student", f"o{i}") for i in range(rows)]
+    db.session.execute(User.__table__.insert(), [
+        {"username": name, "email": f"{name}@example.com", "password_hash": "x", "role": role,
+         "first_name": "Ad", "last_name": name, "is_active": True}
+        for role, name in users
+    ])
+    db.session.execute(Competition.__table__.insert(), [
+        {"name": f"Yarışma {i}", "description": "Açıklama", "is_active": i < 5, "created_by": 3}
+        for i in range(rows)
+    ])
+    first_advisor, first_student = 4, 4 + rows
+    projects = []
+    for i in range(rows):
+        # Öğrencinin projesi: her birinin danışmanı farklı
+        projects.append({"owner_id": 1, "advisor_id": first_advisor + i})
+        # Danışmanın projesi: her birinin sahibi farklı
+        projects.append({"owner_id": first_student + i, "advisor_id": 2})
+    db.session.execute(Project.__table__.insert(), [
+        dict(project, title=f"Proje {i}", description="Açıklama", category="web", technologies="python",
+             status=("planning", "development", "testing", "completed")[i % 4], competition_id=i // 2 + 1,
+             created_at=datetime(2024, 1, 1), updated_at=datetime(2024, 1, 1) + timedelta(minutes=i))
+        for i, project in enumerate(projects)
+    ])
+    db.session.commit()
+
+
+def view_query_counts(app, count_queries):
+    """Her sayfanın sorgu sayısı (oturum kullanıcısı ilk istekte yüklenir, sonra önbellekten gelir)"""
+    from models import db
+
+    with app.app_context():
+        engine = db.engine
+    clients = {}
+    for user_id in {user_id for user_id, _ in VIEWS}:
+        clients[user_id] = app.test_client()
+        with clients[user_id].session_transaction() as session:
+            session["_user_id"] = str(user_id)
+    counts = {}
+    for user_id, url in VIEWS:
+        with count_queries(engine) as counter:
+            response = clients[user_id].get(url)
+        assert response.status_code == 200, url
+        counts[url, user_id] = counter.count
+    return counts
+
+
+def test_query_count_does_not_grow_with_rows(make_app, count_queries):
+    from models import db
+
+    counts = []
+    # Öğrenci/danışman başına proje 3 -> 30 (admin listesinde 6 -> 60)
+    for rows in (3, 30):
+        app = make_app()
+        with app.app_context():
+            seed_views(db, rows)
+        counts.append(view_query_counts(app, count_queries))
+
+    small, large = counts
+    assert {view: (small[view], large[view]) for view in small if small[view] != large[view]} == {}
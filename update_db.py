@@ -1,22 +1,75 @@
 #!/usr/bin/env python3
 """
 Veritabanı şemasını güncelle
+
+    python update_db.py           # Bekleyen migration'ları uygula (veriler korunur)
+    python update_db.py --status  # Mevcut şema sürümünü göster
+    python update_db.py --reset   # Tüm tabloları silip yeniden oluştur (VERİLER SİLİNİR)
+    python update_db.py --prune-activity [--days N]  # Saklama süresinden eski aktiviteleri sil
+    python update_db.py --rebuild-activity           # Aktivite kaydını projeler ve mesajlardan yeniden oluştur
 """
 import os
 import sys
+import argparse
 
 # Add current directory to path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from app import app, db
+from app import create_app, db
+
+app = create_app()
+
+def migrate_database():
+    """Bekleyen migration'ları veri kaybı olmadan uygula"""
+    from migrations import MIGRATIONS, current_version, upgrade
+    with app.app_context():
+        try:
+            applied = upgrade()
+            if applied:
+                print(f"Uygulanan migration'lar: {', '.join(map(str, applied))}")
+            else:
+                print("Veritabanı zaten güncel.")
+            print(f"Şema sürümü: {current_version()} / {MIGRATIONS[-1][0]}")
+        except Exception as e:
+            print(f"Hata: {e}")
+            return False
+    return True
+
+def show_status():
+    """Şema sürümünü ve bekleyen migration'ları göster"""
+    from migrations import MIGRATIONS, current_version
+    with app.app_context():
+        version = current_version()
+        print(f"Şema sürümü: {version}")
+        for number, description, _ in MIGRATIONS:
+            state = 'uygulandı' if number <= version else 'bekliyor'
+            print(f"  {number:>3}  {state:<10} {description}")
+
+def prune_activity(days):
+    """Saklama süresinden eski aktivite kayıtlarını sil (cron ile düzenli çalıştırılabilir)"""
+    from activity import prune_activity as prune
+    with app.app_context():
+        deleted = prune(days)
+        print(f"Silinen aktivite kaydı: {deleted}")
+
+def rebuild_activity():
+    """Aktivite kaydını mevcut projeler ve chat mesajlarından yeniden oluştur"""
+    from activity import backfill_activity
+    with app.app_context():
+        with db.engine.begin() as conn:
+            inserted = backfill_activity(conn, rebuild=True)
+        print(f"Oluşturulan aktivite kaydı: {inserted}")
 
 def update_database():
-    """Veritabanı şemasını güncelle"""
+    """Veritabanı şemasını sıfırla (tüm veriler silinir)"""
     with app.app_context():
         try:
             # Drop all tables and recreate
             db.drop_all()
-            db.create_all()
+            db.session.execute(db.text('DROP TABLE IF EXISTS schema_version'))
+            db.session.commit()
+            from migrations import upgrade
+            upgrade()
             print("Veritabanı şeması güncellendi!")
             
             # Create admin user
@@ -39,4 +92,22 @@ def update_database():
             db.session.rollback()
 
 if __name__ == "__main__":
-    update_database()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Veritabanı şemasını güncelle")
+    parser.add_argument('--reset', action='store_true', help='Tabloları silip yeniden oluştur (veriler silinir)')
+    parser.add_argument('--status', action='store_true', help='Şema sürümünü göster')
+    parser.add_argument('--prune-activity', action='store_true', help='Saklama süresinden eski aktiviteleri sil')
+    parser.add_argument('--days', type=int, default=None, help='Saklama süresi (gün, varsayılan ACTIVITY_RETENTION_DAYS)')
+    parser.add_argument('--rebuild-activity', action='store_true', help='Aktivite kaydını yeniden oluştur')
+    args = parser.parse_args()
+
+    if args.status:
+        show_status()
+    elif args.prune_activity:
+        from activity import ACTIVITY_RETENTION_DAYS
+        prune_activity(ACTIVITY_RETENTION_DAYS if args.days is None else args.days)
+    elif args.rebuild_activity:
+        rebuild_activity()
+    elif args.reset:
+        update_database()
+    else:
+        sys.exit(0 if migrate_database() else 1)
@@ -0,0 +1,90 @@
+"""
+Oturum Kullanıcısı Önbelleği
+flask_login `user_loader` için süreli (TTL), boyutu sınırlı önbellek
+
+Her HTTP isteği ve her Socket.IO olayı `current_user` için kullanıcıyı yükler.
+Önbellekte kullanıcının kolon değerleri tutulur; her yüklemede bunlardan yeni
+bir nesne oluşturulup `db.session.merge(load=False)` ile isteğin oturumuna
+SQL çalıştırmadan eklenir (nesneler thread'ler arasında paylaşılmaz).
+
+Kullanıcı satırı ORM ile güncellendiğinde veya silindiğinde (profil, şifre,
+rol değişiklikleri) kayıt flush'ta ve commit'ten sonra tekrar silinir.
+Önbellek süreç içidir: diğer worker'lar değişikliği en geç USER_CACHE_TTL
+saniye sonra görür. USER_CACHE_TTL=0 önbelleği kapatır.
+"""
+import os
+import time
+
+from cache import Invalidations, TTLCache
+
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", "30"))
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "10000"))
+
+user_cache = TTLCache(ttl=USER_CACHE_TTL, maxsize=USER_CACHE_SIZE)
+
+
+def _delete(user_ids):
+    for user_id in user_ids:
+        user_cache.delete(user_id)
+
+
+_invalidations = Invalidations('user_cache', _delete, ttl=USER_CACHE_TTL, maxsize=USER_CACHE_SIZE)
+
+
+def invalidate(*user_ids):
+    """Kullanıcıları önbellekten sil"""
+    _invalidations.invalidate(*user_ids)
+
+
+def _snapshot(user):
+    return {attr.key: getattr(user, attr.key) for attr in user.__mapper__.column_attrs}
+
+
+def _from_snapshot(values):
+    """Önbellekteki değerlerden temiz, ayrık (detached) bir User nesnesi"""
+    from sqlalchemy.orm import make_transient_to_detached
+    from models import User
+
+    user = User.__mapper__.class_manager.new_instance()
+    # Doğrudan __dict__'e yazılır: değişiklik geçmişi oluşmaz, nesne "temiz" kalır
+    user.__dict__.update(values)
+    make_transient_to_detached(user)
+    return user
+
+
+def load_user(user_id):
+    """user_loader: önbellekte varsa SQL'siz, yoksa veritabanından"""
+    from models import db, User
+
+    if user_cache.ttl <= 0:
+        return db.session.get(User, user_id)
+
+    values = user_cache.get(user_id)
+    if values is not None:
+        return db.session.merge(_from_snapshot(values), load=False)
+
+    started = time.monotonic()
+    user = db.session.get(User, user_id)
+    if user is not None and _invalidations.allows_write(user_id, started):
+        user_cache.set(user_id, _snapshot(user))
+    return user
+
+
+_events_registered = False
+
+
+def register_user_events():
+    """Kullanıcı güncellenince / silinince önbelleği temizle (flush'ta ve commit sonrasında)"""
+    global _events_registered
+    if _events_registered:
+        return
+    from sqlalchemy import event
+    from models import User
+
+    def on_change(mapper, connection, target):
+        _invalidations.changed(target, {target.id})
+
+    event.listen(User, 'after_update', on_change)
+    event.listen(User, 'after_delete', on_change)
+    _invalidations.listen()
+    _events_registered = True
@@ -0,0 +1,489 @@
+"""
+Vektör Veritabanı Erişim Katmanı
+data/chroma_db için tek yazıcılı (single-writer) broker
+
+Chroma'nın PersistentClient'ı çoklu süreç (multi-process) güvenli değildir;
+her worker kendi client'ını açtığında aynı SQLite dosyası ve HNSW segmentleri
+üzerinde yarışır. Bu modülde veritabanını yalnızca tek bir süreç (broker) açar:
+
+- Yazma işlemleri (add/upsert/update/delete) tek bir yazıcı thread'inde
+  sıraya alınır ve aynı koleksiyona gelen ardışık istekler tek çağrıda
+  toplu (batch) olarak yazılır.
+- Okuma işlemleri (query/get/count/peek) her bağlantının kendi thread'inde
+  eşzamanlı olarak çalıştırılır.
+
+Diğer süreçler broker'a multiprocessing.connection üzerinden bağlanır.
+Broker adresini ilk bağlayan süreç broker olur (port seçimi), istenirse
+`python vector_store.py` ile ayrı bir süreç olarak da çalıştırılabilir.
+
+Bağlantı pickle kullandığı için broker'a bağlanabilen her süreç broker içinde
+kod çalıştırabilir. TCP adresi yalnızca VECTOR_STORE_AUTHKEY (veya varsayılan
+olmayan bir SECRET_KEY) ayarlıysa kullanılır. Anahtar yoksa broker veritabanı
+klasöründe yalnızca sahibinin erişebildiği (0600) bir Unix soketinde dinler.
+"""
+import os
+import sys
+import time
+import queue
+import logging
+import threading
+from multiprocessing.connection import Listener, Client
+
+try:
+    import fcntl
+except ImportError:  # Windows: flock ve Unix soketi yok; broker süreç içinde açılır
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ADDRESS = "127.0.0.1:6390"
+# Anahtar yokken kullanılan Unix soketi (veritabanı klasöründe)
+SOCKET_NAME = "vector_store.sock"
+UNIX_PREFIX = "unix:"
+# app.py'deki SECRET_KEY varsayılanı; herkesçe bilindiği için anahtar sayılmaz
+DEFAULT_SECRET_KEY = "dev-secret-key-change-this"
+
+# Broker'a iletilen işlem türleri
+WRITE_OPS = {"add", "upsert", "update", "delete"}
+READ_OPS = {"query", "get", "count", "peek"}
+BATCHABLE_OPS = {"add", "upsert"}
+BATCH_FIELDS = ("ids", "embeddings", "documents", "metadatas")
+# Bağlantı koparsa bir kez tekrar gönderilebilen işlemler; diğer yazmalar broker'a
+# ulaşıp uygulanmış olabileceği için tekrar gönderilmez
+RETRY_OPS = READ_OPS | {"upsert", "ensure_collection"}
+
+
+def _is_unix(address: str) -> bool:
+    return address.startswith(UNIX_PREFIX)
+
+
+def _parse_address(address: str):
+    """'host:port' adresini (host, port) tuple'ına, 'unix:/yol' adresini soket yoluna çevir"""
+    if _is_unix(address):
+        return address[len(UNIX_PREFIX):]
+    host, _, port = address.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+
+def _default_authkey():
+    """VECTOR_STORE_AUTHKEY veya varsayılan olmayan SECRET_KEY; ikisi de yoksa None"""
+    key = os.getenv("VECTOR_STORE_AUTHKEY")
+    if not key:
+        secret = os.getenv("SECRET_KEY", "")
+        key = secret if secret != DEFAULT_SECRET_KEY else ""
+    return key.encode("utf-8") if key else None
+
+
+def default_address(path: str, authkey) -> str:
+    """VECTOR_STORE_ADDRESS; yoksa anahtar varsa TCP, yoksa veritabanı klasöründeki Unix soketi"""
+    address = os.getenv("VECTOR_STORE_ADDRESS")
+    if address:
+        return address
+    if authkey:
+        return DEFAULT_ADDRESS
+    return UNIX_PREFIX + os.path.join(os.path.abspath(path), SOCKET_NAME)
+
+
+def _listen(address: str, authkey) -> Listener:
+    """
+    Broker adresini bağla
+    TCP adresi anahtarsız açılmaz; Unix soketi yalnızca sahibine açık (0600) oluşturulur.
+    """
+    if not _is_unix(address):
+        if not authkey:
+            raise VectorStoreError(
+                f"Broker TCP adresinde ({address}) anahtarsız açılamaz: "
+                "VECTOR_STORE_AUTHKEY veya SECRET_KEY ayarlayın ya da unix:/yol adresi kullanın"
+            )
+        return Listener(_parse_address(address), authkey=authkey)
+    if fcntl is None:
+        raise VectorStoreError(
+            f"Unix soketi ({address}) bu platformda kullanılamaz: VECTOR_STORE_AUTHKEY ayarlayıp TCP adresi kullanın"
+        )
+    path = _parse_address(address)
+    _claim_socket(path)
+    previous = os.umask(0o177)
+    try:
+        listener = Listener(path, family="AF_UNIX", authkey=authkey)
+    finally:
+        os.umask(previous)
+    os.chmod(path, 0o600)
+    return listener
+
+
+# Sahip olunan Unix soketlerinin kilit dosyaları (süreç yaşadığı sürece açık kalır)
+_socket_locks = {}
+
+
+def _claim_socket(path: str):
+    """
+    Unix soketinin kilidini al ve ölmüş bir broker'dan kalan soket dosyasını sil
+    Kilit başka bir çalışan broker'daysa OSError (BlockingIOError); işletim sistemi
+    kilidi broker süreci ölünce bırakır.
+    """
+    if path in _socket_locks:
+        return
+    lock = open(path + ".lock", "a")
+    try:
+        fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock.close()
+        raise
+    if os.path.exists(path):
+        os.unlink(path)
+    _socket_locks[path] = lock
+
+
+class VectorStoreError(Exception):
+    """Broker tarafında oluşan hatalar"""
+
+
+class _PendingWrite:
+    """Yazıcı kuyruğunda bekleyen tek bir yazma isteği"""
+
+    __slots__ = ("op", "collection", "kwargs", "done", "result", "error")
+
+    def __init__(self, op: str, collection: str, kwargs: dict):
+        self.op = op
+        self.collection = collection
+        self.kwargs = kwargs
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class VectorStoreBroker:
+    """
+    Chroma veritabanının tek sahibi
+    Yazmaları seri hale getirip toplu yazar, okumaları eşzamanlı sunar
+    """
+
+    def __init__(self, path: str, max_batch: int = 256, max_delay: float = 0.02):
+        import chromadb
+        from chromadb.config import Settings as ChromaSettings
+
+        self.path = path
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.client = chromadb.PersistentClient(
+            path=str(path),
+            settings=ChromaSettings(anonymized_telemetry=False)
+        )
+        self._collections = {}
+        self._collections_lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._listener = None
+        self._stopped = threading.Event()
+        self._writer = threading.Thread(target=self._writer_loop, name="vector-store-writer", daemon=True)
+        self._writer.start()
+
+    def _collection(self, name: str):
+        collection = self._collections.get(name)
+        if collection is None:
+            with self._collections_lock:
+                collection = self._collections.get(name)
+                if collection is None:
+                    collection = self.client.get_or_create_collection(name=name)
+                    self._collections[name] = collection
+        return collection
+
+    # --- İstek işleme ---
+
+    def execute(self, op: str, collection: str, kwargs: dict):
+        """Bir isteği çalıştır: okumalar hemen, yazmalar kuyruk üzerinden"""
+        if op == "ensure_collection":
+            self._collection(collection)
+            return None
+        if op in READ_OPS:
+            return getattr(self._collection(collection), op)(**kwargs)
+        if op in WRITE_OPS:
+            pending = _PendingWrite(op, collection, kwargs)
+            self._queue.put(pending)
+            pending.done.wait()
+            if pending.error is not None:
+                raise pending.error
+            return pending.result
+        raise VectorStoreError(f"Bilinmeyen işlem: {op}")
+
+    def _writer_loop(self):
+        while not self._stopped.is_set():
+            try:
+                first = self._queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+
+            batch = [first]
+            deadline = time.monotonic() + self.max_delay
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            self._apply_batch(batch)
+
+    def _apply_batch(self, batch):
+        """Ardışık, aynı koleksiyona giden add/upsert isteklerini birleştirerek yaz"""
+        group = []
+        for pending in batch:
+            if group and not self._can_merge(group[0], pending):
+                self._apply_group(group)
+                group = []
+            group.append(pending)
+        if group:
+            self._apply_group(group)
+
+    @staticmethod
+    def _can_merge(head: _PendingWrite, pending: _PendingWrite) -> bool:
+        return (
+            head.op in BATCHABLE_OPS
+            and pending.op == head.op
+            and pending.collection == head.collection
+            and set(pending.kwargs) == set(head.kwargs)
+            and set(head.kwargs) <= set(BATCH_FIELDS)
+        )
+
+    def _apply_group(self, group):
+        head = group[0]
+        try:
+            collection = self._collection(head.collection)
+            if len(group) == 1:
+                head.result = getattr(collection, head.op)(**head.kwargs)
+            else:
+                merged = {field: [] for field in head.kwargs}
+                for pending in group:
+                    for field, values in pending.kwargs.items():
+                        merged[field].extend(values)
+                getattr(collection, head.op)(**merged)
+            for pending in group:
+                pending.done.set()
+        except Exception as e:
+            if len(group) == 1:
+                head.error = e
+                head.done.set()
+                return
+            # Toplu yazma başarısız olursa hatayı doğru isteğe bağlamak için tek tek dene
+            logger.warning(f"Toplu vektör yazma başarısız, istekler tek tek deneniyor: {e}")
+            for pending in group:
+                self._apply_group([pending])
+
+    # --- Ağ sunucusu ---
+
+    def serve(self, address: str = None, authkey: bytes = None, listener: Listener = None):
+        """Bağlantıları kabul et (bloklar)"""
+        if listener is None:
+            authkey = authkey or _default_authkey()
+            address = address or default_address(self.path, authkey)
+        self._listener = listener or _listen(address, authkey)
+        logger.info(f"Vektör veritabanı broker'ı dinliyor: {address} ({self.path})")
+        while not self._stopped.is_set():
+            try:
+                conn = self._listener.accept()
+            except OSError:
+                if self._stopped.is_set():
+                    break
+                continue
+            except Exception as e:
+                logger.warning(f"Broker bağlantısı reddedildi: {e}")
+                continue
+            threading.Thread(target=self._handle_connection, args=(conn,), daemon=True).start()
+
+    def _handle_connection(self, conn):
+        with conn:
+            while True:
+                try:
+                    op, collection, kwargs = conn.recv()
+                except (EOFError, OSError):
+                    return
+                try:
+                    conn.send(("ok", self.execute(op, collection, kwargs)))
+                except Exception as e:
+                    try:
+                        conn.send(("error", f"{type(e).__name__}: {e}"))
+                    except OSError:
+                        return
+
+    def stop(self):
+        self._stopped.set()
+        if self._listener is not None:
+            self._listener.close()
+
+
+class BrokeredCollection:
+    """
+    Chroma Collection arayüzünün broker üzerinden çalışan karşılığı
+    ChromaVectorStore'a doğrudan verilebilir
+    """
+
+    def __init__(self, store: "VectorStoreClient", name: str):
+        self._store = store
+        self.name = name
+
+    def _call(self, op: str, **kwargs):
+        # None değerler Chroma'ya hiç gönderilmemiş gibi davranmalı
+        kwargs = {key: value for key, value in kwargs.items() if value is not None}
+        return self._store.call(op, self.name, kwargs)
+
+    def add(self, ids, embeddings=None, metadatas=None, documents=None, **kwargs):
+        return self._call("add", ids=ids, embeddings=embeddings, metadatas=metadatas, documents=documents, **kwargs)
+
+    def upsert(self, ids, embeddings=None, metadatas=None, documents=None, **kwargs):
+        return self._call("upsert", ids=ids, embeddings=embeddings, metadatas=metadatas, documents=documents, **kwargs)
+
+    def update(self, ids, **kwargs):
+        return self._call("update", ids=ids, **kwargs)
+
+    def delete(self, ids=None, where=None, **kwargs):
+        return self._call("delete", ids=ids, where=where, **kwargs)
+
+    def query(self, **kwargs):
+        return self._call("query", **kwargs)
+
+    def get(self, ids=None, **kwargs):
+        return self._call("get", ids=ids, **kwargs)
+
+    def count(self):
+        return self._call("count")
+
+    def peek(self, limit: int = 10):
+        return self._call("peek", limit=limit)
+
+
+class VectorStoreClient:
+    """
+    Süreç başına tek broker istemcisi
+    Broker bu süreçteyse çağrılar doğrudan, değilse bağlantı üzerinden yapılır
+    """
+
+    def __init__(self, path: str, address: str = None, authkey: bytes = None, autostart: bool = None):
+        self.path = str(path)
+        self.authkey = authkey or _default_authkey()
+        self.address = address or default_address(self.path, self.authkey)
+        if autostart is None:
+            autostart = os.getenv("VECTOR_STORE_AUTOSTART", "true").lower() in ("1", "true", "yes")
+        self.autostart = autostart
+        self.broker = None
+        self._broker_pid = None
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        # Unix soketi kilitlenemiyorsa (Windows) paylaşılan broker yoktur
+        self.in_process = _is_unix(self.address) and fcntl is None
+
+    def get_or_create_collection(self, name: str) -> BrokeredCollection:
+        self.call("ensure_collection", name, {})
+        return BrokeredCollection(self, name)
+
+    def call(self, op: str, collection: str, kwargs: dict):
+        if self.broker is not None and self._broker_pid != os.getpid():
+            # fork ile kopyalanan broker'ın thread'leri bu süreçte çalışmaz
+            self.broker = None
+        if self.broker is None and self.in_process:
+            self._open_in_process()
+        for attempt in range(2):
+            conn = None if self.broker is not None else self._connection()
+            if conn is None:
+                return self.broker.execute(op, collection, kwargs)
+            try:
+                conn.send((op, collection, kwargs))
+                status, payload = conn.recv()
+                break
+            except (EOFError, OSError) as e:
+                # Broker yeniden başlamış olabilir; bağlantı yenilenir, istek yalnızca
+                # tekrarı güvenliyse (okuma, upsert) bir kez daha gönderilir
+                self._local.conn = None
+                if attempt or op not in RETRY_OPS:
+                    raise VectorStoreError(f"Broker bağlantısı koptu ({op}): {e}") from e
+
+        if status == "error":
+            raise VectorStoreError(payload)
+        return payload
+
+    def _connection(self):
+        """Thread'e ait broker bağlantısını döndür; bu süreç broker olduysa None"""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+
+        last_error = None
+        for attempt in range(50):
+            try:
+                conn = Client(_parse_address(self.address), family="AF_UNIX" if _is_unix(self.address) else "AF_INET",
+                              authkey=self.authkey)
+                self._local.conn = conn
+                # fork sonrası üst sürecin soketi paylaşılmamalı
+                self._local.pid = os.getpid()
+                return conn
+            except (ConnectionRefusedError, FileNotFoundError) as e:
+                last_error = e
+                if self.autostart and self._try_become_broker():
+                    return None
+                time.sleep(min(0.05 * (attempt + 1), 0.5))
+        raise VectorStoreError(f"Vektör veritabanı broker'ına bağlanılamadı ({self.address}): {last_error}")
+
+    def _open_in_process(self):
+        """Veritabanını dinlemeyen, yalnızca bu sürecin kullandığı broker ile aç"""
+        with self._lock:
+            if self.broker is not None:
+                return
+            logger.warning(
+                "Bu platformda Unix soketi kullanılamıyor; vektör veritabanı tek süreç modunda açıldı. "
+                "Birden fazla süreç için VECTOR_STORE_AUTHKEY ayarlayıp TCP broker kullanın"
+            )
+            self.broker = VectorStoreBroker(self.path)
+            self._broker_pid = os.getpid()
+
+    def _try_become_broker(self) -> bool:
+        """Broker adresini bağlayabilirsek bu süreç broker olur"""
+        with self._lock:
+            if self.broker is not None:
+                return True
+            try:
+                listener = _listen(self.address, self.authkey)
+            except OSError:
+                # Adres (veya Unix soketinin kilidi) başka bir süreçte; o süreç broker
+                return False
+            self.broker = VectorStoreBroker(self.path)
+            self._broker_pid = os.getpid()
+            threading.Thread(
+                target=self.broker.serve,
+                kwargs={"address": self.address, "listener": listener},
+                name="vector-store-broker",
+                daemon=True
+            ).start()
+            logger.info(f"Bu süreç (pid={os.getpid()}) vektör veritabanı broker'ı oldu")
+            return True
+
+
+
+# Süreç başına tek istemci (RAGSystem örnekleri bunu paylaşır)
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_vector_store(path: str = None) -> VectorStoreClient:
+    """Verilen veritabanı yolu için süreç içi paylaşılan istemciyi döndür"""
+    path = str(path or os.getenv("CHROMA_DB_PATH", "data/chroma_db"))
+    with _clients_lock:
+        client = _clients.get(path)
+        if client is None:
+            client = VectorStoreClient(path)
+            _clients[path] = client
+        return client
+
+
+if __name__ == "__main__":
+    # Ayrı broker süreci: python vector_store.py [veritabanı_yolu]
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO)
+    db_path = sys.argv[1] if len(sys.argv) > 1 else os.getenv("CHROMA_DB_PATH", "data/chroma_db")
+    os.makedirs(db_path, exist_ok=True)
+    broker = VectorStoreBroker(db_path)
+    try:
+        broker.serve()
+    except KeyboardInterrupt:
+        broker.stop()
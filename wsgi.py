@@ -0,0 +1,37 @@
+"""
+Production giriş noktası
+gunicorn -c gunicorn.conf.py wsgi:app
+
+gunicorn.conf.py preload_app=True ayarıyla bu modül worker'lar fork edilmeden
+önce master süreçte bir kez import edilir. Embedding modeli ve şablonlar burada
+yüklendiği için tüm worker'lar bu bellek sayfalarını copy-on-write paylaşır.
+"""
+import gc
+import os
+
+from app import create_app, socketio  # noqa: F401
+
+app = create_app()
+
+def _preload_templates(app):
+    """Jinja şablonlarını derleyip önbelleğe al"""
+    for name in app.jinja_env.list_templates():
+        if name.endswith('.html'):
+            try:
+                app.jinja_env.get_template(name)
+            except Exception as e:
+                app.logger.warning(f"Şablon derlenemedi ({name}): {e}")
+
+if os.getenv('RAG_PRELOAD', 'True').lower() in ('1', 'true', 'yes'):
+    try:
+        from rag_system import preload
+        preload()
+    except Exception as e:
+        app.logger.warning(f"RAG ön yüklemesi yapılamadı, worker'larda tembel yüklenecek: {e}")
+
+_preload_templates(app)
+
+# Ön yüklenen nesneleri GC'nin dışında tut; aksi halde ilk toplama sırasında
+# referans sayaçlarına yazılır ve paylaşılan sayfalar her worker'a kopyalanır
+gc.collect()
+gc.freeze()